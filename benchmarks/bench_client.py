@@ -0,0 +1,492 @@
+"""
+Mizar client benchmarks against a local stand-in server.
+
+    python -m benchmarks.bench_client --latency 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Dict
+from typing import List
+
+import numpy as np
+
+from mizar.api import Mizar
+from mizar.ratelimit import RetryPolicy
+from mizar.ratelimit import TokenBucket
+from mizar.studio import MizarStudio
+from mizar.tests.fake_server import FakeMizarServer
+from mizar.tests.fake_server import make_bars
+
+MINUTE = 60_000
+
+
+def _client(server: FakeMizarServer, **kwargs) -> Mizar:
+    return Mizar("api_key", scheme="http", host=server.host, **kwargs)
+
+
+def _timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def bench_bar_data(latency: float, num_requests: int = 50) -> List[Dict[str, Any]]:
+    with FakeMizarServer(bars=make_bars(500), latency=latency) as server:
+        mizar = _client(server)
+        elapsed, _ = _timed(
+            lambda: [
+                mizar.get_bar_data(base_asset="BTC", quote_asset="USDT", limit=500)
+                for _ in range(num_requests)
+            ]
+        )
+    return [
+        {
+            "benchmark": "get_bar_data",
+            "case": "500_bars_page",
+            "mean_s": elapsed / num_requests,
+            "bars_per_s": num_requests * 500 / elapsed,
+        }
+    ]
+
+
+def bench_bar_df(
+    latency: float, num_bars: int = 20_000, max_workers: int = 8
+) -> List[Dict[str, Any]]:
+    start_time = (int(time.time()) // 60 - num_bars - 500) * MINUTE
+    bars = make_bars(num_bars + 500, start_time=start_time)
+    results = []
+
+    for workers in (1, max_workers):
+        path = tempfile.mkdtemp()
+        try:
+            with FakeMizarServer(bars=bars[:num_bars], latency=latency) as server:
+                studio = MizarStudio(_client(server), path=path)
+
+                def get_bar_df():
+                    return studio.get_bar_df(
+                        "BTC", "USDT", bar_subclass="1min", max_workers=workers
+                    )
+
+                cold, _ = _timed(get_bar_df)
+                warm, _ = _timed(get_bar_df)
+                server.bars = bars
+                incremental, _ = _timed(get_bar_df)
+                requests = len(server.requests)
+        finally:
+            shutil.rmtree(path)
+
+        results.append(
+            {
+                "benchmark": "get_bar_df",
+                "case": f"{num_bars}_bars_{workers}_workers",
+                "cold_s": cold,
+                "warm_s": warm,
+                "incremental_s": incremental,
+                "requests": requests,
+            }
+        )
+    return results
+
+
+def bench_bar_panel(
+    latency: float, num_pairs: int = 40, num_bars: int = 2_000, max_workers: int = 16
+) -> List[Dict[str, Any]]:
+    start_time = (int(time.time()) // 60 - num_bars) * MINUTE
+    pairs = [(f"COIN{i}", "USDT") for i in range(num_pairs)]
+    results = []
+    with FakeMizarServer(
+        bars=make_bars(num_bars, start_time=start_time), latency=latency
+    ) as server:
+        for case in ("loop", f"panel_{max_workers}_workers"):
+            path = tempfile.mkdtemp()
+            try:
+                studio = MizarStudio(_client(server, pool_size=max_workers), path=path)
+                if case == "loop":
+                    elapsed, _ = _timed(
+                        lambda: [
+                            studio.get_bar_df(
+                                base_asset, quote_asset, bar_subclass="1min"
+                            )
+                            for base_asset, quote_asset in pairs
+                        ]
+                    )
+                else:
+                    elapsed, _ = _timed(
+                        lambda: studio.get_bar_panel(
+                            pairs, bar_subclass="1min", max_workers=max_workers
+                        )
+                    )
+            finally:
+                shutil.rmtree(path)
+            results.append(
+                {
+                    "benchmark": "get_bar_panel",
+                    "case": f"{num_pairs}_pairs_{case}",
+                    "total_s": elapsed,
+                    "series_per_s": num_pairs / elapsed,
+                }
+            )
+    return results
+
+
+def bench_orders(
+    latency: float, num_orders: int = 200, concurrency: int = 16
+) -> List[Dict[str, Any]]:
+    results = []
+    with FakeMizarServer(latency=latency) as server:
+        mizar = _client(server)
+
+        def open_position(_):
+            return mizar.open_position(1, "BTC", "USDT", size=0.1, is_long=True)
+
+        elapsed, _ = _timed(lambda: [open_position(i) for i in range(num_orders)])
+        results.append(
+            {
+                "benchmark": "open_position",
+                "case": "sequential",
+                "total_s": elapsed,
+                "orders_per_s": num_orders / elapsed,
+            }
+        )
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            elapsed, _ = _timed(
+                lambda: list(executor.map(open_position, range(num_orders)))
+            )
+        results.append(
+            {
+                "benchmark": "open_position",
+                "case": f"{concurrency}_threads",
+                "total_s": elapsed,
+                "orders_per_s": num_orders / elapsed,
+            }
+        )
+
+        try:
+            from mizar.aio import AsyncMizar
+            import aiohttp  # noqa: F401
+        except ImportError:
+            return results
+
+        async def open_positions():
+            async with AsyncMizar(
+                "api_key",
+                scheme="http",
+                host=server.host,
+                max_concurrency=concurrency,
+            ) as async_mizar:
+                await asyncio.gather(
+                    *(
+                        async_mizar.open_position(
+                            1, "BTC", "USDT", size=0.1, is_long=True
+                        )
+                        for _ in range(num_orders)
+                    )
+                )
+
+        elapsed, _ = _timed(lambda: asyncio.run(open_positions()))
+        results.append(
+            {
+                "benchmark": "open_position",
+                "case": f"async_{concurrency}_concurrency",
+                "total_s": elapsed,
+                "orders_per_s": num_orders / elapsed,
+            }
+        )
+    return results
+
+
+def bench_order_batch(latency: float, num_legs: int = 50) -> List[Dict[str, Any]]:
+    orders = [
+        dict(
+            strategy_id=1, base_asset="BTC", quote_asset="USDT", size=0.1, is_long=True
+        )
+        for _ in range(num_legs)
+    ]
+    with FakeMizarServer(latency=latency) as server:
+        mizar = _client(server, pool_size=num_legs)
+
+        sent = []
+
+        def open_position(**order):
+            sent.append(time.perf_counter())
+            return mizar.open_position(**order)
+
+        elapsed, _ = _timed(lambda: [open_position(**order) for order in orders])
+        results = [
+            {
+                "benchmark": "order_batch",
+                "case": f"{num_legs}_legs_loop",
+                "total_s": elapsed,
+                "dispatch_latency_s": sent[-1] - sent[0],
+            }
+        ]
+
+        elapsed, batch = _timed(
+            lambda: mizar.open_positions(orders, max_workers=num_legs)
+        )
+        results.append(
+            {
+                "benchmark": "order_batch",
+                "case": f"{num_legs}_legs_batch",
+                "total_s": elapsed,
+                "dispatch_latency_s": batch.dispatch_latency,
+                "fill_spread_s": batch.fill_spread,
+                "errors": len(batch.errors),
+            }
+        )
+    return results
+
+
+def bench_dca_bot_states(
+    latency: float, num_bots: int = 100, concurrency: int = 16
+) -> List[Dict[str, Any]]:
+    from mizar.dca import DcaBotState
+    from mizar.dca import refresh_dca_bot_states
+
+    results = []
+    with FakeMizarServer(latency=latency) as server:
+        mizar = _client(server, pool_size=concurrency)
+
+        def poll(bot_id):
+            for part in (
+                "position",
+                "safety_orders",
+                "active_safety_orders",
+                "inactive_safety_orders",
+                "take_profit_orders",
+            ):
+                getattr(mizar, f"get_dca_bot_{part}")(bot_id, "BTC", "USDT")
+
+        requests = len(server.requests)
+        elapsed, _ = _timed(lambda: [poll(bot_id) for bot_id in range(num_bots)])
+        results.append(
+            {
+                "benchmark": "dca_bot_states",
+                "case": f"{num_bots}_bots_sequential",
+                "total_s": elapsed,
+                "requests": len(server.requests) - requests,
+            }
+        )
+
+        states = [
+            DcaBotState(
+                mizar, bot_id, "BTC", "USDT", is_active=lambda order: order["is_active"]
+            )
+            for bot_id in range(num_bots)
+        ]
+        for case in ("snapshot", "unchanged"):
+            requests = len(server.requests)
+            elapsed, _ = _timed(
+                lambda: refresh_dca_bot_states(states, max_workers=concurrency)
+            )
+            results.append(
+                {
+                    "benchmark": "dca_bot_states",
+                    "case": f"{num_bots}_bots_{case}",
+                    "total_s": elapsed,
+                    "requests": len(server.requests) - requests,
+                }
+            )
+    return results
+
+
+def bench_position_ledger(
+    latency: float,
+    num_strategies: int = 20,
+    num_cycles: int = 50,
+    reconcile_every: int = 10,
+) -> List[Dict[str, Any]]:
+    """
+    A risk loop checking the BTCUSDT position of every strategy each cycle,
+    polling the server or looking the ledger up and reconciling it every
+    reconcile_every cycles.
+    """
+    results = []
+    with FakeMizarServer(latency=latency) as server:
+        for strategy_id in range(num_strategies):
+            _client(server).open_position(strategy_id, "BTC", "USDT", 0.1, True)
+
+        mizar = _client(server)
+
+        def poll():
+            exposed = []
+            for _ in range(num_cycles):
+                for strategy_id in range(num_strategies):
+                    positions = mizar.get_all_open_positions(strategy_id)
+                    exposed.append(
+                        any(
+                            position["base_asset"] == "BTC"
+                            for position in positions["open_positions"]
+                        )
+                    )
+            return exposed
+
+        requests = len(server.requests)
+        elapsed, _ = _timed(poll)
+        results.append(
+            {
+                "benchmark": "position_ledger",
+                "case": "polling",
+                "total_s": elapsed,
+                "requests": len(server.requests) - requests,
+            }
+        )
+
+        mizar = _client(server, position_ledger=True)
+
+        def lookup():
+            for strategy_id in range(num_strategies):
+                mizar.ledger.track(strategy_id)
+            for cycle in range(1, num_cycles):
+                if cycle % reconcile_every == 0:
+                    mizar.ledger.reconcile_all()
+                exposed = [
+                    mizar.ledger.has_position(strategy_id, "BTC", "USDT")
+                    for strategy_id in range(num_strategies)
+                ]
+            return exposed
+
+        requests = len(server.requests)
+        elapsed, _ = _timed(lookup)
+        results.append(
+            {
+                "benchmark": "position_ledger",
+                "case": f"ledger_reconcile_every_{reconcile_every}",
+                "total_s": elapsed,
+                "requests": len(server.requests) - requests,
+            }
+        )
+    return results
+
+
+def bench_rate_limited(num_requests: int = 300, rate_limit: int = 200):
+    results = []
+    for case, kwargs in (
+        ("no_limiter", {"retry": RetryPolicy(max_retries=10)}),
+        (
+            "token_bucket",
+            {
+                "retry": RetryPolicy(max_retries=10),
+                "rate_limits": {"default": TokenBucket(rate_limit * 0.95, 10)},
+            },
+        ),
+    ):
+        with FakeMizarServer(rate_limit=rate_limit) as server:
+            mizar = _client(server, **kwargs)
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                elapsed, _ = _timed(
+                    lambda: list(
+                        executor.map(
+                            lambda _: mizar.get_exchanges(), range(num_requests)
+                        )
+                    )
+                )
+            results.append(
+                {
+                    "benchmark": "rate_limited",
+                    "case": case,
+                    "total_s": elapsed,
+                    "requests_per_s": num_requests / elapsed,
+                    "throttled": server.throttled,
+                }
+            )
+    return results
+
+
+def bench_coalescing(
+    latency: float, num_calls: int = 400, concurrency: int = 16
+) -> List[Dict[str, Any]]:
+    results = []
+    for coalesce in (False, True):
+        with FakeMizarServer(latency=latency) as server:
+            mizar = _client(server, pool_size=concurrency, coalesce=coalesce)
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                elapsed, _ = _timed(
+                    lambda: list(
+                        executor.map(
+                            lambda _: mizar.get_all_open_positions(1),
+                            range(num_calls),
+                        )
+                    )
+                )
+        results.append(
+            {
+                "benchmark": "coalescing",
+                "case": "single_flight" if coalesce else "no_coalescing",
+                "total_s": elapsed,
+                "calls_per_s": num_calls / elapsed,
+                "requests": server.requests.count("all-open-positions"),
+            }
+        )
+    return results
+
+
+def bench_save_hosted_strategy(size_mb: int = 20) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(0)
+    # half noise, half repetitive weights, like a fitted model
+    strategy = {
+        "weights": rng.normal(size=size_mb * 1_000_000 // 16),
+        "thresholds": np.zeros(size_mb * 1_000_000 // 16),
+    }
+    with FakeMizarServer() as server:
+        mizar = _client(server)
+        tracemalloc.start()
+        elapsed, _ = _timed(
+            lambda: mizar.save_hosted_strategy(
+                strategy, strategy_info={"name": "bench"}
+            )
+        )
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        unchanged, _ = _timed(
+            lambda: mizar.save_hosted_strategy(
+                strategy, strategy_info={"name": "bench"}
+            )
+        )
+    return [
+        {
+            "benchmark": "save_hosted_strategy",
+            "case": f"{size_mb}MB",
+            "total_s": elapsed,
+            "unchanged_s": unchanged,
+            "uploaded_bytes": server.uploaded_bytes,
+            "peak_memory_bytes": peak,
+        }
+    ]
+
+
+def run(latency: float = 0.005) -> List[Dict[str, Any]]:
+    return (
+        bench_bar_data(latency)
+        + bench_bar_df(latency)
+        + bench_bar_panel(latency)
+        + bench_orders(latency)
+        + bench_order_batch(latency)
+        + bench_dca_bot_states(latency)
+        + bench_position_ledger(latency)
+        + bench_rate_limited()
+        + bench_coalescing(latency)
+        + bench_save_hosted_strategy()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+
+    for result in run(args.latency):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
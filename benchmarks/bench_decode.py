@@ -0,0 +1,84 @@
+"""
+Decoding of bars responses into dataframes.
+
+Compares the generic path (json module, dataframe built from the list of
+dicts, types inferred then fixed) with the typed columnar path used by
+MizarStudio (orjson when installed, bars converted straight into the
+BAR_DTYPES columns).
+
+    python -m benchmarks.bench_decode --bars 100000 500000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Any
+from typing import Dict
+from typing import List
+
+import pandas as pd
+
+from mizar.api import _json_loads
+from mizar.bars import _typed
+from mizar.bars import bars_to_frame
+from mizar.studio import MizarStudio
+from mizar.tests.fake_server import make_bars
+
+
+def generic_decode(content: bytes) -> pd.DataFrame:
+    bars = json.loads(content)["bars"]
+    return MizarStudio._bar_df(_typed(pd.DataFrame(bars)))
+
+
+def columnar_decode(content: bytes) -> pd.DataFrame:
+    bars = _json_loads(content)["bars"]
+    return MizarStudio._bar_df(bars_to_frame(bars))
+
+
+def _measure(function, content: bytes, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(content)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+def run(num_bars=(100_000,), repeat: int = 3) -> List[Dict[str, Any]]:
+    results = []
+    for count in num_bars:
+        content = json.dumps({"bars": make_bars(count)}).encode()
+        for case, function in (
+            ("generic", generic_decode),
+            ("columnar", columnar_decode),
+        ):
+            elapsed, peak = _measure(function, content, repeat)
+            results.append(
+                {
+                    "benchmark": "decode_bars",
+                    "case": f"{count}_bars_{case}",
+                    "total_s": elapsed,
+                    "bars_per_s": count / elapsed,
+                    "peak_memory_bytes": peak,
+                }
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bars", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for result in run(args.bars, args.repeat):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
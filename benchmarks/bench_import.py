@@ -0,0 +1,54 @@
+"""
+Startup cost of the Mizar client: ``import mizar`` and the creation of a
+client without the connection check, each in a fresh interpreter.
+
+    python -m benchmarks.bench_import --repeat 10
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+
+SNIPPETS = {
+    "import_mizar": "import mizar",
+    "create_client": "import mizar; mizar.Mizar('api_key', check_connection=False)",
+    "import_studio": "from mizar import MizarStudio",
+}
+
+
+def run_snippet(code: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True)
+    return time.perf_counter() - start
+
+
+def run(repeat: int = 10) -> List[Dict[str, Any]]:
+    baseline = statistics.median(run_snippet("pass") for _ in range(repeat))
+    return [
+        {
+            "benchmark": "startup",
+            "case": name,
+            "median_s": statistics.median(run_snippet(code) for _ in range(repeat)),
+            "interpreter_s": baseline,
+        }
+        for name, code in SNIPPETS.items()
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    for result in run(args.repeat):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Throughput of the Mizar client live against a local stand-in server, and
+replaying the same requests from a ReplayTransport archive.
+
+    python -m benchmarks.bench_replay --latency 0.005
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+
+from mizar.api import Mizar
+from mizar.replay import ReplayTransport
+from mizar.tests.fake_server import FakeMizarServer
+from mizar.tests.fake_server import make_bars
+
+
+def _pages(mizar: Mizar, bars: List[Dict[str, Any]], page_size: int) -> int:
+    requests = 0
+    for bar in bars[::page_size]:
+        mizar.get_bar_data(
+            base_asset="BTC", quote_asset="USDT", start_timestamp=bar["time"]
+        )
+        requests += 1
+    return requests
+
+
+def run(
+    latency: float = 0.005, num_bars: int = 50_000, page_size: int = 500
+) -> List[Dict[str, Any]]:
+    bars = make_bars(num_bars)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        archive = os.path.join(directory, "bars.jsonl.gz")
+        with FakeMizarServer(
+            bars=bars, page_limit=page_size, latency=latency
+        ) as server:
+            transport = ReplayTransport(archive, record=True)
+            mizar = Mizar(
+                "api_key",
+                scheme="http",
+                host=server.host,
+                check_connection=False,
+                transport=transport,
+            )
+            start = time.perf_counter()
+            requests = _pages(mizar, bars, page_size)
+            live_s = time.perf_counter() - start
+            transport.close()
+
+        start = time.perf_counter()
+        transport = ReplayTransport(archive)
+        load_s = time.perf_counter() - start
+        mizar = Mizar("api_key", check_connection=False, transport=transport)
+        start = time.perf_counter()
+        _pages(mizar, bars, page_size)
+        replay_s = time.perf_counter() - start
+
+        for case, elapsed in (("live", live_s), ("replay", replay_s)):
+            results.append(
+                {
+                    "benchmark": "replay",
+                    "case": case,
+                    "total_s": elapsed,
+                    "requests_per_s": requests / elapsed,
+                }
+            )
+        results[-1]["load_s"] = load_s
+        results[-1]["archive_bytes"] = os.path.getsize(archive)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--num-bars", type=int, default=50_000)
+    args = parser.parse_args()
+
+    for result in run(args.latency, args.num_bars):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Range reads against the MizarStudio stores.
+
+Builds synthetic 1min series of growing length and times a full read
+against a one week range read. With the parquet store the week read should
+stay flat while the full read grows with the history, with the memmap
+store both should stay flat.
+
+    python -m benchmarks.bench_store_range --years 1 2 5
+"""
+
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from mizar.bars import BAR_DTYPES
+from mizar.store import BarSeries
+from mizar.store import MemmapBarStore
+from mizar.store import ParquetBarStore
+
+MINUTE = 60_000
+WEEK = 7 * 24 * 60 * MINUTE
+START_TIME = 1_514_764_800_000  # 2018-01-01
+STORES = {"parquet": ParquetBarStore, "memmap": MemmapBarStore}
+
+
+def make_bars_df(num_bars: int) -> pd.DataFrame:
+    bars_df = pd.DataFrame(
+        {
+            column: np.arange(num_bars, dtype=dtype)
+            for column, dtype in BAR_DTYPES.items()
+        }
+    )
+    bars_df["time"] = START_TIME + np.arange(num_bars, dtype="int64") * MINUTE
+    return bars_df
+
+
+def best_of(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(
+    years=(1, 2, 5), repeat: int = 3, stores=("parquet", "memmap")
+) -> List[Dict[str, Any]]:
+    results = []
+    for num_years in years:
+        num_bars = num_years * 365 * 24 * 60
+        bars_df = make_bars_df(num_bars)
+        week_start = START_TIME + num_bars * MINUTE // 2
+        for store_name in stores:
+            path = tempfile.mkdtemp()
+            try:
+                store = STORES[store_name](path)
+                series = BarSeries("binance", "BTCUSDT", "time", "1min")
+                store.append(series, bars_df)
+                # the parquet cases keep their names to compare with older runs
+                case = f"{num_years}y"
+                if store_name != "parquet":
+                    case = f"{case}_{store_name}"
+                results.append(
+                    {
+                        "benchmark": "store_range",
+                        "case": case,
+                        "bars": num_bars,
+                        "full_read_s": best_of(lambda: store.read(series), repeat),
+                        "week_read_s": best_of(
+                            lambda: store.read(series, week_start, week_start + WEEK),
+                            repeat,
+                        ),
+                    }
+                )
+            finally:
+                shutil.rmtree(path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 2, 5])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--stores", nargs="+", choices=sorted(STORES), default=["parquet", "memmap"]
+    )
+    args = parser.parse_args()
+
+    for result in run(args.years, args.repeat, args.stores):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Transport settings of the Mizar client against a local stand-in server.
+
+- pool: concurrent requests from 16 threads with a connection pool of 1
+  (connections beyond it are opened and closed per request) and of 16
+- environment: sequential requests with the environment settings read on
+  every request (the requests default) and read once per host
+- compression: bars pages with and without gzip, reporting the bytes sent
+  by the server. Loopback has no bandwidth limit, so the time only shows
+  the cost of compressing, the bytes show the gain on a real network
+- httpx: the same requests through an HttpxTransport, when httpx is
+  installed. The stand-in server only speaks HTTP/1.1
+
+    python -m benchmarks.bench_transport --latency 0.005
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Dict
+from typing import List
+
+from mizar.api import Mizar
+from mizar.tests.fake_server import FakeMizarServer
+from mizar.tests.fake_server import make_bars
+from mizar.transport import RequestsTransport
+
+
+class _SessionRequestTransport(RequestsTransport):
+    """
+    Send with session.request, which reads the environment every time.
+    """
+
+    def request(self, method, url, **kwargs):
+        headers = dict(self.headers, **kwargs.pop("headers", None) or {})
+        return self.session.request(
+            method, url, headers=headers, timeout=self.timeout, **kwargs
+        )
+
+
+def _timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def _client(server: FakeMizarServer, transport) -> Mizar:
+    return Mizar(
+        "api_key",
+        scheme="http",
+        host=server.host,
+        check_connection=False,
+        transport=transport,
+    )
+
+
+def bench_pool(
+    latency: float, num_requests: int = 640, concurrency: int = 16
+) -> List[Dict[str, Any]]:
+    results = []
+    for pool_maxsize in (1, concurrency):
+        with FakeMizarServer(latency=latency) as server:
+            mizar = _client(server, RequestsTransport(pool_maxsize=pool_maxsize))
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                elapsed = _timed(
+                    lambda: list(
+                        executor.map(
+                            lambda _: mizar.get_exchanges(), range(num_requests)
+                        )
+                    )
+                )
+        results.append(
+            {
+                "benchmark": "transport_pool",
+                "case": f"pool_{pool_maxsize}_{concurrency}_threads",
+                "total_s": elapsed,
+                "requests_per_s": num_requests / elapsed,
+            }
+        )
+    return results
+
+
+def bench_environment(num_requests: int = 500) -> List[Dict[str, Any]]:
+    results = []
+    for case, transport in (
+        ("per_request", _SessionRequestTransport()),
+        ("per_host", RequestsTransport()),
+    ):
+        with FakeMizarServer() as server:
+            mizar = _client(server, transport)
+            elapsed = _timed(
+                lambda: [mizar.get_exchanges() for _ in range(num_requests)]
+            )
+        results.append(
+            {
+                "benchmark": "transport_environment",
+                "case": case,
+                "mean_s": elapsed / num_requests,
+            }
+        )
+    return results
+
+
+def bench_compression(latency: float, num_requests: int = 40) -> List[Dict[str, Any]]:
+    results = []
+    for compression in (False, True):
+        with FakeMizarServer(
+            bars=make_bars(500), latency=latency, compression=True
+        ) as server:
+            mizar = _client(server, RequestsTransport(compression=compression))
+            elapsed = _timed(
+                lambda: [
+                    mizar.get_bar_data(base_asset="BTC", quote_asset="USDT")
+                    for _ in range(num_requests)
+                ]
+            )
+        results.append(
+            {
+                "benchmark": "transport_compression",
+                "case": "gzip" if compression else "identity",
+                "mean_s": elapsed / num_requests,
+                "bytes_per_page": server.sent_bytes // num_requests,
+            }
+        )
+    return results
+
+
+def bench_httpx(
+    latency: float, num_requests: int = 640, concurrency: int = 16
+) -> List[Dict[str, Any]]:
+    try:
+        from mizar.transport import HttpxTransport
+
+        transport = HttpxTransport(http2=False, max_connections=concurrency)
+    except ImportError:
+        return []
+    with FakeMizarServer(latency=latency) as server:
+        mizar = _client(server, transport)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            elapsed = _timed(
+                lambda: list(
+                    executor.map(lambda _: mizar.get_exchanges(), range(num_requests))
+                )
+            )
+    transport.close()
+    return [
+        {
+            "benchmark": "transport_httpx",
+            "case": f"http1_{concurrency}_threads",
+            "total_s": elapsed,
+            "requests_per_s": num_requests / elapsed,
+        }
+    ]
+
+
+def run(latency: float = 0.005) -> List[Dict[str, Any]]:
+    return (
+        bench_pool(latency)
+        + bench_environment()
+        + bench_compression(latency)
+        + bench_httpx(latency)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+
+    for result in run(args.latency):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
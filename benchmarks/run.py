@@ -0,0 +1,119 @@
+"""
+Run the benchmark suite and write the results as json, optionally
+comparing them with the results of a previous run.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --only client --compare results.json
+
+Every result is identified by its benchmark and case. The metrics ending
+in ``_s`` are timings, and the comparison flags the ones slower than the
+baseline by more than the tolerance. It exits with status 1 when there
+are regressions.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+
+from benchmarks import bench_client
+from benchmarks import bench_decode
+from benchmarks import bench_import
+from benchmarks import bench_replay
+from benchmarks import bench_store_range
+from benchmarks import bench_transport
+
+SUITES = {
+    "client": lambda args: bench_client.run(latency=args.latency),
+    "decode": lambda args: bench_decode.run(num_bars=(100_000,), repeat=3),
+    "replay": lambda args: bench_replay.run(latency=args.latency),
+    "store": lambda args: bench_store_range.run(years=(1, 2), repeat=3),
+    "transport": lambda args: bench_transport.run(latency=args.latency),
+    "startup": lambda args: bench_import.run(repeat=5),
+}
+
+
+def _version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("mizar")
+    except Exception:
+        return "unknown"
+
+
+def compare(
+    results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float
+) -> List[Dict[str, Any]]:
+    """
+    Return the timings of results slower than in baseline by more than
+    tolerance (0.2 for 20%).
+    """
+    baseline = {(result["benchmark"], result["case"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result["benchmark"], result["case"]))
+        if previous is None:
+            continue
+        for metric, value in result.items():
+            if not metric.endswith("_s") or not previous.get(metric):
+                continue
+            if value > previous[metric] * (1 + tolerance):
+                regressions.append(
+                    {
+                        "benchmark": result["benchmark"],
+                        "case": result["case"],
+                        "metric": metric,
+                        "baseline": previous[metric],
+                        "value": value,
+                    }
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITES))
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--output", help="file to write the results to")
+    parser.add_argument("--compare", help="results of a previous run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = []
+    for name in args.only or SUITES:
+        for result in SUITES[name](args):
+            print(json.dumps(result), file=sys.stderr)
+            results.append(result)
+
+    report = {
+        "mizar_version": _version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": int(time.time()),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(json.dumps({"regression": regression}), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,21 @@
+from typing import TYPE_CHECKING
+
 from .api import Mizar
-from .studio import MizarStudio
 
-__all__ = ["Mizar", "MizarStudio"]
+if TYPE_CHECKING:
+    from .aio import AsyncMizar
+    from .studio import MizarStudio
+
+__all__ = ["AsyncMizar", "Mizar", "MizarStudio"]
+
+# MizarStudio pulls in pandas, only import it when it is used
+_LAZY_ATTRIBUTES = {"AsyncMizar": ".aio", "MizarStudio": ".studio"}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
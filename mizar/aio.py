@@ -0,0 +1,430 @@
+import asyncio
+from typing import Any
+from typing import AsyncIterator
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from mizar.api import _BarPagination
+from mizar.api import _get_api_key
+from mizar.api import _handle_payload
+from mizar.api import _hosted_strategy_upload
+from mizar.api import _json_loads
+from mizar.api import _previous_upload
+from mizar.api import _upload_key
+from mizar.api import Mizar
+
+
+def _query_params(params: Dict[str, Any]) -> Dict[str, str]:
+    # requests drops None values and stringifies the rest, aiohttp does not
+    return {
+        key: str(value).lower() if isinstance(value, bool) else str(value)
+        for key, value in params.items()
+        if value is not None
+    }
+
+
+class AsyncMizar:
+    """
+    asyncio client of the Mizar API, with the same methods as Mizar as
+    coroutines. All the requests share one connection pool, and at most
+    max_concurrency of them are in flight at the same time.
+
+        async with AsyncMizar(api_key) as mizar:
+            positions = await asyncio.gather(
+                *(mizar.get_all_open_positions(id) for id in strategy_ids)
+            )
+
+    Requires aiohttp.
+    """
+
+    API_VERSION = Mizar.API_VERSION
+    API_URL = Mizar.API_URL
+
+    def __init__(
+        self,
+        api_key=None,
+        scheme="https",
+        host="api.mizar.ai",
+        max_concurrency: int = 100,
+        pool_size: int = 100,
+    ):
+        self.api_key = _get_api_key(api_key)
+        if scheme not in ("http", "https"):
+            raise ValueError("Allowed scheme are http and https")
+        self.api_url = self.API_URL.format(
+            scheme=scheme, host=host, version=self.API_VERSION
+        )
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        self.session = None
+        self._semaphore = None
+        self._uploaded_strategies: Dict[Any, Tuple[str, Any]] = {}
+
+    async def __aenter__(self) -> "AsyncMizar":
+        await self.open()
+        # check working
+        try:
+            await self.ping()
+        except BaseException:
+            await self.close()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def open(self):
+        import aiohttp
+
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                headers={
+                    "Accept": "application/json",
+                    "User-Agent": "mizar/python",
+                    "MIZAR-API-KEY": self.api_key,
+                },
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _request(self, method: str, resource: str, params=None, **kwargs):
+        if self.session is None:
+            await self.open()
+        if params is not None:
+            kwargs["params"] = _query_params(params)
+        async with self._semaphore:
+            async with self.session.request(
+                method, self.api_url + resource, **kwargs
+            ) as resp:
+                payload = await resp.json(content_type=None, loads=_json_loads)
+                return _handle_payload(resp.status < 400, payload)
+
+    async def _get(self, resource, **kwargs):
+        return await self._request("GET", resource, **kwargs)
+
+    async def _post(self, resource, **kwargs):
+        return await self._request("POST", resource, **kwargs)
+
+    async def ping(self):
+        return await self._get("ping")
+
+    async def server_time(self):
+        return await self._get("server-time")
+
+    async def get_exchanges(self):
+        return await self._get("exchanges")
+
+    async def get_symbols(self, exchange: str, market: str = None):
+        return await self._get(
+            "symbols", params={"exchange": exchange, "market": market}
+        )
+
+    async def get_bar_types(
+        self,
+        *,
+        base_asset: Optional[str] = None,
+        quote_asset: Optional[str] = None,
+        bar_type: Optional[str] = None,
+        bar_subclass: Optional[str] = None,
+        exchange: Optional[str] = None,
+        **kwargs,
+    ):
+        """
+        Return the bar types, see Mizar.get_bar_types
+        """
+        kwargs.update(
+            {
+                "base_asset": base_asset,
+                "quote_asset": quote_asset,
+                "bar_type": bar_type,
+                "bar_subclass": bar_subclass,
+                "exchange": exchange,
+            }
+        )
+        return await self._get("bar-types", params=kwargs)
+
+    async def get_bar_data(
+        self,
+        *,
+        base_asset: str,
+        quote_asset: str,
+        start_timestamp: int = 0,
+        limit: int = 500,
+        bar_type: str = "time",
+        bar_subclass: str = "D",
+        exchange: str = "binance",
+        **kwargs,
+    ):
+        """
+        Return the bar data for a specific bar type, see Mizar.get_bar_data
+        """
+        kwargs.update(
+            {
+                "base_asset": base_asset,
+                "quote_asset": quote_asset,
+                "start_timestamp": start_timestamp,
+                "limit": limit,
+                "exchange": exchange,
+                "bar_type": bar_type,
+                "bar_subclass": bar_subclass,
+            }
+        )
+        return await self._get("bars", params=kwargs)
+
+    async def iter_bars(
+        self,
+        *,
+        base_asset: str,
+        quote_asset: str,
+        start_timestamp: int = 0,
+        end_timestamp: Optional[int] = None,
+        limit: int = 500,
+        bar_type: str = "time",
+        bar_subclass: str = "D",
+        exchange: str = "binance",
+        **kwargs,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Paginate the bar data of a specific bar type, see Mizar.iter_bars
+        """
+        pagination = _BarPagination(start_timestamp, end_timestamp)
+
+        while not pagination.done:
+            response = await self.get_bar_data(
+                base_asset=base_asset,
+                quote_asset=quote_asset,
+                start_timestamp=pagination.timestamp,
+                limit=limit,
+                bar_type=bar_type,
+                bar_subclass=bar_subclass,
+                exchange=exchange,
+                **kwargs,
+            )
+            bars = pagination.new_bars(response.get("bars"))
+            if bars:
+                yield bars
+
+    async def save_hosted_strategy(
+        self,
+        strategy,
+        strategy_info: Dict[str, Any],
+        strategy_file: str = "",
+        force: bool = False,
+    ):
+        """
+        Upload a hosted strategy, see Mizar.save_hosted_strategy
+        """
+        import aiohttp
+
+        if not force:
+            unchanged, response = _previous_upload(
+                self._uploaded_strategies, strategy, strategy_info, strategy_file
+            )
+            if unchanged:
+                return response
+
+        data, compressed_strategy = _hosted_strategy_upload(
+            strategy, strategy_info, strategy_file
+        )
+        form = aiohttp.FormData(data)
+        form.add_field(
+            "strategy",
+            compressed_strategy,
+            filename=f"strategy.pkl.{data['strategy-encoding']}",
+            content_type="application/octet-stream",
+        )
+        response = await self._post("publish-hosted-strategy", data=form)
+        self._uploaded_strategies[strategy_info.get("name")] = (
+            _upload_key(strategy_info, strategy_file, data["strategy-sha256"]),
+            response,
+        )
+        return response
+
+    async def create_self_hosted_strategy(
+        self,
+        name: str,
+        description: str,
+        exchanges: List[str],
+        symbols: List[str],
+        market: str,
+    ):
+        return await self._post(
+            "publish-self-hosted-strategy",
+            json={
+                "name": name,
+                "description": description,
+                "exchanges": exchanges,
+                "symbols": symbols,
+                "market": market,
+            },
+        )
+
+    async def open_position(
+        self,
+        strategy_id: int,
+        base_asset: str,
+        quote_asset: str,
+        size: float,
+        is_long: bool,
+    ):
+        return await self._post(
+            "open-position",
+            json={
+                "strategy_id": strategy_id,
+                "base_asset": base_asset,
+                "quote_asset": quote_asset,
+                "size": size,
+                "is_long": is_long,
+            },
+        )
+
+    async def close_position(self, position_id: int):
+        return await self._post(
+            "close-position",
+            json={
+                "position_id": position_id,
+            },
+        )
+
+    async def close_all_positions(self, strategy_id: int):
+        return await self._post(
+            "close-all-positions",
+            json={
+                "strategy_id": strategy_id,
+            },
+        )
+
+    async def get_all_open_positions(self, strategy_id: int):
+        return await self._get(
+            "all-open-positions", params={"strategy_id": strategy_id}
+        )
+
+    async def get_all_self_hosted_strategies_info(self):
+        return await self._get("self-hosted-strategy-info")
+
+    async def get_dca_bot_position(
+        self, bot_id: int, base_asset: str, quote_asset: str
+    ):
+        return await self._get(
+            "dca-bots/get-position",
+            params={
+                "bot_id": bot_id,
+                "base_asset": base_asset,
+                "quote_asset": quote_asset,
+            },
+        )
+
+    async def get_dca_bot_safety_orders(
+        self, bot_id: int, base_asset: str, quote_asset: str
+    ):
+        return await self._get(
+            "dca-bots/get-safety-orders",
+            params={
+                "bot_id": bot_id,
+                "base_asset": base_asset,
+                "quote_asset": quote_asset,
+            },
+        )
+
+    async def get_dca_bot_active_safety_orders(
+        self, bot_id: int, base_asset: str, quote_asset: str
+    ):
+        return await self._get(
+            "dca-bots/get-active-safety-orders",
+            params={
+                "bot_id": bot_id,
+                "base_asset": base_asset,
+                "quote_asset": quote_asset,
+            },
+        )
+
+    async def get_dca_bot_inactive_safety_orders(
+        self, bot_id: int, base_asset: str, quote_asset: str
+    ):
+        return await self._get(
+            "dca-bots/get-inactive-safety-orders",
+            params={
+                "bot_id": bot_id,
+                "base_asset": base_asset,
+                "quote_asset": quote_asset,
+            },
+        )
+
+    async def get_dca_bot_take_profit_orders(
+        self, bot_id: int, base_asset: str, quote_asset: str
+    ):
+        return await self._get(
+            "dca-bots/get-take-profit-orders",
+            params={
+                "bot_id": bot_id,
+                "base_asset": base_asset,
+                "quote_asset": quote_asset,
+            },
+        )
+
+    async def dca_bot_open_position(
+        self,
+        bot_id: int,
+        base_asset: str,
+        quote_asset: str,
+        take_profit_pct: float = None,
+        stop_loss_pct: float = None,
+    ):
+        return await self._post(
+            "dca-bots/open-position",
+            json={
+                "bot_id": bot_id,
+                "base_asset": base_asset,
+                "quote_asset": quote_asset,
+                "take_profit_pct": take_profit_pct,
+                "stop_loss_pct": stop_loss_pct,
+            },
+        )
+
+    async def dca_bot_close_position(
+        self, bot_id: int, base_asset: str, quote_asset: str
+    ):
+        return await self._post(
+            "dca-bots/close-position",
+            json={
+                "bot_id": bot_id,
+                "base_asset": base_asset,
+                "quote_asset": quote_asset,
+            },
+        )
+
+    async def dca_bot_shift_safety_orders(
+        self,
+        bot_id: int,
+        base_asset: str,
+        quote_asset: str,
+        safety_orders_start_price: float,
+    ):
+        return await self._post(
+            "dca-bots/shift-safety-orders",
+            json={
+                "bot_id": bot_id,
+                "base_asset": base_asset,
+                "quote_asset": quote_asset,
+                "safety_orders_start_price": safety_orders_start_price,
+            },
+        )
+
+    async def dca_bot_stop_and_close_positions(self, bot_id: int):
+        return await self._post(
+            "dca-bots/stop-bot-and-close-all-positions",
+            json={"bot_id": bot_id},
+        )
+
+    async def dca_bot_close_positions(self, bot_id: int):
+        return await self._post(
+            "dca-bots/close-all-positions",
+            json={"bot_id": bot_id},
+        )
@@ -1,13 +1,38 @@
+import hashlib
+import io
 import json
 import os
+import time
 from typing import Any
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Tuple
+from typing import Union
 
-import dill as pickle
 import requests
 
+from mizar.cache import request_key
+from mizar.cache import ResponseCache
+from mizar.instrumentation import Instrumentation
+from mizar.ledger import PositionLedger
+from mizar.orders import BatchResult
+from mizar.orders import dispatch
+from mizar.ratelimit import endpoint_group
+from mizar.ratelimit import parse_retry_after
+from mizar.ratelimit import RetryPolicy
+from mizar.ratelimit import TokenBucket
+from mizar.singleflight import SingleFlight
+from mizar.transport import RequestsTransport
+from mizar.transport import Transport
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
 MAXIMUM_STRATEGY_SIZE = 200
 MAXIMUM_STRATEGY_FILE = 2
 
@@ -32,45 +57,357 @@ class StrategyFileSizeExceededLimit(Exception):
         super().__init__(message)
 
 
+def _get_api_key(api_key: Optional[str]) -> str:
+    if not api_key:
+        api_key = os.getenv("MIZAR_API_KEY")
+        if not api_key:
+            raise ValueError("Both api_key and MIZAR_API_KEY are empty")
+    return api_key
+
+
+def _json_loads(content: Union[bytes, str]) -> Any:
+    """
+    Decode a json body, with orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _handle_payload(ok: bool, payload: Any) -> Any:
+    """
+    Return the decoded payload of a successful response, raise
+    MizarAPIException with it otherwise. Shared by the sync and async clients.
+    """
+    if ok:
+        return payload
+    raise MizarAPIException(payload)
+
+
+class _HashingWriter:
+    def __init__(self, writer=None):
+        self.writer = writer
+        self.hash = hashlib.sha256()
+
+    def write(self, data):
+        self.hash.update(data)
+        if self.writer is None:
+            return len(data)
+        return self.writer.write(data)
+
+
+def _strategy_hash(strategy) -> str:
+    """
+    Return the sha256 of the pickled strategy, without holding the pickle
+    in memory nor compressing it.
+    """
+    import dill as pickle
+
+    writer = _HashingWriter()
+    pickle.dump(strategy, writer, protocol=pickle.HIGHEST_PROTOCOL)
+    return writer.hash.hexdigest()
+
+
+def _compress_strategy(strategy) -> Tuple[bytes, str, str]:
+    """
+    Pickle and compress a strategy in one pass, without holding the
+    uncompressed pickle in memory. zstd is used when zstandard is installed,
+    xz otherwise.
+
+    :return: the compressed pickle, its encoding and the sha256 of the
+             uncompressed pickle
+    """
+    import dill as pickle
+
+    buffer = io.BytesIO()
+    try:
+        import zstandard
+    except ImportError:
+        import lzma
+
+        encoding = "xz"
+        with lzma.LZMAFile(buffer, "wb", preset=1) as compressor:
+            writer = _HashingWriter(compressor)
+            pickle.dump(strategy, writer, protocol=pickle.HIGHEST_PROTOCOL)
+    else:
+        encoding = "zstd"
+        compressor = zstandard.ZstdCompressor(level=3).stream_writer(buffer)
+        writer = _HashingWriter(compressor)
+        pickle.dump(strategy, writer, protocol=pickle.HIGHEST_PROTOCOL)
+        compressor.flush(zstandard.FLUSH_FRAME)
+
+    return buffer.getvalue(), encoding, writer.hash.hexdigest()
+
+
+def _hosted_strategy_upload(
+    strategy, strategy_info: Dict[str, Any], strategy_file: str
+) -> Tuple[Dict[str, str], bytes]:
+    """
+    Return the form fields and the compressed strategy to upload.
+    """
+    compressed_strategy, encoding, strategy_hash = _compress_strategy(strategy)
+
+    compressed_strategy_size = len(compressed_strategy) / 1e6
+    strategy_file_size = len(strategy_file.encode("utf-8")) / 1e6
+
+    if compressed_strategy_size > MAXIMUM_STRATEGY_SIZE:
+        raise StrategySizeExceededLimit(compressed_strategy_size, MAXIMUM_STRATEGY_SIZE)
+
+    if strategy_file_size > MAXIMUM_STRATEGY_FILE:
+        raise StrategyFileSizeExceededLimit(strategy_file_size, MAXIMUM_STRATEGY_FILE)
+
+    data = {
+        "strategy-info": json.dumps(strategy_info),
+        "strategy-file": strategy_file,
+        "strategy-encoding": encoding,
+        "strategy-sha256": strategy_hash,
+    }
+    return data, compressed_strategy
+
+
+def _upload_key(
+    strategy_info: Dict[str, Any], strategy_file: str, strategy_hash: str
+) -> str:
+    return hashlib.sha256(
+        json.dumps(
+            [strategy_info, strategy_file, strategy_hash], sort_keys=True
+        ).encode()
+    ).hexdigest()
+
+
+def _previous_upload(
+    uploaded_strategies: Dict[Any, Tuple[str, Any]],
+    strategy,
+    strategy_info: Dict[str, Any],
+    strategy_file: str,
+) -> Tuple[bool, Any]:
+    """
+    Tell whether the same strategy, info and file were the last ones
+    uploaded under the strategy name, and return the response of that
+    upload. The strategy is only pickled to hash it when the name was
+    uploaded before.
+    """
+    previous = uploaded_strategies.get(strategy_info.get("name"))
+    if previous is None:
+        return False, None
+    key = _upload_key(strategy_info, strategy_file, _strategy_hash(strategy))
+    return key == previous[0], previous[1]
+
+
+class _BarPagination:
+    """
+    Pagination state of the bars endpoint, shared by the sync and async
+    clients. Every page is requested from the latest timestamp received,
+    so the bars sharing that timestamp come back and are dropped by
+    first_trade_id.
+    """
+
+    def __init__(
+        self,
+        start_timestamp: int,
+        end_timestamp: Optional[int] = None,
+        seen_trade_ids: Iterable[int] = (),
+    ):
+        self.timestamp = start_timestamp
+        self.end_timestamp = end_timestamp
+        self.done = False
+        # first_trade_id of the bars at start_timestamp already received
+        self._boundary_trade_ids = set(seen_trade_ids)
+
+    def new_bars(self, bars: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Return the bars of a page not received yet, and stop the pagination
+        when there are none left or end_timestamp is reached.
+        """
+        bars = [
+            bar
+            for bar in bars or []
+            if bar["first_trade_id"] not in self._boundary_trade_ids
+        ]
+        if not bars:
+            self.done = True
+            return bars
+
+        last_timestamp = max(bar["time"] for bar in bars)
+        if last_timestamp != self.timestamp:
+            self._boundary_trade_ids = set()
+        self._boundary_trade_ids.update(
+            bar["first_trade_id"] for bar in bars if bar["time"] == last_timestamp
+        )
+        self.timestamp = last_timestamp
+
+        if self.end_timestamp is not None:
+            bars = [bar for bar in bars if bar["time"] < self.end_timestamp]
+            self.done = self.timestamp >= self.end_timestamp
+        return bars
+
+
 class Mizar:
     # API_KEY = "mizar-temp-secret-key"
     API_VERSION = "api/v1"
     API_URL = "{scheme}://{host}/{version}/"
 
-    def __init__(self, api_key=None, api_url=None, scheme="https", host="api.mizar.ai"):
-        if not api_key:
-            api_key = os.getenv("MIZAR_API_KEY")
-            if not api_key:
-                raise ValueError("Both api_key and MIZAR_API_KEY are empty")
-        self.api_key = api_key
-        self.session = self._create_session()
+    def __init__(
+        self,
+        api_key=None,
+        api_url=None,
+        scheme="https",
+        host="api.mizar.ai",
+        rate_limits: Optional[Dict[str, Union[float, TokenBucket]]] = None,
+        retry: Optional[RetryPolicy] = None,
+        cache: Optional[ResponseCache] = None,
+        check_connection: bool = True,
+        instrumentation: Optional[Instrumentation] = None,
+        pool_size: int = 10,
+        coalesce: bool = False,
+        transport: Optional[Transport] = None,
+        position_ledger: bool = False,
+    ):
+        """
+        :param rate_limits: maximum requests per second, or TokenBucket, per
+                            endpoint group: ``bars``, ``orders`` and
+                            ``default``. Groups missing are not limited
+        :type rate_limits: Dict[str, Union[float, TokenBucket]]
+        :param retry: retry policy of the failed requests, by default
+                      requests are not retried
+        :type retry: RetryPolicy
+        :param cache: cache of the reference data endpoints (exchanges,
+                      symbols, bar types, server time and self hosted
+                      strategies info), by default nothing is cached
+        :type cache: ResponseCache
+        :param check_connection: ping the server when the client is created,
+                                 disable it to skip the round-trip in short
+                                 lived processes
+        :type check_connection: bool
+        :param instrumentation: hooks called around every request, e.g. a
+                                MetricsCollector
+        :type instrumentation: Instrumentation
+        :param pool_size: maximum number of connections kept open to the
+                          server, raise it when sending more concurrent
+                          requests than that from threads. Ignored when a
+                          transport is given
+        :type pool_size: int
+        :param coalesce: share the response of a GET request in flight with
+                         the identical requests (same resource and params)
+                         sent meanwhile from other threads, instead of
+                         sending them. The calls saved are counted in
+                         ``singleflight.stats()``
+        :type coalesce: bool
+        :param transport: transport sending the requests, e.g. to tune the
+                          timeouts and compression of a RequestsTransport
+                          or to use HTTP/2 with an HttpxTransport. Defaults
+                          to RequestsTransport(pool_maxsize=pool_size)
+        :type transport: Transport
+        :param position_ledger: keep the open positions in ``ledger``, a
+                                PositionLedger updated from the responses of
+                                the position orders, to look them up without
+                                polling get_all_open_positions
+        :type position_ledger: bool
+        """
+        self.api_key = _get_api_key(api_key)
+        self.rate_limits = {
+            group: limit if isinstance(limit, TokenBucket) else TokenBucket(limit)
+            for group, limit in (rate_limits or {}).items()
+        }
+        self.retry = retry
+        self.cache = cache
+        self.instrumentation = instrumentation
+        self._uploaded_strategies: Dict[Any, Tuple[str, Any]] = {}
+        self.singleflight = SingleFlight() if coalesce else None
+        self.ledger = PositionLedger(self) if position_ledger else None
+        self.transport = transport or RequestsTransport(pool_maxsize=pool_size)
+        self.transport.headers.update(
+            {
+                "Accept": "application/json",
+                "User-Agent": "mizar/python",
+                "MIZAR-API-KEY": self.api_key,
+            }
+        )
         self.api_url = api_url or self.API_URL
         if scheme not in ("http", "https"):
             raise ValueError("Allowed scheme are http and https")
         self.api_url = self.API_URL.format(
             scheme=scheme, host=host, version=self.API_VERSION
         )
-        # check working
-        self.ping()
+        if check_connection:
+            # check working
+            self.ping()
 
-    def _create_session(self):
-        session = requests.session()
-        session.headers.update(
-            {
-                "Accept": "application/json",
-                "User-Agent": "mizar/python",
-                "MIZAR-API-KEY": self.api_key,
-            }
-        )
-        return session
+    @property
+    def session(self) -> requests.Session:
+        """
+        requests session of the current thread, with a RequestsTransport
+        """
+        return self.transport.session
 
     def _get(self, resource, **kwargs):
-        uri = self.api_url + resource
-        return self.session.get(uri, **kwargs)
+        if self.singleflight is None or set(kwargs) - {"params"}:
+            return self._request("GET", resource, **kwargs)
+        return self.singleflight.do(
+            request_key(resource, kwargs.get("params")),
+            lambda: self._request("GET", resource, **kwargs),
+        )
 
     def _post(self, resource, **kwargs):
+        return self._request("POST", resource, **kwargs)
+
+    def _request(self, method, resource, **kwargs):
         uri = self.api_url + resource
-        return self.session.post(url=uri, **kwargs)
+        limiter = self.rate_limits.get(endpoint_group(resource))
+        attempt = 0
+
+        while True:
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                response = self._send(method, resource, uri, **kwargs)
+            except requests.exceptions.RequestException as e:
+                if (
+                    self.retry is None
+                    or attempt >= self.retry.max_retries
+                    or not self.retry.should_retry(resource, exception=e)
+                ):
+                    raise
+                delay = self.retry.backoff(attempt)
+            else:
+                if (
+                    self.retry is None
+                    or attempt >= self.retry.max_retries
+                    or not self.retry.should_retry(resource, response.status_code)
+                ):
+                    return response
+                delay = self.retry.backoff(
+                    attempt, parse_retry_after(response.headers.get("Retry-After"))
+                )
+                if response.status_code == 429 and limiter is not None:
+                    limiter.pause(delay)
+
+            if self.instrumentation is not None:
+                self.instrumentation.on_retry(method, resource, attempt, delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def _send(self, method, resource, uri, **kwargs):
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return self.transport.request(method, uri, **kwargs)
+
+        request = self.transport.prepare(method, uri, **kwargs)
+        instrumentation.on_request(method, resource, self.transport.body_size(request))
+        start = time.perf_counter()
+        try:
+            response = self.transport.send(request)
+        except requests.exceptions.RequestException as e:
+            instrumentation.on_error(method, resource, e, time.perf_counter() - start)
+            raise
+        instrumentation.on_response(
+            method,
+            resource,
+            response.status_code,
+            time.perf_counter() - start,
+            len(response.content),
+        )
+        return response
 
     def ping(self):
         resp = self._get("ping")
@@ -79,22 +416,38 @@ class Mizar:
         return self._handle_response(resp)
 
     def server_time(self):
-        resp = self._get("server-time")
-        return self._handle_response(resp)
+        return self._cached_get("server-time")
 
     def _handle_response(self, response):
-        if response.ok:
-            return response.json()
-        else:
-            raise MizarAPIException(response.json())
+        if self.instrumentation is None:
+            return _handle_payload(response.ok, _json_loads(response.content))
+
+        start = time.perf_counter()
+        payload = _json_loads(response.content)
+        self.instrumentation.on_decode(
+            response.request.method,
+            response.url[len(self.api_url) :].split("?", 1)[0],
+            time.perf_counter() - start,
+        )
+        return _handle_payload(response.ok, payload)
+
+    def _cached_get(self, resource, params=None):
+        if self.cache is not None:
+            hit, response = self.cache.get(resource, params)
+            if hit:
+                return response
+        response = self._handle_response(self._get(resource, params=params))
+        if self.cache is not None:
+            self.cache.set(resource, params, response)
+        return response
 
     def get_exchanges(self):
-        resp = self._get("exchanges")
-        return self._handle_response(resp)
+        return self._cached_get("exchanges")
 
     def get_symbols(self, exchange: str, market: str = None):
-        resp = self._get("symbols", params={"exchange": exchange, "market": market})
-        return self._handle_response(resp)
+        return self._cached_get(
+            "symbols", params={"exchange": exchange, "market": market}
+        )
 
     def get_bar_types(
         self,
@@ -131,8 +484,7 @@ class Mizar:
             }
         )
 
-        resp = self._get("bar-types", params=kwargs)
-        return self._handle_response(resp)
+        return self._cached_get("bar-types", params=kwargs)
 
     def get_bar_data(
         self,
@@ -212,39 +564,116 @@ class Mizar:
         resp = self._get("bars", params=kwargs)
         return self._handle_response(resp)
 
+    def iter_bars(
+        self,
+        *,
+        base_asset: str,
+        quote_asset: str,
+        start_timestamp: int = 0,
+        end_timestamp: Optional[int] = None,
+        limit: int = 500,
+        bar_type: str = "time",
+        bar_subclass: str = "D",
+        exchange: str = "binance",
+        **kwargs,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Paginate the bar data of a specific bar type, yielding every page of
+        bars as soon as it is received. Bars already yielded (by
+        first_trade_id) are dropped from the following pages, and only the
+        ids of the bars sharing the latest timestamp are remembered, so
+        memory does not grow with the number of bars.
+
+        :param base_asset: Base asset to select (e.g. BTC)
+        :type base_asset: str
+        :param quote_asset: Quote asset to select (e.g. USDT)
+        :type quote_asset: str
+        :param start_timestamp: The timestamp from which collect the bars
+        :type start_timestamp: int
+        :param end_timestamp: when given, stop before the bars at or after
+                              this timestamp, otherwise paginate until the
+                              most recent bar
+        :type end_timestamp: int
+        :param limit: max number of bars to fetch per page (maximum allowed
+                      limit is 500)
+        :type limit: int
+        :param exchange: exchange name
+        :type exchange: str
+        :param bar_type: bar type can be (e.g. tick, dollar, volume, time)
+        :type bar_type: str
+        :param bar_subclass: bar subclass specify the class of bar type
+                             to select (e.g. 1min, 3min, dynamic etc..)
+        :type bar_subclass: str
+        :return: iterator over the pages of bars, see get_bar_data
+        """
+        pagination = _BarPagination(start_timestamp, end_timestamp)
+
+        while not pagination.done:
+            response = self.get_bar_data(
+                base_asset=base_asset,
+                quote_asset=quote_asset,
+                start_timestamp=pagination.timestamp,
+                limit=limit,
+                bar_type=bar_type,
+                bar_subclass=bar_subclass,
+                exchange=exchange,
+                **kwargs,
+            )
+            bars = pagination.new_bars(response.get("bars"))
+            if bars:
+                yield bars
+
     def save_hosted_strategy(
         self,
         strategy,
         strategy_info: Dict[str, Any],
         strategy_file: str = "",
+        force: bool = False,
     ):
-        import codecs
-
-        encoded_strategy = codecs.encode(pickle.dumps(strategy), "base64")
-
-        encoded_strategy_size = len(encoded_strategy) / 1e6
-        encoded_strategy_file_size = len(strategy_file.encode("utf-8")) / 1e6
-
-        if encoded_strategy_size > MAXIMUM_STRATEGY_SIZE:
-            raise StrategySizeExceededLimit(
-                encoded_strategy_size, MAXIMUM_STRATEGY_SIZE
-            )
-
-        if encoded_strategy_file_size > MAXIMUM_STRATEGY_FILE:
-            raise StrategyFileSizeExceededLimit(
-                encoded_strategy_file_size, MAXIMUM_STRATEGY_FILE
+        """
+        Upload a hosted strategy. The strategy is pickled with dill and
+        compressed (zstd when zstandard is installed, xz otherwise), and the
+        size limit applies to the compressed strategy. Uploading the same
+        strategy, info and file again is skipped and returns the response
+        of the previous upload, unless force is set.
+
+        :param strategy: the strategy object
+        :param strategy_info: information about the strategy
+        :type strategy_info: Dict[str, Any]
+        :param strategy_file: source code of the strategy
+        :type strategy_file: str
+        :param force: upload even if the same strategy was already uploaded
+        :type force: bool
+        """
+        if not force:
+            unchanged, response = _previous_upload(
+                self._uploaded_strategies, strategy, strategy_info, strategy_file
             )
+            if unchanged:
+                return response
 
+        data, compressed_strategy = _hosted_strategy_upload(
+            strategy, strategy_info, strategy_file
+        )
         resp = self._post(
             "publish-hosted-strategy",
-            data={
-                "strategy-info": json.dumps(strategy_info),
-                "strategy-file": strategy_file,
-                "strategy": encoded_strategy.decode(),
+            data=data,
+            files={
+                "strategy": (
+                    f"strategy.pkl.{data['strategy-encoding']}",
+                    compressed_strategy,
+                    "application/octet-stream",
+                )
             },
         )
 
-        return self._handle_response(resp)
+        response = self._handle_response(resp)
+        # only the last upload of every strategy name is remembered
+        self._uploaded_strategies[strategy_info.get("name")] = (
+            _upload_key(strategy_info, strategy_file, data["strategy-sha256"]),
+            response,
+        )
+        return response
 
     def create_self_hosted_strategy(
         self,
@@ -275,17 +704,18 @@ class Mizar:
         is_long: bool,
     ):
 
-        resp = self._post(
-            "open-position",
-            json={
-                "strategy_id": strategy_id,
-                "base_asset": base_asset,
-                "quote_asset": quote_asset,
-                "size": size,
-                "is_long": is_long,
-            },
-        )
-        return self._handle_response(resp)
+        order = {
+            "strategy_id": strategy_id,
+            "base_asset": base_asset,
+            "quote_asset": quote_asset,
+            "size": size,
+            "is_long": is_long,
+        }
+        resp = self._post("open-position", json=order)
+        response = self._handle_response(resp)
+        if self.ledger is not None:
+            self.ledger.opened(order, response)
+        return response
 
     def close_position(self, position_id: int):
         resp = self._post(
@@ -294,7 +724,10 @@ class Mizar:
                 "position_id": position_id,
             },
         )
-        return self._handle_response(resp)
+        response = self._handle_response(resp)
+        if self.ledger is not None:
+            self.ledger.closed(position_id)
+        return response
 
     def close_all_positions(self, strategy_id: int):
         resp = self._post(
@@ -303,15 +736,100 @@ class Mizar:
                 "strategy_id": strategy_id,
             },
         )
-        return self._handle_response(resp)
+        response = self._handle_response(resp)
+        if self.ledger is not None:
+            self.ledger.closed_all(strategy_id)
+        return response
+
+    def open_positions(
+        self,
+        orders: List[Dict[str, Any]],
+        max_workers: int = 10,
+        rollback: bool = False,
+    ) -> BatchResult:
+        """
+        Open many positions at once, sending the orders concurrently instead
+        of one round-trip after the other. A failed order does not raise,
+        its exception is reported in the result of its leg.
+
+        The orders share the client connection pool: create the client with
+        pool_size >= max_workers.
+
+            result = mizar.open_positions(
+                [
+                    dict(strategy_id=1, base_asset="BTC", quote_asset="USDT",
+                         size=0.1, is_long=True),
+                    ...
+                ]
+            )
+            result.errors, result.dispatch_latency
+
+        :param orders: keyword arguments of open_position for every order
+        :type orders: List[Dict[str, Any]]
+        :param max_workers: number of orders sent concurrently
+        :type max_workers: int
+        :param rollback: when an order fails, do not send the orders not
+                         sent yet and close the positions already opened,
+                         so that the batch is all or nothing. An opened leg
+                         whose response has no position_id cannot be closed,
+                         it keeps rolled_back False with a rollback_error
+        :type rollback: bool
+        :return: the response or exception of every order, in the order of
+                 orders, with the dispatch latency
+        :rtype: BatchResult
+        """
+        result = dispatch(
+            self.open_position, orders, max_workers, cancel_on_error=rollback
+        )
+        if rollback and not result.ok:
+            opened = []
+            for leg in result.legs:
+                if not leg.ok:
+                    continue
+                if isinstance(leg.response, dict) and "position_id" in leg.response:
+                    opened.append(leg)
+                else:
+                    leg.rollback_error = LookupError(
+                        f"No position_id to close in {leg.response!r}"
+                    )
+            closed = dispatch(
+                self.close_position,
+                [{"position_id": leg.response["position_id"]} for leg in opened],
+                max_workers,
+            )
+            for leg, close_leg in zip(opened, closed.legs):
+                leg.rolled_back = close_leg.ok
+                leg.rollback_error = close_leg.error
+            result.rolled_back = True
+        return result
+
+    def close_positions(
+        self, position_ids: List[int], max_workers: int = 10
+    ) -> BatchResult:
+        """
+        Close many positions at once, sending the orders concurrently. A
+        failed order does not raise, see open_positions.
+
+        :param position_ids: ids of the positions to close
+        :type position_ids: List[int]
+        :param max_workers: number of orders sent concurrently
+        :type max_workers: int
+        :return: the response or exception of every order, in the order of
+                 position_ids, with the dispatch latency
+        :rtype: BatchResult
+        """
+        return dispatch(
+            self.close_position,
+            [{"position_id": position_id} for position_id in position_ids],
+            max_workers,
+        )
 
     def get_all_open_positions(self, strategy_id: int):
         resp = self._get("all-open-positions", params={"strategy_id": strategy_id})
         return self._handle_response(resp)
 
     def get_all_self_hosted_strategies_info(self):
-        resp = self._get("self-hosted-strategy-info")
-        return self._handle_response(resp)
+        return self._cached_get("self-hosted-strategy-info")
 
     def get_dca_bot_position(self, bot_id: int, base_asset: str, quote_asset: str):
         resp = self._get(
@@ -365,7 +883,7 @@ class Mizar:
         self, bot_id: int, base_asset: str, quote_asset: str
     ):
         resp = self._get(
-            "dca-bots/get-inactive-safety-orders",
+            "dca-bots/get-take-profit-orders",
             params={
                 "bot_id": bot_id,
                 "base_asset": base_asset,
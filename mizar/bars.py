@@ -0,0 +1,396 @@
+from operator import itemgetter
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+BAR_DTYPES = {
+    "id": "int64",
+    "bar_type_id": "int64",
+    "exchange_id": "int64",
+    "base_asset_id": "int64",
+    "quote_asset_id": "int64",
+    "time": "int64",
+    "first_timestamp": "int64",
+    "last_timestamp": "int64",
+    "first_trade_id": "int64",
+    "last_trade_id": "int64",
+    "num_ticks": "int64",
+    "num_buy_ticks": "int64",
+    "num_sell_ticks": "int64",
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "close": "float64",
+    "base_asset_volume": "float64",
+    "base_asset_buy_volume": "float64",
+    "base_asset_sell_volume": "float64",
+    "quote_asset_volume": "float64",
+    "quote_asset_buy_volume": "float64",
+    "quote_asset_sell_volume": "float64",
+}
+
+# ids identifying the series, the same for every bar of a series
+SERIES_ID_COLUMNS = ("bar_type_id", "exchange_id", "base_asset_id", "quote_asset_id")
+
+BAR_DTYPE = np.dtype(list(BAR_DTYPES.items()))
+
+_bar_values = itemgetter(*BAR_DTYPES)
+
+
+def _typed(bars_df: pd.DataFrame) -> pd.DataFrame:
+    dtypes = {
+        column: dtype
+        for column, dtype in BAR_DTYPES.items()
+        if column in bars_df.columns
+        and bars_df[column].dtype != dtype
+        and bars_df[column].notna().all()
+    }
+    if not dtypes:
+        return bars_df
+    return bars_df.astype(dtypes)
+
+
+def bars_to_array(bars: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Convert bars, as returned by the bars endpoint, into a structured array
+    of BAR_DTYPE in a single pass, without inferring any type.
+
+    :param bars: bars with every field of BAR_DTYPES
+    :type bars: List[Dict[str, Any]]
+    :return: structured array with a field per bar attribute
+    :rtype: np.ndarray
+    :raises KeyError: when a bar misses a field
+    :raises TypeError: when a field is null
+    """
+    return np.fromiter(map(_bar_values, bars), dtype=BAR_DTYPE, count=len(bars))
+
+
+def bars_to_frame(bars: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Convert bars, as returned by the bars endpoint, into a dataframe with
+    the BAR_DTYPES columns, followed by the other fields of the bars if
+    any. Bars not matching the schema (missing or null fields) go through
+    the slower generic conversion instead.
+
+    :param bars: bars as returned by the bars endpoint
+    :type bars: List[Dict[str, Any]]
+    :return: bar dataframe with a range index and the epoch ``time`` column
+    :rtype: pd.DataFrame
+    """
+    if not bars:
+        return pd.DataFrame()
+    try:
+        array = bars_to_array(bars)
+    except (KeyError, TypeError, ValueError):
+        return _typed(pd.DataFrame(bars))
+    bars_df = pd.DataFrame({column: array[column] for column in BAR_DTYPES}, copy=False)
+    # every bar has the BAR_DTYPES fields, longer ones have other fields
+    if max(map(len, bars)) > len(BAR_DTYPES):
+        extra_columns = [
+            column
+            for column in dict.fromkeys(
+                key for bar in bars if len(bar) > len(BAR_DTYPES) for key in bar
+            )
+            if column not in BAR_DTYPES
+        ]
+        extra_df = pd.DataFrame(bars, columns=extra_columns)
+        bars_df = pd.concat([bars_df, extra_df], axis=1)
+    return bars_df
+
+
+def compact_bars(bars_df: pd.DataFrame, float32: bool = False) -> pd.DataFrame:
+    """
+    Shrink a bar dataframe for holding many series in memory. The ids
+    identifying the series (SERIES_ID_COLUMNS) are moved to
+    ``attrs["constants"]`` when they hold a single value and become
+    categoricals otherwise, and the integer columns are downcast to the
+    smallest integer type holding their values.
+
+    The memory used by the dataframe before and after is reported in
+    ``attrs["memory_usage"]``.
+
+    :param bars_df: bar dataframe
+    :type bars_df: pd.DataFrame
+    :param float32: also store the prices and volumes as float32, which
+                    keeps about 7 significant digits
+    :type float32: bool
+    :return: compact bar dataframe
+    :rtype: pd.DataFrame
+    """
+    if bars_df.empty:
+        return bars_df
+    original_bytes = int(bars_df.memory_usage(deep=True).sum())
+    constants = {}
+    columns = {}
+    for column in bars_df.columns:
+        values = bars_df[column]
+        if column in SERIES_ID_COLUMNS:
+            unique = values.unique()
+            if len(unique) == 1:
+                value = unique[0]
+                constants[column] = (
+                    value.item() if isinstance(value, np.generic) else value
+                )
+            else:
+                columns[column] = values.astype("category")
+        elif pd.api.types.is_integer_dtype(values.dtype):
+            columns[column] = pd.to_numeric(values, downcast="integer")
+        elif float32 and pd.api.types.is_float_dtype(values.dtype):
+            columns[column] = values.astype("float32")
+        else:
+            columns[column] = values
+
+    compact_df = pd.DataFrame(columns, index=bars_df.index)
+    compact_df.attrs = dict(bars_df.attrs)
+    compact_df.attrs["constants"] = constants
+    compact_df.attrs["memory_usage"] = {
+        "original_bytes": original_bytes,
+        "bytes": int(compact_df.memory_usage(deep=True).sum()),
+    }
+    return compact_df
+
+
+DAY = 24 * 60 * 60 * 1000
+
+# aggregation of every bar column into the coarser bar, None for the
+# columns which are not aggregated
+_RESAMPLE_AGGREGATIONS = {
+    "id": None,
+    "bar_type_id": None,
+    "exchange_id": "first",
+    "base_asset_id": "first",
+    "quote_asset_id": "first",
+    "time": None,
+    "first_timestamp": "min",
+    "last_timestamp": "max",
+    "first_trade_id": "min",
+    "last_trade_id": "max",
+    "num_ticks": "sum",
+    "num_buy_ticks": "sum",
+    "num_sell_ticks": "sum",
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "base_asset_volume": "sum",
+    "base_asset_buy_volume": "sum",
+    "base_asset_sell_volume": "sum",
+    "quote_asset_volume": "sum",
+    "quote_asset_buy_volume": "sum",
+    "quote_asset_sell_volume": "sum",
+}
+
+_REDUCERS = {
+    "min": np.minimum.reduceat,
+    "max": np.maximum.reduceat,
+    "sum": np.add.reduceat,
+}
+
+
+def bar_duration(bar_subclass: str) -> int:
+    """
+    Return the duration in milliseconds of a time bar subclass, e.g. 60000
+    for ``1min``. Only durations dividing a day are supported, as bars are
+    aligned on UTC midnight.
+
+    :param bar_subclass: time bar subclass, e.g. 1min, 3min, 1h, D
+    :type bar_subclass: str
+    :return: duration in milliseconds
+    :rtype: int
+    :raises ValueError: for the other bar subclasses
+    """
+    # pandas requires the count of single units, e.g. 1D for D
+    timedelta = bar_subclass if bar_subclass[:1].isdigit() else f"1{bar_subclass}"
+    try:
+        duration = int(pd.Timedelta(timedelta) // pd.Timedelta(milliseconds=1))
+    except ValueError:
+        duration = 0
+    if duration <= 0 or DAY % duration:
+        raise ValueError(f"Unsupported time bar subclass: {bar_subclass}")
+    return duration
+
+
+def resample_bars(
+    bars_df: pd.DataFrame, bar_subclass: str, source_bar_subclass: str = None
+) -> pd.DataFrame:
+    """
+    Aggregate time bars into coarser time bars, e.g. 1min bars into 1h
+    bars, with the schema of the bars endpoint: open, high, low and close,
+    summed volumes and ticks, first and last trade ids and timestamps. The
+    server ids of the coarse bars are unknown, ``id`` and ``bar_type_id``
+    are set to -1.
+
+    :param bars_df: time bars sorted by time, with the epoch ``time`` column
+                    as returned by the stores
+    :type bars_df: pd.DataFrame
+    :param bar_subclass: subclass of the coarse bars, e.g. 1h or D
+    :type bar_subclass: str
+    :param source_bar_subclass: subclass of bars_df. When given, the last
+                                coarse bar is dropped unless bars_df covers
+                                all of it
+    :type source_bar_subclass: str
+    :return: coarse bars, with the epoch ``time`` column
+    :rtype: pd.DataFrame
+    """
+    duration = bar_duration(bar_subclass)
+    if bars_df.empty:
+        return bars_df
+
+    times = bars_df["time"].to_numpy(dtype="int64")
+    buckets = times - times % duration
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+
+    resampled = {}
+    for column in bars_df.columns:
+        if column not in _RESAMPLE_AGGREGATIONS:
+            continue
+        aggregation = _RESAMPLE_AGGREGATIONS[column]
+        values = bars_df[column].to_numpy()
+        if column == "time":
+            resampled[column] = buckets[starts]
+        elif aggregation is None:
+            resampled[column] = np.full(len(starts), -1, dtype="int64")
+        elif aggregation == "first":
+            resampled[column] = values[starts]
+        elif aggregation == "last":
+            resampled[column] = values[ends]
+        else:
+            resampled[column] = _REDUCERS[aggregation](values, starts)
+    resampled_df = pd.DataFrame(resampled)
+
+    if source_bar_subclass is not None:
+        covered_until = times[-1] + bar_duration(source_bar_subclass)
+        if covered_until < buckets[-1] + duration:
+            resampled_df = resampled_df.iloc[:-1]
+    return resampled_df
+
+
+def compare_bars(
+    bars_df: pd.DataFrame, reference_df: pd.DataFrame, rtol: float = 1e-9
+) -> pd.DataFrame:
+    """
+    Compare bars, e.g. resampled locally, with reference bars produced by
+    the server, on their common times and aggregated columns.
+
+    :param bars_df: bars with the epoch ``time`` column
+    :type bars_df: pd.DataFrame
+    :param reference_df: reference bars with the epoch ``time`` column
+    :type reference_df: pd.DataFrame
+    :param rtol: relative tolerance of the float columns
+    :type rtol: float
+    :return: one row per mismatch, with the time, column, value and
+             reference value. Empty when the bars match
+    :rtype: pd.DataFrame
+    """
+    merged_df = pd.merge(bars_df, reference_df, on="time", suffixes=("", "_reference"))
+    mismatches = []
+    for column, aggregation in _RESAMPLE_AGGREGATIONS.items():
+        if aggregation is None or f"{column}_reference" not in merged_df.columns:
+            continue
+        values = merged_df[column].to_numpy()
+        references = merged_df[f"{column}_reference"].to_numpy()
+        if pd.api.types.is_float_dtype(values.dtype):
+            equal = np.isclose(values, references, rtol=rtol, atol=0.0)
+        else:
+            equal = values == references
+        for row in np.flatnonzero(~equal):
+            mismatches.append(
+                {
+                    "time": merged_df["time"].iat[row],
+                    "column": column,
+                    "value": values[row],
+                    "reference": references[row],
+                }
+            )
+    return pd.DataFrame(mismatches, columns=["time", "column", "value", "reference"])
+
+
+INTEGRITY_COLUMNS = ["issue", "start_time", "end_time", "count"]
+
+
+def _issues(issue: str, starts, ends, counts) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "issue": issue,
+            "start_time": np.asarray(starts, dtype="int64"),
+            "end_time": np.asarray(ends, dtype="int64"),
+            "count": np.asarray(counts, dtype="int64"),
+        }
+    )
+
+
+def check_bar_integrity(
+    bars_df: pd.DataFrame, bar_subclass: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Find the holes and duplicates of a series of bars:
+
+    - ``time_gap``: consecutive time bars further apart than their duration
+      (only with the subclass of time bars). Counts the missing bars
+    - ``trade_gap``: trades missing between consecutive bars, the
+      first_trade_id of a bar not following the last_trade_id of the
+      previous one. Counts the missing trades
+    - ``trade_overlap``: a bar starting before the last trade of the
+      previous one. Counts the trades in both
+    - ``duplicate``: bars sharing their first_trade_id, or their time for
+      time bars
+
+    Every issue comes with the window [start_time, end_time) of the bars to
+    download again to repair it.
+
+    :param bars_df: bars sorted by time, with the epoch ``time`` column and
+                    the first_trade_id and last_trade_id columns
+    :type bars_df: pd.DataFrame
+    :param bar_subclass: subclass of time bars, e.g. 1min. Leave it out for
+                         the other bar types
+    :type bar_subclass: str
+    :return: one row per issue with the issue, start_time, end_time and
+             count columns, sorted by start_time. Empty for a sound series
+    :rtype: pd.DataFrame
+    """
+    duration = bar_duration(bar_subclass) if bar_subclass is not None else None
+    if bars_df.shape[0] < 2:
+        return pd.DataFrame(columns=INTEGRITY_COLUMNS)
+
+    times = bars_df["time"].to_numpy(dtype="int64")
+    first_trade_ids = bars_df["first_trade_id"].to_numpy(dtype="int64")
+    last_trade_ids = bars_df["last_trade_id"].to_numpy(dtype="int64")
+    issues = []
+
+    if duration is not None:
+        steps = np.diff(times)
+        gaps = np.flatnonzero(steps > duration)
+        issues.append(
+            _issues(
+                "time_gap",
+                times[gaps] + duration,
+                times[gaps + 1],
+                steps[gaps] // duration - 1,
+            )
+        )
+
+    # trades between the bar i and the bar i + 1, -1 for contiguous bars
+    trade_steps = first_trade_ids[1:] - last_trade_ids[:-1] - 1
+    distinct = first_trade_ids[1:] != first_trade_ids[:-1]
+    for issue, rows, counts in (
+        ("trade_gap", np.flatnonzero(trade_steps > 0), trade_steps),
+        ("trade_overlap", np.flatnonzero((trade_steps < 0) & distinct), -trade_steps),
+    ):
+        issues.append(_issues(issue, times[rows], times[rows + 1] + 1, counts[rows]))
+
+    duplicated = bars_df.duplicated("first_trade_id").to_numpy()
+    if duration is not None:
+        duplicated = duplicated | bars_df.duplicated("time").to_numpy()
+    rows = np.flatnonzero(duplicated)
+    issues.append(
+        _issues("duplicate", times[rows], times[rows] + 1, np.ones(len(rows)))
+    )
+
+    issues_df = pd.concat(issues, ignore_index=True)
+    issues_df.sort_values("start_time", kind="mergesort", inplace=True)
+    return issues_df.reset_index(drop=True)
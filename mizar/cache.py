@@ -0,0 +1,200 @@
+import atexit
+import copy
+import json
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+
+def request_key(resource: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Return a key identifying a GET request by its resource and params,
+    ignoring the order and the None values of the params.
+    """
+    params = {key: value for key, value in (params or {}).items() if value is not None}
+    return json.dumps([resource, params], sort_keys=True)
+
+
+class ResponseCache:
+    """
+    In-memory cache of the reference data endpoints of the Mizar client.
+
+    Entries expire after the TTL of their endpoint, and the least recently
+    used entries are evicted once max_entries or max_bytes (measured on the
+    json encoded payloads) are exceeded. When a path is given the cache is
+    loaded from it on creation and saved to it, so that new processes start
+    warm: updates are saved at most every save_interval seconds, and on
+    save(), close() or at the exit of the interpreter.
+
+        mizar = Mizar(api_key, cache=ResponseCache(path="~/.mizar_cache.json"))
+    """
+
+    DEFAULT_TTLS = {
+        "exchanges": 3600.0,
+        "symbols": 3600.0,
+        "bar-types": 3600.0,
+        "self-hosted-strategy-info": 60.0,
+        "server-time": 1.0,
+    }
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        path: Optional[str] = None,
+        save_interval: float = 60.0,
+    ):
+        """
+        :param ttls: seconds a response is cached, per resource, added to
+                     DEFAULT_TTLS
+        :type ttls: Dict[str, float]
+        :param max_entries: maximum number of cached responses
+        :type max_entries: int
+        :param max_bytes: maximum size of the cached responses
+        :type max_bytes: int
+        :param path: json file the cache is loaded from and saved to
+        :type path: str
+        :param save_interval: minimum seconds between two saves triggered
+                              by updates
+        :type save_interval: float
+        """
+        self.ttls = dict(self.DEFAULT_TTLS, **(ttls or {}))
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = os.path.expanduser(path) if path else None
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        # key -> (resource, expires_at, size, value)
+        self._entries: "OrderedDict[str, Tuple[str, float, int, Any]]" = OrderedDict()
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._saved_at: Optional[float] = None
+        if self.path:
+            if os.path.isfile(self.path):
+                self._load()
+            atexit.register(_save_at_exit, weakref.ref(self))
+
+    def get(
+        self, resource: str, params: Optional[Dict[str, Any]] = None
+    ) -> Tuple[bool, Any]:
+        """
+        Return whether the response is cached, and a copy of it when it is.
+        """
+        key = request_key(resource, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, copy.deepcopy(entry[3])
+            if entry is not None:
+                self._pop(key)
+            self.misses += 1
+            return False, None
+
+    def set(self, resource: str, params: Optional[Dict[str, Any]], value: Any):
+        """
+        Cache a response, unless its resource has no TTL.
+        """
+        ttl = self.ttls.get(resource)
+        if not ttl:
+            return
+        key = request_key(resource, params)
+        size = len(json.dumps(value))
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (
+                resource,
+                time.time() + ttl,
+                size,
+                copy.deepcopy(value),
+            )
+            self.size += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self.size > self.max_bytes
+            ):
+                self._pop(next(iter(self._entries)))
+        self._updated()
+
+    def invalidate(self, resource: Optional[str] = None):
+        """
+        Drop the cached responses of a resource, or all of them.
+        """
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if resource is None or entry[0] == resource:
+                    self._pop(key)
+        self._updated()
+
+    def save(self):
+        """
+        Save the cache to its path, when it changed since the last save.
+        """
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                entries = list(self._entries.items())
+                self._dirty = False
+                self._saved_at = time.monotonic()
+            temporary_file = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporary_file, "w") as f:
+                json.dump(entries, f)
+            os.replace(temporary_file, self.path)
+
+    def close(self):
+        self.save()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self.size,
+        }
+
+    def _pop(self, key: str):
+        self.size -= self._entries.pop(key)[2]
+
+    def _updated(self):
+        if not self.path:
+            return
+        with self._lock:
+            self._dirty = True
+            due = (
+                self._saved_at is None
+                or time.monotonic() - self._saved_at >= self.save_interval
+            )
+        if due:
+            self.save()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except ValueError:
+            return
+        now = time.time()
+        for key, (resource, expires_at, size, value) in entries:
+            if expires_at > now:
+                self._entries[key] = (resource, expires_at, size, value)
+                self.size += size
+
+
+def _save_at_exit(cache_ref: "weakref.ref[ResponseCache]"):
+    cache = cache_ref()
+    if cache is not None:
+        cache.save()
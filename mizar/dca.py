@@ -0,0 +1,256 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from mizar.api import Mizar
+
+SafetyOrderFilter = Callable[[Dict[str, Any]], bool]
+
+DCA_BOT_PARTS = (
+    "position",
+    "safety_orders",
+    "active_safety_orders",
+    "inactive_safety_orders",
+    "take_profit_orders",
+)
+
+
+def _safety_orders(payload: Any) -> List[Dict[str, Any]]:
+    if isinstance(payload, dict):
+        return payload.get("safety_orders") or []
+    return payload or []
+
+
+class DcaBotState:
+    """
+    Snapshot of a DCA bot pair: its position, safety orders (all, active
+    and inactive) and take profit orders, fetched concurrently by refresh.
+
+    A refresh only fetches the parts which are stale: never fetched,
+    invalidated by a mutation made through the state (open_position,
+    close_position, shift_safety_orders), or older than max_age. With an
+    is_active filter the active and inactive safety orders are split
+    locally from the safety orders instead of being fetched.
+
+        state = DcaBotState(mizar, bot_id, "BTC", "USDT")
+        state.refresh()
+        state.position, state.active_safety_orders
+        state.shift_safety_orders(25_000.0)
+        state.refresh()  # only fetches the safety orders again
+
+    Use refresh_dca_bot_states to refresh many bots at once.
+    """
+
+    def __init__(
+        self,
+        mizar: Mizar,
+        bot_id: int,
+        base_asset: str,
+        quote_asset: str,
+        is_active: Optional[SafetyOrderFilter] = None,
+        max_age: Optional[float] = None,
+    ):
+        """
+        :param mizar: client
+        :type mizar: Mizar
+        :param bot_id: id of the DCA bot
+        :type bot_id: int
+        :param base_asset: Base asset of the pair (e.g. BTC)
+        :type base_asset: str
+        :param quote_asset: Quote asset of the pair (e.g. USDT)
+        :type quote_asset: str
+        :param is_active: tells whether a safety order, an item of the list
+                          returned by get_dca_bot_safety_orders (or of its
+                          ``safety_orders`` item), is active. When given,
+                          the active and inactive safety orders are derived
+                          from the safety orders
+        :type is_active: Callable[[Dict[str, Any]], bool]
+        :param max_age: seconds after which a part is fetched again even
+                        without mutation, e.g. to follow the fills of the
+                        safety orders. By default the parts are only
+                        fetched again once invalidated
+        :type max_age: float
+        """
+        self.mizar = mizar
+        self.bot_id = bot_id
+        self.base_asset = base_asset
+        self.quote_asset = quote_asset
+        self.is_active = is_active
+        self.max_age = max_age
+        self.errors: Dict[str, Exception] = {}
+        self._values: Dict[str, Any] = {}
+        self._fetched_at: Dict[str, float] = {}
+
+    def __repr__(self) -> str:
+        return (
+            f"DcaBotState(bot_id={self.bot_id}, "
+            f"pair={self.base_asset}{self.quote_asset}, "
+            f"fetched={sorted(self._fetched_at)})"
+        )
+
+    @property
+    def parts(self) -> List[str]:
+        """
+        Parts fetched from the server.
+        """
+        if self.is_active is None:
+            return list(DCA_BOT_PARTS)
+        return ["position", "safety_orders", "take_profit_orders"]
+
+    def stale(self, now: Optional[float] = None) -> List[str]:
+        """
+        Return the parts a refresh would fetch.
+        """
+        now = time.time() if now is None else now
+        return [
+            part
+            for part in self.parts
+            if part not in self._fetched_at
+            or (
+                self.max_age is not None and now - self._fetched_at[part] > self.max_age
+            )
+        ]
+
+    def invalidate(self, *parts: str):
+        """
+        Mark parts (all by default) to be fetched again by the next refresh.
+        """
+        for part in parts or DCA_BOT_PARTS:
+            if part not in DCA_BOT_PARTS:
+                raise ValueError(f"Unknown DCA bot part: {part}")
+            self._fetched_at.pop(part, None)
+            if self.is_active is not None and "safety_orders" in part:
+                self._fetched_at.pop("safety_orders", None)
+
+    def refresh(self, force: bool = False, max_workers: int = 5) -> "DcaBotState":
+        """
+        Fetch the stale parts (all of them with force) concurrently. A part
+        which could not be fetched keeps its previous value, stays stale
+        and its exception is kept in ``errors``.
+        """
+        refresh_dca_bot_states([self], force=force, max_workers=max_workers)
+        return self
+
+    def _fetch(self, part: str) -> Any:
+        fetch = getattr(self.mizar, f"get_dca_bot_{part}")
+        return fetch(self.bot_id, self.base_asset, self.quote_asset)
+
+    def _update(self, part: str, value: Any, fetched_at: float):
+        self._values[part] = value
+        self._fetched_at[part] = fetched_at
+        self.errors.pop(part, None)
+
+    @property
+    def position(self) -> Any:
+        return self._values.get("position")
+
+    @property
+    def safety_orders(self) -> Any:
+        return self._values.get("safety_orders")
+
+    @property
+    def active_safety_orders(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        List of the active safety orders, None until fetched.
+        """
+        return self._split_safety_orders("active_safety_orders", True)
+
+    @property
+    def inactive_safety_orders(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        List of the inactive safety orders, None until fetched.
+        """
+        return self._split_safety_orders("inactive_safety_orders", False)
+
+    def _split_safety_orders(
+        self, part: str, active: bool
+    ) -> Optional[List[Dict[str, Any]]]:
+        if self.is_active is None:
+            if part not in self._values:
+                return None
+            return _safety_orders(self._values[part])
+        if "safety_orders" not in self._values:
+            return None
+        orders = _safety_orders(self._values["safety_orders"])
+        return [order for order in orders if bool(self.is_active(order)) == active]
+
+    @property
+    def take_profit_orders(self) -> Any:
+        return self._values.get("take_profit_orders")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return every part, None for the parts never fetched.
+        """
+        return {part: getattr(self, part) for part in DCA_BOT_PARTS}
+
+    def open_position(
+        self, take_profit_pct: float = None, stop_loss_pct: float = None
+    ) -> Any:
+        response = self.mizar.dca_bot_open_position(
+            self.bot_id,
+            self.base_asset,
+            self.quote_asset,
+            take_profit_pct=take_profit_pct,
+            stop_loss_pct=stop_loss_pct,
+        )
+        self.invalidate()
+        return response
+
+    def close_position(self) -> Any:
+        response = self.mizar.dca_bot_close_position(
+            self.bot_id, self.base_asset, self.quote_asset
+        )
+        self.invalidate()
+        return response
+
+    def shift_safety_orders(self, safety_orders_start_price: float) -> Any:
+        response = self.mizar.dca_bot_shift_safety_orders(
+            self.bot_id, self.base_asset, self.quote_asset, safety_orders_start_price
+        )
+        self.invalidate(
+            "safety_orders", "active_safety_orders", "inactive_safety_orders"
+        )
+        return response
+
+
+def refresh_dca_bot_states(
+    states: List[DcaBotState], force: bool = False, max_workers: int = 16
+) -> int:
+    """
+    Refresh many DCA bot states at once, fetching the stale parts of all of
+    them concurrently on max_workers threads (sharing the connection pool
+    of the client, create it with pool_size >= max_workers)
+
+    :param states: states to refresh
+    :type states: List[DcaBotState]
+    :param force: fetch every part, stale or not
+    :type force: bool
+    :param max_workers: number of requests sent concurrently
+    :type max_workers: int
+    :return: number of requests sent
+    :rtype: int
+    """
+    now = time.time()
+    tasks = [
+        (state, part)
+        for state in states
+        for part in (state.parts if force else state.stale(now))
+    ]
+    if not tasks:
+        return 0
+
+    def fetch(task):
+        state, part = task
+        try:
+            state._update(part, state._fetch(part), time.time())
+        except Exception as e:
+            state.errors[part] = e
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+        list(executor.map(fetch, tasks))
+    return len(tasks)
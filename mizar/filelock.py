@@ -0,0 +1,90 @@
+import os
+import time
+from typing import Optional
+
+if os.name == "nt":  # pragma: no cover - windows
+    import msvcrt
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def _unlock(fd: int):
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def _unlock(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class LockTimeout(TimeoutError):
+    pass
+
+
+class FileLock:
+    """
+    Exclusive lock held on a file, excluding the other processes as well as
+    the other threads (which must use their own FileLock). The lock is
+    released when the process dies, so a crashed worker never leaves a
+    series locked.
+
+        with FileLock("series.lock"):
+            ...
+    """
+
+    def __init__(
+        self, path: str, timeout: Optional[float] = None, poll_interval: float = 0.05
+    ):
+        """
+        :param path: lock file, created when missing
+        :type path: str
+        :param timeout: seconds to wait for the lock before raising
+                        LockTimeout, forever by default
+        :type timeout: float
+        :param poll_interval: seconds between attempts to take the lock
+        :type poll_interval: float
+        """
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+
+    def acquire(self):
+        if self._fd is not None:
+            raise RuntimeError(f"{self.path} is already locked by this FileLock")
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while not _try_lock(fd):
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                raise LockTimeout(f"Timed out waiting for the lock on {self.path}")
+            time.sleep(self.poll_interval)
+        self._fd = fd
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            _unlock(self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
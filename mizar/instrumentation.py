@@ -0,0 +1,197 @@
+import bisect
+import sys
+import threading
+from collections import Counter
+from collections import defaultdict
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import TextIO
+
+
+class Instrumentation:
+    """
+    Hooks called by the Mizar client around every request. Subclass it and
+    override the hooks needed, the default implementations do nothing.
+
+    Resources are the endpoint paths, e.g. ``bars`` or ``open-position``.
+    """
+
+    def on_request(self, method: str, resource: str, num_bytes: int):
+        """
+        Called before sending a request, with the size of its body.
+        """
+
+    def on_response(
+        self,
+        method: str,
+        resource: str,
+        status_code: int,
+        elapsed: float,
+        num_bytes: int,
+    ):
+        """
+        Called when a response is received, with the time elapsed since the
+        request was sent in seconds and the size of the response body.
+        """
+
+    def on_error(
+        self, method: str, resource: str, exception: Exception, elapsed: float
+    ):
+        """
+        Called when a request fails without a response.
+        """
+
+    def on_retry(self, method: str, resource: str, attempt: int, delay: float):
+        """
+        Called before sleeping ahead of a retry.
+        """
+
+    def on_decode(self, method: str, resource: str, elapsed: float):
+        """
+        Called once the json body of a response has been decoded.
+        """
+
+
+class LatencyHistogram:
+    """
+    Histogram with exponential buckets, from 100us to about a minute.
+    """
+
+    BOUNDS = [1e-4 * 2**i for i in range(20)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float):
+        self.counts[bisect.bisect_left(self.BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """
+        Return the upper bound of the bucket holding the q-th percentile.
+        """
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.BOUNDS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class _EndpointMetrics:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.decode = LatencyHistogram()
+        self.status_codes = Counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.errors = 0
+        self.retries = 0
+
+
+class MetricsCollector(Instrumentation):
+    """
+    In-memory collector of per endpoint latency histograms, byte counts,
+    status codes, errors, retries and json decode times.
+
+        metrics = MetricsCollector()
+        mizar = Mizar(api_key, instrumentation=metrics)
+        ...
+        metrics.dump()
+    """
+
+    def __init__(self):
+        self._endpoints = defaultdict(_EndpointMetrics)
+        self._lock = threading.Lock()
+
+    def on_request(self, method, resource, num_bytes):
+        with self._lock:
+            self._endpoints[f"{method} {resource}"].bytes_sent += num_bytes
+
+    def on_response(self, method, resource, status_code, elapsed, num_bytes):
+        with self._lock:
+            metrics = self._endpoints[f"{method} {resource}"]
+            metrics.latency.record(elapsed)
+            metrics.status_codes[status_code] += 1
+            metrics.bytes_received += num_bytes
+
+    def on_error(self, method, resource, exception, elapsed):
+        with self._lock:
+            metrics = self._endpoints[f"{method} {resource}"]
+            metrics.latency.record(elapsed)
+            metrics.errors += 1
+
+    def on_retry(self, method, resource, attempt, delay):
+        with self._lock:
+            self._endpoints[f"{method} {resource}"].retries += 1
+
+    def on_decode(self, method, resource, elapsed):
+        with self._lock:
+            self._endpoints[f"{method} {resource}"].decode.record(elapsed)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the metrics collected so far, per ``"{method} {resource}"``.
+        """
+        with self._lock:
+            return {
+                endpoint: {
+                    "latency": metrics.latency.summary(),
+                    "decode": metrics.decode.summary(),
+                    "status_codes": dict(metrics.status_codes),
+                    "bytes_sent": metrics.bytes_sent,
+                    "bytes_received": metrics.bytes_received,
+                    "errors": metrics.errors,
+                    "retries": metrics.retries,
+                }
+                for endpoint, metrics in sorted(self._endpoints.items())
+            }
+
+    def dump(self, file: Optional[TextIO] = None):
+        """
+        Write a table of the collected metrics, endpoints with the most time
+        spent first.
+        """
+        file = file or sys.stdout
+        summary = self.summary()
+        header = (
+            f"{'endpoint':<45} {'calls':>7} {'p50 ms':>9} {'p99 ms':>9} "
+            f"{'decode ms':>10} {'MB in':>9} {'errors':>7} {'retries':>8}"
+        )
+        print(header, file=file)
+        for endpoint, metrics in sorted(
+            summary.items(), key=lambda item: -item[1]["latency"]["total"]
+        ):
+            latency = metrics["latency"]
+            print(
+                f"{endpoint:<45} {latency['count']:>7} "
+                f"{latency['p50'] * 1e3:>9.1f} {latency['p99'] * 1e3:>9.1f} "
+                f"{metrics['decode']['mean'] * 1e3:>10.2f} "
+                f"{metrics['bytes_received'] / 1e6:>9.2f} "
+                f"{metrics['errors']:>7} {metrics['retries']:>8}",
+                file=file,
+            )
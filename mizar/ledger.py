@@ -0,0 +1,271 @@
+import threading
+import time
+from collections import deque
+from typing import Any
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+Position = Dict[str, Any]
+
+
+class PositionDrift(NamedTuple):
+    """
+    Difference between the ledger and the server found by a
+    reconciliation: the positions the ledger had but the server closed
+    (e.g. on a take profit), and the positions open on the server the
+    ledger did not know about.
+    """
+
+    strategy_id: int
+    closed: List[Position]
+    unknown: List[Position]
+    detected_at: float
+
+
+def _open_positions(payload: Any) -> List[Position]:
+    if isinstance(payload, dict):
+        return payload.get("open_positions") or []
+    return payload or []
+
+
+class PositionLedger:
+    """
+    In-process record of the open positions of the strategies, kept up to
+    date from the responses of open_position, close_position and
+    close_all_positions, so that the positions are looked up locally
+    instead of polling get_all_open_positions.
+
+    Positions opened or closed elsewhere (by a hosted strategy, a take
+    profit, another process) are only seen when the ledger is reconciled
+    with the server, which replaces the positions of a strategy by those of
+    the server and reports the differences as PositionDrift.
+
+        mizar = Mizar(api_key, position_ledger=True)
+        mizar.ledger.track(strategy_id)
+        mizar.ledger.start(interval=60.0)
+        ...
+        mizar.ledger.has_position(strategy_id, "BTC", "USDT")
+    """
+
+    def __init__(
+        self,
+        mizar,
+        on_drift: Optional[Callable[[PositionDrift], None]] = None,
+        max_drifts: int = 1000,
+    ):
+        """
+        :param mizar: client used for the reconciliations
+        :type mizar: Mizar
+        :param on_drift: called with every drift found by a reconciliation
+        :type on_drift: Callable[[PositionDrift], None]
+        :param max_drifts: number of drifts kept in ``drifts``
+        :type max_drifts: int
+        """
+        self.mizar = mizar
+        self.on_drift = on_drift
+        self.drifts: Deque[PositionDrift] = deque(maxlen=max_drifts)
+        self.errors: Dict[int, Exception] = {}
+        self._positions: Dict[int, Position] = {}
+        self._by_strategy: Dict[int, Dict[int, Position]] = {}
+        self._by_symbol: Dict[Tuple[int, str, str], Dict[int, Position]] = {}
+        self._synced: Set[int] = set()
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __repr__(self) -> str:
+        return (
+            f"PositionLedger(strategies={len(self._by_strategy)}, "
+            f"positions={len(self._positions)})"
+        )
+
+    def _add(self, position: Position):
+        position_id = position["position_id"]
+        self._remove(position_id)
+        strategy_id = position["strategy_id"]
+        self._positions[position_id] = position
+        self._by_strategy.setdefault(strategy_id, {})[position_id] = position
+        key = (strategy_id, position["base_asset"], position["quote_asset"])
+        self._by_symbol.setdefault(key, {})[position_id] = position
+
+    def _remove(self, position_id: int) -> Optional[Position]:
+        position = self._positions.pop(position_id, None)
+        if position is None:
+            return None
+        strategy_id = position["strategy_id"]
+        self._by_strategy[strategy_id].pop(position_id, None)
+        key = (strategy_id, position["base_asset"], position["quote_asset"])
+        symbol_positions = self._by_symbol.get(key)
+        if symbol_positions is not None:
+            symbol_positions.pop(position_id, None)
+            if not symbol_positions:
+                del self._by_symbol[key]
+        return position
+
+    def _touch(self, strategy_id: int):
+        self._by_strategy.setdefault(strategy_id, {})
+        self._versions[strategy_id] = self._versions.get(strategy_id, 0) + 1
+
+    def opened(self, order: Dict[str, Any], response: Any):
+        """
+        Record a position opened with order, the arguments of open_position.
+        """
+        position = dict(order)
+        if isinstance(response, dict):
+            position.update(response)
+        if "position_id" not in position:
+            return
+        with self._lock:
+            self._add(position)
+            self._touch(position["strategy_id"])
+
+    def closed(self, position_id: int):
+        with self._lock:
+            position = self._remove(position_id)
+            if position is not None:
+                self._touch(position["strategy_id"])
+
+    def closed_all(self, strategy_id: int):
+        with self._lock:
+            for position_id in list(self._by_strategy.get(strategy_id, ())):
+                self._remove(position_id)
+            self._touch(strategy_id)
+
+    def positions(self, strategy_id: int) -> List[Position]:
+        """
+        Return the open positions of a strategy.
+        """
+        with self._lock:
+            return list(self._by_strategy.get(strategy_id, {}).values())
+
+    def get(
+        self, strategy_id: int, base_asset: str, quote_asset: str
+    ) -> List[Position]:
+        """
+        Return the open positions of a strategy on a pair.
+        """
+        with self._lock:
+            key = (strategy_id, base_asset, quote_asset)
+            return list(self._by_symbol.get(key, {}).values())
+
+    def has_position(self, strategy_id: int, base_asset: str, quote_asset: str) -> bool:
+        return (strategy_id, base_asset, quote_asset) in self._by_symbol
+
+    def position(self, position_id: int) -> Optional[Position]:
+        return self._positions.get(position_id)
+
+    def synced(self, strategy_id: int) -> bool:
+        """
+        Tell whether the positions of a strategy were reconciled with the
+        server at least once, until then the ledger only knows the positions
+        opened through this client.
+        """
+        return strategy_id in self._synced
+
+    @property
+    def strategy_ids(self) -> List[int]:
+        with self._lock:
+            return list(self._by_strategy)
+
+    def track(self, strategy_id: int) -> Optional[PositionDrift]:
+        """
+        Load the positions of a strategy from the server, the reconciliations
+        then keep it up to date.
+        """
+        return self.reconcile(strategy_id)
+
+    def reconcile(self, strategy_id: int) -> Optional[PositionDrift]:
+        """
+        Replace the positions of a strategy by the open positions of the
+        server, returning the drift when they differed. A reconciliation is
+        skipped when the ledger recorded an order of the strategy while the
+        server was queried, the server positions could predate it.
+        """
+        with self._lock:
+            version = self._versions.get(strategy_id, 0)
+        server_positions = {
+            position["position_id"]: dict(position, strategy_id=strategy_id)
+            for position in _open_positions(
+                self.mizar.get_all_open_positions(strategy_id)
+            )
+        }
+        now = time.time()
+        with self._lock:
+            if self._versions.get(strategy_id, 0) != version:
+                return None
+            local_positions = self._by_strategy.get(strategy_id, {})
+            drift = PositionDrift(
+                strategy_id,
+                [
+                    position
+                    for position_id, position in local_positions.items()
+                    if position_id not in server_positions
+                ],
+                [
+                    position
+                    for position_id, position in server_positions.items()
+                    if position_id not in local_positions
+                ],
+                now,
+            )
+            for position_id in list(local_positions):
+                self._remove(position_id)
+            for position in server_positions.values():
+                self._add(position)
+            self._touch(strategy_id)
+            first_sync = strategy_id not in self._synced
+            self._synced.add(strategy_id)
+        if first_sync or not (drift.closed or drift.unknown):
+            return None
+        self.drifts.append(drift)
+        if self.on_drift is not None:
+            self.on_drift(drift)
+        return drift
+
+    def reconcile_all(
+        self, strategy_ids: Optional[Iterable[int]] = None
+    ) -> List[PositionDrift]:
+        """
+        Reconcile the strategies (all those of the ledger by default). The
+        strategies which could not be reconciled are reported in ``errors``.
+        """
+        drifts = []
+        for strategy_id in self.strategy_ids if strategy_ids is None else strategy_ids:
+            try:
+                drift = self.reconcile(strategy_id)
+            except Exception as e:
+                self.errors[strategy_id] = e
+                continue
+            self.errors.pop(strategy_id, None)
+            if drift is not None:
+                drifts.append(drift)
+        return drifts
+
+    def start(self, interval: float = 60.0) -> "PositionLedger":
+        """
+        Reconcile every strategy of the ledger every interval seconds in a
+        background thread.
+        """
+        self._stopped.clear()
+
+        def run():
+            while not self._stopped.wait(interval):
+                self.reconcile_all()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
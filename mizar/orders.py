@@ -0,0 +1,139 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+
+class LegResult:
+    """
+    Outcome of one leg of a batch of orders: its response, or the exception
+    it raised, or cancelled when it was never sent.
+    """
+
+    def __init__(self, index: int, request: Dict[str, Any]):
+        self.index = index
+        self.request = request
+        self.response: Any = None
+        self.error: Optional[Exception] = None
+        self.cancelled = False
+        self.sent_at: Optional[float] = None
+        self.done_at: Optional[float] = None
+        self.rolled_back = False
+        self.rollback_error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.done_at is not None and self.error is None
+
+    def __repr__(self) -> str:
+        if self.cancelled:
+            state = "cancelled"
+        elif self.error is not None:
+            state = f"error={self.error!r}"
+        else:
+            state = f"response={self.response!r}"
+        return f"LegResult(index={self.index}, {state})"
+
+
+class BatchResult:
+    """
+    Results of a batch of orders, one LegResult per leg in the order of the
+    requests. Timings are perf_counter seconds.
+    """
+
+    def __init__(self, legs: List[LegResult]):
+        self.legs = legs
+        self.rolled_back = False
+
+    @property
+    def ok(self) -> bool:
+        return all(leg.ok for leg in self.legs)
+
+    @property
+    def responses(self) -> List[Any]:
+        return [leg.response for leg in self.legs]
+
+    @property
+    def errors(self) -> Dict[int, Exception]:
+        return {leg.index: leg.error for leg in self.legs if leg.error is not None}
+
+    @property
+    def dispatch_latency(self) -> float:
+        """
+        Seconds between sending the first leg and sending the last one.
+        """
+        sent = [leg.sent_at for leg in self.legs if leg.sent_at is not None]
+        return max(sent) - min(sent) if sent else 0.0
+
+    @property
+    def fill_spread(self) -> float:
+        """
+        Seconds between the response to the first leg and the response to
+        the last one, how far apart the orders landed.
+        """
+        done = [leg.done_at for leg in self.legs if leg.done_at is not None]
+        return max(done) - min(done) if done else 0.0
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Seconds from sending the first leg to the last response.
+        """
+        sent = [leg.sent_at for leg in self.legs if leg.sent_at is not None]
+        done = [leg.done_at for leg in self.legs if leg.done_at is not None]
+        return max(done) - min(sent) if sent else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"BatchResult(legs={len(self.legs)}, errors={len(self.errors)}, "
+            f"dispatch_latency={self.dispatch_latency:.4f})"
+        )
+
+
+def dispatch(
+    call: Callable[..., Any],
+    requests: List[Dict[str, Any]],
+    max_workers: int,
+    cancel_on_error: bool = False,
+) -> BatchResult:
+    """
+    Call call(**request) for every request on at most max_workers threads,
+    collecting every response or exception instead of raising.
+
+    :param call: function sending one leg, e.g. Mizar.open_position
+    :type call: Callable[..., Any]
+    :param requests: keyword arguments of every leg
+    :type requests: List[Dict[str, Any]]
+    :param max_workers: number of legs sent concurrently
+    :type max_workers: int
+    :param cancel_on_error: once a leg failed, do not send the legs still
+                            waiting for a worker
+    :type cancel_on_error: bool
+    :return: the result of every leg
+    :rtype: BatchResult
+    """
+    legs = [LegResult(index, request) for index, request in enumerate(requests)]
+    if not legs:
+        return BatchResult(legs)
+    failed = threading.Event()
+
+    def send(leg: LegResult):
+        if cancel_on_error and failed.is_set():
+            leg.cancelled = True
+            return
+        leg.sent_at = time.perf_counter()
+        try:
+            leg.response = call(**leg.request)
+        except Exception as e:
+            leg.error = e
+            failed.set()
+        leg.done_at = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(legs))) as executor:
+        wait([executor.submit(send, leg) for leg in legs])
+    return BatchResult(legs)
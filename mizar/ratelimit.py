@@ -0,0 +1,147 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+
+# POST endpoints that must not be sent twice: a retry is only allowed when
+# the server provably did not process the first attempt
+UNSAFE_RESOURCES = {
+    "open-position",
+    "close-position",
+    "close-all-positions",
+    "publish-hosted-strategy",
+    "publish-self-hosted-strategy",
+    "dca-bots/open-position",
+    "dca-bots/close-position",
+    "dca-bots/shift-safety-orders",
+    "dca-bots/stop-bot-and-close-all-positions",
+    "dca-bots/close-all-positions",
+}
+
+
+def endpoint_group(resource: str) -> str:
+    """
+    Return the rate limit group of a resource: ``bars``, ``orders`` for the
+    endpoints changing positions or strategies, ``default`` otherwise.
+    """
+    if resource == "bars":
+        return "bars"
+    if resource in UNSAFE_RESOURCES:
+        return "orders"
+    return "default"
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing ``rate`` requests per second on
+    average, with bursts of up to ``capacity`` requests.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Take tokens from the bucket, sleeping until they are available.
+
+        :return: the time waited in seconds
+        :rtype: float
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if now >= self._paused_until and self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = max(
+                    self._paused_until - now, (tokens - self._tokens) / self.rate
+                )
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float):
+        """
+        Hold every request of the bucket for the given time, e.g. after the
+        server answered 429 Too Many Requests.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class RetryPolicy:
+    """
+    Retries with jittered exponential backoff. The server Retry-After header
+    takes precedence over the backoff when present.
+
+    Idempotent requests are retried on connection errors and on the
+    retry_statuses. Requests to UNSAFE_RESOURCES are only retried when the
+    server did not process them: on 429 and on connect timeouts.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        retry_statuses=(429, 500, 502, 503, 504),
+    ):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = set(retry_statuses)
+
+    def should_retry(
+        self, resource: str, status_code: Optional[int] = None, exception=None
+    ) -> bool:
+        if resource in UNSAFE_RESOURCES:
+            if exception is not None:
+                return isinstance(exception, requests.exceptions.ConnectTimeout)
+            return status_code == 429
+        if exception is not None:
+            return isinstance(
+                exception,
+                (requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+            )
+        return status_code in self.retry_statuses
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Return the delay in seconds before the given retry (starting at 0).
+        """
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff) + random.uniform(0, 0.1)
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff_factor * 2**attempt)
+        )
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header, given either in seconds or as an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,271 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from typing import Any
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+from urllib.parse import urlsplit
+
+from mizar.transport import RequestsTransport
+from mizar.transport import Transport
+
+
+class ReplayMiss(LookupError):
+    """
+    Raised in strict replay mode by a request missing from the archive.
+    """
+
+
+class _ReplayRequest(NamedTuple):
+    method: str
+    url: str
+    key: str
+    kwargs: Dict[str, Any]
+    body_size: int
+
+
+class _RecordedResponse:
+    """
+    Response read from an archive, exposing the interface of requests
+    responses used by the client.
+    """
+
+    __slots__ = ("status_code", "headers", "content", "url", "request")
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = ""
+        self.request = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+def _body(kwargs: Dict[str, Any]) -> bytes:
+    """
+    Serialize the body arguments of a request, in a stable order.
+    """
+    parts = []
+    if kwargs.get("json") is not None:
+        parts.append(json.dumps(kwargs["json"], sort_keys=True, default=str).encode())
+    data = kwargs.get("data")
+    if isinstance(data, str):
+        parts.append(data.encode())
+    elif isinstance(data, bytes):
+        parts.append(data)
+    elif data is not None:
+        parts.append(json.dumps(data, sort_keys=True, default=str).encode())
+    for name, file in sorted((kwargs.get("files") or {}).items()):
+        content = file[1] if isinstance(file, tuple) else file
+        if isinstance(content, str):
+            content = content.encode()
+        parts.append(name.encode() + b"=" + bytes(content))
+    return b"\n".join(parts)
+
+
+def _key(method: str, url: str, params: Optional[Dict[str, Any]], body: bytes) -> str:
+    params = {
+        key: str(value) for key, value in (params or {}).items() if value is not None
+    }
+    digest = hashlib.sha1(body).hexdigest() if body else None
+    return json.dumps(
+        [method.upper(), urlsplit(url).path, params, digest], sort_keys=True
+    )
+
+
+def replay_key(method: str, url: str, **kwargs) -> str:
+    """
+    Return the key of a request in a replay archive: its method, its path
+    (the host is ignored), its params without the None values, ordered and
+    compared as strings, and a digest of its body.
+    """
+    return _key(method, url, kwargs.get("params"), _body(kwargs))
+
+
+class ReplayTransport(Transport):
+    """
+    Transport recording the responses of the server into an archive, and
+    replaying them without any network access.
+
+    The archive is a gzip compressed file of json lines, one per request,
+    keyed with replay_key. It is loaded in memory when the transport is
+    created, replayed responses cost a dictionary lookup. Every entry is
+    written as its own gzip member and flushed, so a recording interrupted
+    by a crash keeps the entries written before it.
+
+    - record: every request is sent with the live transport and its
+      response written to the archive, replacing the one recorded for the
+      same request. Throttled (429) and server error responses are not
+      recorded
+    - replay (the default): requests are answered from the archive. A
+      request missing from it raises ReplayMiss when strict, and is
+      otherwise sent and recorded
+
+    Only deterministic requests replay: run the studio with an
+    end_timestamp, the ranges left open depend on the current time.
+
+        with ReplayTransport("bars.jsonl.gz", record=True) as transport:
+            mizar = Mizar(api_key, transport=transport)
+            ...
+
+        mizar = Mizar(api_key, transport=ReplayTransport("bars.jsonl.gz"))
+    """
+
+    def __init__(
+        self,
+        path: str,
+        record: bool = False,
+        strict: bool = True,
+        transport: Optional[Transport] = None,
+    ):
+        """
+        :param path: archive file, created when recording
+        :type path: str
+        :param record: send every request and record its response
+        :type record: bool
+        :param strict: when replaying, raise ReplayMiss for the requests
+                       missing from the archive instead of sending them
+        :type strict: bool
+        :param transport: live transport, a RequestsTransport by default
+        :type transport: Transport
+        """
+        self.transport = transport or RequestsTransport()
+        # the client headers go to the live transport
+        super().__init__()
+        self.headers = self.transport.headers
+        self.path = path
+        self.record = record
+        self.strict = strict
+        self.hits = 0
+        self.misses = 0
+        self._responses: Dict[str, _RecordedResponse] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._truncated = False
+        if os.path.isfile(path):
+            self._load()
+
+    def __enter__(self) -> "ReplayTransport":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _load(self):
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self._responses[entry["key"]] = _RecordedResponse(
+                        entry["status_code"],
+                        entry["headers"],
+                        entry["content"].encode("utf-8"),
+                    )
+        except (EOFError, OSError, ValueError):
+            # the recording writing the tail was interrupted, keep what was
+            # read before it
+            self._truncated = True
+
+    @staticmethod
+    def _entry(key: str, response: Any) -> bytes:
+        entry = {
+            "key": key,
+            "status_code": response.status_code,
+            "headers": {"Content-Type": response.headers.get("Content-Type", "")},
+            "content": response.content.decode("utf-8"),
+        }
+        # every entry is a complete gzip member, an interrupted recording
+        # only loses the entry it was writing
+        return gzip.compress((json.dumps(entry) + "\n").encode("utf-8"))
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self._truncated:
+            # drop the truncated tail, entries appended after it could not
+            # be read back
+            temporary_file = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporary_file, "wb") as f:
+                for key, response in self._responses.items():
+                    f.write(self._entry(key, response))
+            os.replace(temporary_file, self.path)
+            self._truncated = False
+        self._file = open(self.path, "ab")
+
+    def _write(self, key: str, response: Any):
+        entry = self._entry(key, response)
+        recorded = _RecordedResponse(
+            response.status_code,
+            {"Content-Type": response.headers.get("Content-Type", "")},
+            response.content,
+        )
+        with self._lock:
+            if self._file is None:
+                self._open()
+            self._file.write(entry)
+            self._file.flush()
+            self._responses[key] = recorded
+
+    def prepare(self, method, url, **kwargs) -> _ReplayRequest:
+        body = _body(kwargs)
+        return _ReplayRequest(
+            method,
+            url,
+            _key(method, url, kwargs.get("params"), body),
+            kwargs,
+            len(body),
+        )
+
+    def send(self, request: _ReplayRequest) -> Any:
+        if not self.record:
+            response = self._responses.get(request.key)
+            if response is not None:
+                self.hits += 1
+                return self._replayed(request, response)
+            self.misses += 1
+            if self.strict:
+                raise ReplayMiss(
+                    f"{request.method} {request.url} is not in {self.path}"
+                )
+
+        response = self.transport.request(request.method, request.url, **request.kwargs)
+        # transient failures are left for the retry policy, not recorded
+        if response.status_code != 429 and response.status_code < 500:
+            self._write(request.key, response)
+        return response
+
+    def body_size(self, request: _ReplayRequest) -> int:
+        return request.body_size
+
+    @staticmethod
+    def _replayed(
+        request: _ReplayRequest, recorded: _RecordedResponse
+    ) -> _RecordedResponse:
+        # the url and method of the request are those of the replaying client
+        response = _RecordedResponse(
+            recorded.status_code, recorded.headers, recorded.content
+        )
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        self.transport.close()
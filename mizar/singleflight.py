@@ -0,0 +1,67 @@
+import threading
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Optional
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.exception: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls: while a call with a given key is
+    in flight, the other callers with the same key wait for it and share
+    its result (or exception) instead of making the call themselves.
+
+    Only meant for idempotent calls, the Mizar client uses it for GET
+    requests keyed by resource and params.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.saved = 0
+        self._in_flight: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """
+        Return function(), or the result of the identical call in flight.
+        """
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self.calls += 1
+            else:
+                self.saved += 1
+
+        if not leader:
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the number of calls made and of calls saved by coalescing.
+        """
+        with self._lock:
+            return {"calls": self.calls, "saved": self.saved}
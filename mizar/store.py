@@ -0,0 +1,663 @@
+import glob
+import json
+import os
+import shutil
+import threading
+from abc import ABC
+from abc import abstractmethod
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from mizar.bars import _typed
+from mizar.filelock import FileLock
+
+
+class BarSeries(NamedTuple):
+    exchange: str
+    symbol: str
+    bar_type: str
+    bar_subclass: str
+
+    @property
+    def directory(self) -> str:
+        return os.path.join("bar", self.exchange, self.symbol, self.bar_type)
+
+
+def _between(
+    bars_df: pd.DataFrame,
+    start_timestamp: Optional[int] = None,
+    end_timestamp: Optional[int] = None,
+) -> pd.DataFrame:
+    if bars_df.empty:
+        return bars_df
+    mask = np.ones(bars_df.shape[0], dtype=bool)
+    if start_timestamp is not None:
+        mask &= (bars_df["time"] >= start_timestamp).to_numpy()
+    if end_timestamp is not None:
+        mask &= (bars_df["time"] < end_timestamp).to_numpy()
+    if mask.all():
+        return bars_df
+    return bars_df[mask].reset_index(drop=True)
+
+
+def _with_time(columns: List[str]) -> List[str]:
+    return ["time"] + [column for column in columns if column != "time"]
+
+
+def _temporary_file(file: str) -> str:
+    # unique per process and thread, so that concurrent writers never share
+    # a temporary file before their atomic rename
+    return f"{file}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _outside(
+    bars_df: pd.DataFrame, start_timestamp: int, end_timestamp: int
+) -> pd.DataFrame:
+    if bars_df.empty:
+        return bars_df
+    times = bars_df["time"]
+    return bars_df[(times < start_timestamp) | (times >= end_timestamp)]
+
+
+def _merge(existing_df: pd.DataFrame, bars_df: pd.DataFrame) -> pd.DataFrame:
+    merged_df = pd.concat([existing_df, bars_df], axis=0, ignore_index=True)
+    merged_df.drop_duplicates(
+        inplace=True, ignore_index=True, subset=["first_trade_id"]
+    )
+    merged_df.sort_values(by="time", inplace=True, kind="mergesort", ignore_index=True)
+    return merged_df
+
+
+class BarStore(ABC):
+    """
+    Storage backend of the MizarStudio bar cache.
+
+    A store keeps one series of raw bars per BarSeries, with the bar time
+    as epoch milliseconds in the ``time`` column.
+
+    Files are replaced atomically, so reads never see a partial write and
+    need no lock. Writers coordinate through lock(series), which holds
+    across processes sharing the store directory.
+    """
+
+    def __init__(self, path: str = "./", lock_timeout: Optional[float] = None):
+        """
+        :param path: directory of the store
+        :type path: str
+        :param lock_timeout: seconds to wait for the lock of a series before
+                             raising LockTimeout, forever by default
+        :type lock_timeout: float
+        """
+        self.path = path
+        self.lock_timeout = lock_timeout
+
+    @abstractmethod
+    def read(
+        self,
+        series: BarSeries,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Return the cached bars of a series with start_timestamp <= time <
+        end_timestamp sorted by time, or an empty dataframe when nothing is
+        cached. Both bounds are optional. When columns are given only those
+        columns and ``time`` are read.
+        """
+
+    @abstractmethod
+    def append(self, series: BarSeries, bars_df: pd.DataFrame) -> None:
+        """
+        Merge new bars into the cached series, dropping the bars already
+        stored (by first_trade_id). Concurrent writers of a series must hold
+        lock(series).
+        """
+
+    @abstractmethod
+    def replace(
+        self,
+        series: BarSeries,
+        start_timestamp: int,
+        end_timestamp: int,
+        bars_df: pd.DataFrame,
+    ) -> None:
+        """
+        Replace the cached bars with start_timestamp <= time < end_timestamp
+        by the bars of bars_df in that window, leaving the other bars
+        untouched. Concurrent writers of a series must hold lock(series).
+        """
+
+    @abstractmethod
+    def last_timestamp(self, series: BarSeries) -> Optional[int]:
+        """
+        Return the time of the most recent cached bar, None if the series
+        is not cached.
+        """
+
+    @abstractmethod
+    def list_series(self) -> List[BarSeries]:
+        """
+        Return every series of the store.
+        """
+
+    def _state_file(self, series: BarSeries, extension: str) -> str:
+        return os.path.join(
+            self.path, series.directory, f"{series.bar_subclass}.{extension}"
+        )
+
+    def lock(self, series: BarSeries) -> FileLock:
+        """
+        Return an exclusive lock of the series, shared with the other
+        processes using the same store directory.
+        """
+        file = self._state_file(series, "lock")
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        return FileLock(file, timeout=self.lock_timeout)
+
+    def refreshed_at(self, series: BarSeries) -> Optional[float]:
+        """
+        Return when the last refresh of the series from the server ended
+        (epoch seconds), None if it was never refreshed.
+        """
+        try:
+            with open(self._state_file(series, "refresh.json")) as f:
+                return json.load(f)["refreshed_at"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def mark_refreshed(self, series: BarSeries, refreshed_at: float) -> None:
+        """
+        Record a refresh of the series from the server, ended at
+        refreshed_at (epoch seconds). Call it holding lock(series).
+        """
+        file = self._state_file(series, "refresh.json")
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        temporary_file = _temporary_file(file)
+        with open(temporary_file, "w") as f:
+            json.dump({"refreshed_at": refreshed_at}, f)
+        os.replace(temporary_file, file)
+
+
+class CsvBarStore(BarStore):
+    """
+    Legacy layout, one ``{bar_subclass}_bar_data.csv`` per series that is
+    rewritten on every append.
+    """
+
+    def _file(self, series: BarSeries) -> str:
+        return os.path.join(
+            self.path, series.directory, f"{series.bar_subclass}_bar_data.csv"
+        )
+
+    def read(
+        self,
+        series: BarSeries,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        if not os.path.isfile(self._file(series)):
+            return pd.DataFrame()
+        usecols = None
+        if columns is not None:
+            usecols = _with_time(columns).__contains__
+        return _between(
+            pd.read_csv(self._file(series), usecols=usecols),
+            start_timestamp,
+            end_timestamp,
+        )
+
+    def append(self, series: BarSeries, bars_df: pd.DataFrame) -> None:
+        if bars_df.empty:
+            return
+        os.makedirs(os.path.dirname(self._file(series)), exist_ok=True)
+        self._write(series, _merge(self.read(series), bars_df))
+
+    def replace(self, series, start_timestamp, end_timestamp, bars_df) -> None:
+        kept_df = _outside(self.read(series), start_timestamp, end_timestamp)
+        bars_df = _between(bars_df, start_timestamp, end_timestamp)
+        if kept_df.empty and bars_df.empty:
+            if os.path.isfile(self._file(series)):
+                os.remove(self._file(series))
+            return
+        os.makedirs(os.path.dirname(self._file(series)), exist_ok=True)
+        self._write(series, _merge(kept_df, bars_df))
+
+    def _write(self, series: BarSeries, bars_df: pd.DataFrame) -> None:
+        temporary_file = _temporary_file(self._file(series))
+        bars_df.to_csv(temporary_file, index=False)
+        os.replace(temporary_file, self._file(series))
+
+    def last_timestamp(self, series: BarSeries) -> Optional[int]:
+        bars_df = self.read(series)
+        if bars_df.empty:
+            return None
+        return int(bars_df["time"].max())
+
+    def list_series(self) -> List[BarSeries]:
+        pattern = os.path.join(self.path, "bar", "*", "*", "*", "*_bar_data.csv")
+        series = []
+        for file in sorted(glob.glob(pattern)):
+            directory, filename = os.path.split(file)
+            directory, bar_type = os.path.split(directory)
+            directory, symbol = os.path.split(directory)
+            exchange = os.path.basename(directory)
+            bar_subclass = filename[: -len("_bar_data.csv")]
+            series.append(BarSeries(exchange, symbol, bar_type, bar_subclass))
+        return series
+
+
+class ParquetBarStore(BarStore):
+    """
+    Columnar store partitioned by month, one
+    ``{bar_subclass}/{YYYY-MM}.parquet`` file per partition. Appending new
+    bars only rewrites the partitions they fall into, usually the last one.
+
+    Every series keeps an ``index.json`` with the time range and size of
+    each partition, so range reads only open the overlapping partitions.
+    Requires pyarrow.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def _directory(self, series: BarSeries) -> str:
+        return os.path.join(self.path, series.directory, series.bar_subclass)
+
+    def _partition_file(self, series: BarSeries, partition: str) -> str:
+        return os.path.join(self._directory(series), f"{partition}.parquet")
+
+    @staticmethod
+    def _partition_keys(times: pd.Series) -> np.ndarray:
+        months = times.to_numpy(dtype="int64").astype("datetime64[ms]")
+        return months.astype("datetime64[M]").astype(str)
+
+    def _write(self, file: str, bars_df: pd.DataFrame) -> None:
+        temporary_file = _temporary_file(file)
+        bars_df.to_parquet(temporary_file, index=False)
+        os.replace(temporary_file, file)
+
+    def index(self, series: BarSeries) -> Dict[str, Dict[str, int]]:
+        """
+        Return the partition index of a series, mapping every partition to
+        its min_time, max_time and number of rows. The index is rebuilt from
+        the partition files when missing.
+        """
+        index_file = os.path.join(self._directory(series), self.INDEX_FILE)
+        if os.path.isfile(index_file):
+            with open(index_file) as f:
+                return json.load(f)
+
+        index = {}
+        for file in glob.glob(os.path.join(self._directory(series), "*.parquet")):
+            partition = os.path.basename(file)[: -len(".parquet")]
+            times = pd.read_parquet(file, columns=["time"])["time"]
+            index[partition] = {
+                "min_time": int(times.min()),
+                "max_time": int(times.max()),
+                "rows": int(times.shape[0]),
+            }
+        if index:
+            self._write_index(series, index)
+        return index
+
+    def _write_index(self, series: BarSeries, index: Dict[str, Dict[str, int]]):
+        index_file = os.path.join(self._directory(series), self.INDEX_FILE)
+        temporary_file = _temporary_file(index_file)
+        with open(temporary_file, "w") as f:
+            json.dump(dict(sorted(index.items())), f)
+        os.replace(temporary_file, index_file)
+
+    def read(
+        self,
+        series: BarSeries,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        if columns is not None:
+            columns = _with_time(columns)
+        partitions = [
+            partition
+            for partition, stats in sorted(self.index(series).items())
+            if (start_timestamp is None or stats["max_time"] >= start_timestamp)
+            and (end_timestamp is None or stats["min_time"] < end_timestamp)
+        ]
+        if not partitions:
+            return pd.DataFrame()
+        bars_df = pd.concat(
+            [
+                pd.read_parquet(
+                    self._partition_file(series, partition), columns=columns
+                )
+                for partition in partitions
+            ],
+            axis=0,
+            ignore_index=True,
+        )
+        return _between(bars_df, start_timestamp, end_timestamp)
+
+    def append(self, series: BarSeries, bars_df: pd.DataFrame) -> None:
+        if bars_df.empty:
+            return
+        os.makedirs(self._directory(series), exist_ok=True)
+        index = self.index(series)
+        bars_df = _typed(bars_df)
+        for partition, partition_df in self._partitions(bars_df).items():
+            if partition in index:
+                file = self._partition_file(series, partition)
+                partition_df = _merge(pd.read_parquet(file), partition_df)
+            else:
+                partition_df = _merge(pd.DataFrame(), partition_df)
+            self._write_partition(series, index, partition, partition_df)
+        self._write_index(series, index)
+
+    def replace(self, series, start_timestamp, end_timestamp, bars_df) -> None:
+        index = self.index(series)
+        bars_df = _between(bars_df, start_timestamp, end_timestamp)
+        new_partitions = {}
+        if not bars_df.empty:
+            os.makedirs(self._directory(series), exist_ok=True)
+            new_partitions = self._partitions(_typed(bars_df))
+        partitions = set(new_partitions) | {
+            partition
+            for partition, stats in index.items()
+            if stats["max_time"] >= start_timestamp
+            and stats["min_time"] < end_timestamp
+        }
+        if not partitions:
+            return
+        for partition in sorted(partitions):
+            kept_df = pd.DataFrame()
+            if partition in index:
+                kept_df = _outside(
+                    pd.read_parquet(self._partition_file(series, partition)),
+                    start_timestamp,
+                    end_timestamp,
+                )
+            if partition in new_partitions:
+                partition_df = _merge(kept_df, new_partitions[partition])
+            else:
+                partition_df = kept_df.reset_index(drop=True)
+            if partition_df.empty:
+                os.remove(self._partition_file(series, partition))
+                del index[partition]
+                continue
+            self._write_partition(series, index, partition, partition_df)
+        self._write_index(series, index)
+
+    def _partitions(self, bars_df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        return dict(
+            list(bars_df.groupby(self._partition_keys(bars_df["time"]), sort=True))
+        )
+
+    def _write_partition(
+        self,
+        series: BarSeries,
+        index: Dict[str, Dict[str, int]],
+        partition: str,
+        partition_df: pd.DataFrame,
+    ) -> None:
+        self._write(self._partition_file(series, partition), partition_df)
+        index[partition] = {
+            "min_time": int(partition_df["time"].iloc[0]),
+            "max_time": int(partition_df["time"].iloc[-1]),
+            "rows": int(partition_df.shape[0]),
+        }
+
+    def last_timestamp(self, series: BarSeries) -> Optional[int]:
+        index = self.index(series)
+        if not index:
+            return None
+        return max(stats["max_time"] for stats in index.values())
+
+    def list_series(self) -> List[BarSeries]:
+        pattern = os.path.join(self.path, "bar", "*", "*", "*", "*", "*.parquet")
+        series = set()
+        for file in glob.glob(pattern):
+            directory = os.path.dirname(file)
+            directory, bar_subclass = os.path.split(directory)
+            directory, bar_type = os.path.split(directory)
+            directory, symbol = os.path.split(directory)
+            exchange = os.path.basename(directory)
+            series.add(BarSeries(exchange, symbol, bar_type, bar_subclass))
+        return sorted(series)
+
+
+class MemmapBarStore(BarStore):
+    """
+    Store keeping every column of a series as a raw array of fixed width
+    values, one ``{column}.bin`` file per column, opened with memory
+    mapping. Reads return dataframes backed by the mapped files without
+    copying (their arrays are read-only, copy() them to modify them
+    in place), so opening a series costs the same whatever its length and
+    the processes of a host reading a series share the page cache instead
+    of holding a copy each.
+
+    The files of a series live in a generation directory next to a
+    ``meta.json`` giving the generation, the number of rows and the dtype
+    of every column. Appending bars newer than the series extends the
+    files in place and then updates meta.json, readers only map the rows
+    it declares. Other writes (backfills, replace, schema changes) write a
+    new generation and switch meta.json to it atomically. Only numeric
+    columns can be stored.
+    """
+
+    META_FILE = "meta.json"
+
+    def _directory(self, series: BarSeries) -> str:
+        return os.path.join(self.path, series.directory, f"{series.bar_subclass}.mmap")
+
+    def _meta(self, series: BarSeries) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self._directory(series), self.META_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, series: BarSeries, meta: Dict) -> None:
+        meta_file = os.path.join(self._directory(series), self.META_FILE)
+        temporary_file = _temporary_file(meta_file)
+        with open(temporary_file, "w") as f:
+            json.dump(meta, f)
+        os.replace(temporary_file, meta_file)
+
+    def _column_file(self, series: BarSeries, generation: int, column: str) -> str:
+        return os.path.join(self._directory(series), str(generation), f"{column}.bin")
+
+    def _column(self, series: BarSeries, meta: Dict, column: str) -> np.ndarray:
+        return np.asarray(
+            np.memmap(
+                self._column_file(series, meta["generation"], column),
+                dtype=np.dtype(meta["columns"][column]),
+                mode="r",
+                shape=(meta["rows"],),
+            )
+        )
+
+    def read(
+        self,
+        series: BarSeries,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        while True:
+            meta = self._meta(series)
+            if meta is None:
+                return pd.DataFrame()
+            try:
+                return self._read(series, meta, start_timestamp, end_timestamp, columns)
+            except FileNotFoundError:
+                # the generation was replaced by a writer since meta was read
+                continue
+
+    def _read(
+        self,
+        series: BarSeries,
+        meta: Dict,
+        start_timestamp: Optional[int],
+        end_timestamp: Optional[int],
+        columns: Optional[List[str]],
+    ) -> pd.DataFrame:
+        if columns is None:
+            columns = list(meta["columns"])
+        else:
+            columns = [
+                column for column in _with_time(columns) if column in meta["columns"]
+            ]
+        times = self._column(series, meta, "time")
+        start, end = 0, meta["rows"]
+        if start_timestamp is not None:
+            start = int(np.searchsorted(times, start_timestamp, side="left"))
+        if end_timestamp is not None:
+            end = int(np.searchsorted(times, end_timestamp, side="left"))
+        end = max(start, end)
+        return pd.DataFrame(
+            {
+                column: (
+                    times if column == "time" else self._column(series, meta, column)
+                )[start:end]
+                for column in columns
+            },
+            copy=False,
+        )
+
+    @staticmethod
+    def _dtypes(bars_df: pd.DataFrame) -> Dict[str, str]:
+        dtypes = {}
+        for column, dtype in bars_df.dtypes.items():
+            if not isinstance(dtype, np.dtype) or dtype.kind not in "biuf":
+                raise ValueError(
+                    f"Column {column} of type {dtype} cannot be memory mapped"
+                )
+            dtypes[str(column)] = dtype.str
+        return dtypes
+
+    def append(self, series: BarSeries, bars_df: pd.DataFrame) -> None:
+        if bars_df.empty:
+            return
+        bars_df = _typed(bars_df)
+        meta = self._meta(series)
+        if meta is None:
+            self._write(series, None, _merge(pd.DataFrame(), bars_df))
+            return
+
+        # a bar already stored has the same time, only the stored bars from
+        # the oldest new one can be duplicates: usually none or a few
+        bars_df = bars_df.drop_duplicates(subset=["first_trade_id"])
+        overlap_df = self.read(
+            series, int(bars_df["time"].min()), columns=["first_trade_id"]
+        )
+        bars_df = bars_df[~bars_df["first_trade_id"].isin(overlap_df["first_trade_id"])]
+        if bars_df.empty:
+            return
+        bars_df = bars_df.sort_values(by="time", kind="mergesort", ignore_index=True)
+        # the stored bars older than the new ones were not read
+        newer = (
+            overlap_df.empty or bars_df["time"].iloc[0] >= overlap_df["time"].iloc[-1]
+        )
+        if newer and self._dtypes(bars_df) == meta["columns"]:
+            self._extend(series, meta, bars_df)
+        else:
+            self._write(series, meta, _merge(self.read(series), bars_df))
+
+    def _extend(self, series: BarSeries, meta: Dict, bars_df: pd.DataFrame) -> None:
+        for column, dtype in meta["columns"].items():
+            with open(
+                self._column_file(series, meta["generation"], column), "r+b"
+            ) as f:
+                size = meta["rows"] * np.dtype(dtype).itemsize
+                # drop what an interrupted append may have left past the rows
+                if os.fstat(f.fileno()).st_size != size:
+                    f.truncate(size)
+                f.seek(size)
+                bars_df[column].to_numpy().tofile(f)
+        self._write_meta(series, dict(meta, rows=meta["rows"] + bars_df.shape[0]))
+
+    def _write(
+        self, series: BarSeries, meta: Optional[Dict], bars_df: pd.DataFrame
+    ) -> None:
+        dtypes = self._dtypes(bars_df)
+        generation = 0 if meta is None else meta["generation"] + 1
+        directory = os.path.dirname(self._column_file(series, generation, "time"))
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        for column in dtypes:
+            bars_df[column].to_numpy().tofile(
+                self._column_file(series, generation, column)
+            )
+        self._write_meta(
+            series,
+            {"generation": generation, "rows": bars_df.shape[0], "columns": dtypes},
+        )
+        self._remove_generations(series, keep=generation)
+
+    def _remove_generations(self, series: BarSeries, keep: Optional[int] = None):
+        # the readers which mapped them keep their pages until they unmap
+        for name in os.listdir(self._directory(series)):
+            if name.isdigit() and int(name) != keep:
+                shutil.rmtree(
+                    os.path.join(self._directory(series), name), ignore_errors=True
+                )
+
+    def replace(self, series, start_timestamp, end_timestamp, bars_df) -> None:
+        meta = self._meta(series)
+        kept_df = _outside(self.read(series), start_timestamp, end_timestamp)
+        bars_df = _between(bars_df, start_timestamp, end_timestamp)
+        if kept_df.empty and bars_df.empty:
+            if meta is not None:
+                os.remove(os.path.join(self._directory(series), self.META_FILE))
+                self._remove_generations(series)
+            return
+        os.makedirs(self._directory(series), exist_ok=True)
+        self._write(series, meta, _merge(kept_df, _typed(bars_df)))
+
+    def last_timestamp(self, series: BarSeries) -> Optional[int]:
+        bars_df = self.read(series, columns=["time"])
+        if bars_df.empty:
+            return None
+        return int(bars_df["time"].iloc[-1])
+
+    def list_series(self) -> List[BarSeries]:
+        pattern = os.path.join(
+            self.path, "bar", "*", "*", "*", "*.mmap", self.META_FILE
+        )
+        series = []
+        for file in sorted(glob.glob(pattern)):
+            directory = os.path.dirname(file)
+            directory, name = os.path.split(directory)
+            directory, bar_type = os.path.split(directory)
+            directory, symbol = os.path.split(directory)
+            exchange = os.path.basename(directory)
+            bar_subclass = name[: -len(".mmap")]
+            series.append(BarSeries(exchange, symbol, bar_type, bar_subclass))
+        return series
+
+
+def migrate_csv_store(
+    source: CsvBarStore, destination: BarStore, remove: bool = False
+) -> List[BarSeries]:
+    """
+    Copy every series of a legacy CSV cache into another store
+
+    :param source: legacy csv store
+    :type source: CsvBarStore
+    :param destination: store receiving the bars
+    :type destination: BarStore
+    :param remove: delete the csv files once migrated
+    :type remove: bool
+    :return: the migrated series
+    :rtype: List[BarSeries]
+    """
+    migrated = source.list_series()
+    for series in migrated:
+        destination.append(series, source.read(series))
+        if remove:
+            os.remove(source._file(series))
+    return migrated
@@ -1,21 +1,95 @@
 import os
+import time
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
 from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
 
+import numpy as np
 import pandas as pd
 
+from mizar.api import _BarPagination
 from mizar.api import Mizar
+from mizar.bars import bar_duration
+from mizar.bars import BAR_DTYPES
+from mizar.bars import bars_to_frame
+from mizar.bars import check_bar_integrity
+from mizar.bars import compact_bars
+from mizar.bars import resample_bars
+from mizar.store import _between
+from mizar.store import BarSeries
+from mizar.store import BarStore
+from mizar.store import CsvBarStore
+from mizar.store import migrate_csv_store
+from mizar.store import ParquetBarStore
+from mizar.tailer import BarCallback
+from mizar.tailer import BarTailer
+
+
+def _merge_windows(starts: np.ndarray, ends: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Merge overlapping or touching [start, end) windows.
+    """
+    order = np.argsort(starts, kind="mergesort")
+    windows: List[Tuple[int, int]] = []
+    for start, end in zip(starts[order].tolist(), ends[order].tolist()):
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
 
 
 class MizarStudio:
-    def __init__(self, mizar: Mizar, path: str = "./"):
+    def __init__(self, mizar: Mizar, path: str = "./", store: BarStore = None):
         self.mizar = mizar
-        self.path = path
         if path[-1] != "/":
             path = f"{path}/"
+        self.path = path
+        self.store = store or ParquetBarStore(path)
+        # series whose legacy csv cache was looked for
+        self._legacy_checked: Set[BarSeries] = set()
 
         if not os.path.isdir(path):
             os.makedirs(path)
 
+    def migrate_csv_cache(self, remove: bool = False) -> List[BarSeries]:
+        """
+        Import the series cached by the previous csv layout
+        (``{bar_subclass}_bar_data.csv`` files) into the studio store
+
+        :param remove: delete the csv files once migrated
+        :type remove: bool
+        :return: the migrated series
+        :rtype: List[BarSeries]
+        """
+        return migrate_csv_store(CsvBarStore(self.path), self.store, remove=remove)
+
+    def _migrate_legacy(self, series: BarSeries) -> None:
+        """
+        Import the series from the csv layout the first time it is used, so
+        that the history cached before the switch to another store is not
+        downloaded again. The csv file is then renamed with a ``.migrated``
+        suffix, delete it once the new store is trusted.
+        """
+        if series in self._legacy_checked or isinstance(self.store, CsvBarStore):
+            return
+        legacy_store = CsvBarStore(self.path)
+        legacy_file = legacy_store._file(series)
+        if os.path.isfile(legacy_file):
+            with self.store.lock(series):
+                # another worker may have migrated it while we waited
+                if os.path.isfile(legacy_file):
+                    self.store.append(series, legacy_store.read(series))
+                    os.replace(legacy_file, f"{legacy_file}.migrated")
+        self._legacy_checked.add(series)
+
     def get_bar_df(
         self,
         base_asset: str,
@@ -24,6 +98,12 @@ class MizarStudio:
         bar_type: str = "time",
         bar_subclass: str = "D",
         exchange: str = "binance",
+        end_timestamp: Optional[int] = None,
+        max_workers: int = 1,
+        window_size: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+        compact: bool = False,
+        float32: bool = False,
     ) -> pd.DataFrame:
         """
         :param base_asset: Base asset to select (e.g. BTC)
@@ -38,52 +118,643 @@ class MizarStudio:
         :param bar_subclass: bar subclass specify the class of bar type
                              to select (e.g. 1min, 3min, dynamic etc..)
         :type bar_subclass: str
+        :param end_timestamp: when given, only the bars before this timestamp
+                              are returned, and the server is not queried if
+                              the cache already reaches it
+        :type end_timestamp: int
+        :param max_workers: maximum number of concurrent requests used to
+                            download the missing bars. With 1 (the default)
+                            the bars are paginated sequentially
+        :type max_workers: int
+        :param window_size: width in milliseconds of the time windows the
+                            missing range is split into when max_workers > 1.
+                            Defaults to four windows per worker
+        :type window_size: int
+        :param columns: only return these bar columns (see BAR_DTYPES),
+                        e.g. ["close", "base_asset_volume"]. With compact
+                        the default is every column but the redundant id
+        :type columns: List[str]
+        :param compact: shrink the dataframe with compact_bars: constant
+                        ids moved to ``attrs["constants"]`` and integers
+                        downcast. The memory saved is reported in
+                        ``attrs["memory_usage"]``
+        :type compact: bool
+        :param float32: with compact, also store prices and volumes as
+                        float32
+        :type float32: bool
         :return: bar dataframe
         :rtype: pd.DataFrame
         """
-        directory = f"{self.path}bar/{exchange}/{base_asset}{quote_asset}/{bar_type}"
+        if columns is not None:
+            unknown = sorted(set(columns) - set(BAR_DTYPES))
+            if unknown:
+                raise ValueError(f"Unknown bar columns: {', '.join(unknown)}")
+        elif compact:
+            columns = [column for column in BAR_DTYPES if column != "id"]
 
-        if os.path.isfile(f"{directory}/{bar_subclass}_bar_data.csv"):
-            bars_df = pd.read_csv(f"{directory}/{bar_subclass}_bar_data.csv")
-            timestamp = bars_df["time"].max()
+        series, bar_params = self._series(
+            base_asset, quote_asset, bar_type, bar_subclass, exchange
+        )
+        self._update_series(
+            series, bar_params, start_timestamp, end_timestamp, max_workers, window_size
+        )
+        return self._read_bar_df(
+            series,
+            start_timestamp,
+            end_timestamp,
+            columns=columns,
+            compact=compact,
+            float32=float32,
+        )
 
-        else:
-            os.makedirs(f"{directory}/", exist_ok=True)
-            bars_df = pd.DataFrame()
-            timestamp = start_timestamp
-
-        previous_size = -1
-
-        while bars_df.shape[0] != previous_size:
-            previous_size = bars_df.shape[0]
-
-            response = self.mizar.get_bar_data(
-                base_asset=base_asset.upper(),
-                quote_asset=quote_asset.upper(),
-                start_timestamp=timestamp,
-                bar_type=bar_type,
-                bar_subclass=bar_subclass,
-                exchange=exchange,
+    def _series(
+        self,
+        base_asset: str,
+        quote_asset: str,
+        bar_type: str,
+        bar_subclass: str,
+        exchange: str,
+    ) -> Tuple[BarSeries, Dict[str, str]]:
+        """
+        Return the store series of a pair and its bars endpoint params,
+        migrating the series from the csv layout when it is cached there.
+        """
+        series = BarSeries(
+            exchange, f"{base_asset}{quote_asset}", bar_type, bar_subclass
+        )
+        self._migrate_legacy(series)
+        bar_params = dict(
+            base_asset=base_asset.upper(),
+            quote_asset=quote_asset.upper(),
+            bar_type=bar_type,
+            bar_subclass=bar_subclass,
+            exchange=exchange,
+        )
+        return series, bar_params
+
+    def _update_series(
+        self,
+        series: BarSeries,
+        bar_params: Dict[str, str],
+        start_timestamp: int,
+        end_timestamp: Optional[int],
+        max_workers: int = 1,
+        window_size: Optional[int] = None,
+    ) -> None:
+        """
+        Download the bars of a series missing from the store, unless the
+        store already reaches end_timestamp.
+
+        Workers sharing the store refresh a series one at a time, holding
+        its lock. A worker which waited for the lock while another one
+        refreshed the series up to now reuses that refresh instead of
+        querying the server again.
+        """
+        requested_at = time.time()
+        with self.store.lock(series):
+            timestamp = self.store.last_timestamp(series)
+            if timestamp is None:
+                timestamp = start_timestamp
+            elif end_timestamp is not None:
+                if timestamp >= end_timestamp:
+                    return
+            else:
+                refreshed_at = self.store.refreshed_at(series)
+                if refreshed_at is not None and refreshed_at >= requested_at:
+                    return
+
+            if max_workers > 1:
+                new_bars_df = self._fetch_bars_parallel(
+                    bar_params, int(timestamp), max_workers, window_size, end_timestamp
+                )
+            else:
+                new_bars_df = self._fetch_bars(
+                    bar_params, int(timestamp), end_timestamp
+                )
+            self.store.append(series, new_bars_df)
+            if end_timestamp is None:
+                self.store.mark_refreshed(series, time.time())
+
+    def _read_bar_df(
+        self,
+        series: BarSeries,
+        start_timestamp: Optional[int],
+        end_timestamp: Optional[int],
+        columns: Optional[List[str]] = None,
+        compact: bool = False,
+        float32: bool = False,
+    ) -> pd.DataFrame:
+        bars_df = self._bar_df(
+            self.store.read(series, start_timestamp, end_timestamp, columns)
+        )
+        if compact:
+            return compact_bars(bars_df, float32=float32)
+        return bars_df
+
+    def get_resampled_bar_df(
+        self,
+        base_asset: str,
+        quote_asset: str,
+        bar_subclass: str,
+        start_timestamp: int = 0,
+        source_bar_subclass: str = "1min",
+        exchange: str = "binance",
+        end_timestamp: Optional[int] = None,
+        max_workers: int = 1,
+    ) -> pd.DataFrame:
+        """
+        Build coarse time bars (e.g. 1h) locally from a finer cached series
+        (1min by default), instead of downloading and caching the coarse
+        series as well. The finer series is brought up to date like in
+        get_bar_df. The last coarse bar is only returned once the finer
+        bars cover it entirely.
+
+        :param base_asset: Base asset to select (e.g. BTC)
+        :type base_asset: str
+        :param quote_asset: Quote asset to select (e.g. USDT)
+        :type quote_asset: str
+        :param bar_subclass: time bar subclass to build (e.g. 15min, 1h, D)
+        :type bar_subclass: str
+        :param start_timestamp: The timestamp from which collect the bars
+        :type start_timestamp: int
+        :param source_bar_subclass: time bar subclass the bars are built
+                                    from, its duration must divide the one
+                                    of bar_subclass
+        :type source_bar_subclass: str
+        :param exchange: exchange name
+        :type exchange: str
+        :param end_timestamp: only return the bars before this timestamp
+        :type end_timestamp: int
+        :param max_workers: see get_bar_df
+        :type max_workers: int
+        :return: bar dataframe indexed like get_bar_df, with the ``id`` and
+                 ``bar_type_id`` columns set to -1
+        :rtype: pd.DataFrame
+        """
+        duration = bar_duration(bar_subclass)
+        if duration % bar_duration(source_bar_subclass):
+            raise ValueError(
+                f"{bar_subclass} bars cannot be built from "
+                f"{source_bar_subclass} bars"
             )
+        # read whole coarse bars, the bounds are applied once resampled
+        source_start = start_timestamp - start_timestamp % duration
+        source_end = None
+        if end_timestamp is not None:
+            source_end = end_timestamp - end_timestamp % duration
+            if source_end < end_timestamp:
+                source_end += duration
 
-            if not response.get("bars"):
-                continue
+        series, bar_params = self._series(
+            base_asset, quote_asset, "time", source_bar_subclass, exchange
+        )
+        self._update_series(series, bar_params, source_start, source_end, max_workers)
+        bars_df = resample_bars(
+            self.store.read(series, source_start, source_end),
+            bar_subclass,
+            source_bar_subclass,
+        )
+        return self._bar_df(_between(bars_df, start_timestamp, end_timestamp))
 
-            bars_df = pd.concat([bars_df, pd.DataFrame(response["bars"])], axis=0)
+    def check_bar_cache(
+        self,
+        base_asset: str,
+        quote_asset: str,
+        bar_type: str = "time",
+        bar_subclass: str = "D",
+        exchange: str = "binance",
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Check the cached bars of a series for holes and duplicates, without
+        querying the server. See check_bar_integrity for the issues found.
 
-            bars_df.drop_duplicates(
-                inplace=True, ignore_index=True, subset=["first_trade_id"]
+        :param base_asset: Base asset to select (e.g. BTC)
+        :type base_asset: str
+        :param quote_asset: Quote asset to select (e.g. USDT)
+        :type quote_asset: str
+        :param bar_type: bar type can be (e.g. tick, dollar, volume, time)
+        :type bar_type: str
+        :param bar_subclass: bar subclass specify the class of bar type
+                             to select (e.g. 1min, 3min, dynamic etc..)
+        :type bar_subclass: str
+        :param exchange: exchange name
+        :type exchange: str
+        :param start_timestamp: only check the bars from this timestamp
+        :type start_timestamp: int
+        :param end_timestamp: only check the bars before this timestamp
+        :type end_timestamp: int
+        :return: one row per issue, with the issue, the window
+                 [start_time, end_time) to download again and a count
+        :rtype: pd.DataFrame
+        """
+        series, _ = self._series(
+            base_asset, quote_asset, bar_type, bar_subclass, exchange
+        )
+        return self._check_series(series, start_timestamp, end_timestamp)
+
+    def _check_series(
+        self,
+        series: BarSeries,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None,
+    ) -> pd.DataFrame:
+        bars_df = self.store.read(
+            series,
+            start_timestamp,
+            end_timestamp,
+            columns=["first_trade_id", "last_trade_id"],
+        )
+        bar_subclass = series.bar_subclass if series.bar_type == "time" else None
+        return check_bar_integrity(bars_df, bar_subclass)
+
+    def repair_bar_cache(
+        self,
+        base_asset: str,
+        quote_asset: str,
+        bar_type: str = "time",
+        bar_subclass: str = "D",
+        exchange: str = "binance",
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None,
+        max_workers: int = 4,
+    ) -> pd.DataFrame:
+        """
+        Repair the holes and duplicates found by check_bar_cache: only the
+        windows around the issues are downloaded again, concurrently, and
+        replace the cached bars of those windows. The rest of the series is
+        left untouched. A window for which the server returns no bar is
+        left as it is (e.g. a time gap where nothing was traded).
+
+        :param base_asset: Base asset to select (e.g. BTC)
+        :type base_asset: str
+        :param quote_asset: Quote asset to select (e.g. USDT)
+        :type quote_asset: str
+        :param bar_type: bar type can be (e.g. tick, dollar, volume, time)
+        :type bar_type: str
+        :param bar_subclass: bar subclass specify the class of bar type
+                             to select (e.g. 1min, 3min, dynamic etc..)
+        :type bar_subclass: str
+        :param exchange: exchange name
+        :type exchange: str
+        :param start_timestamp: only repair the bars from this timestamp
+        :type start_timestamp: int
+        :param end_timestamp: only repair the bars before this timestamp
+        :type end_timestamp: int
+        :param max_workers: number of windows downloaded concurrently
+        :type max_workers: int
+        :return: the issues found before the repair, with a ``repaired``
+                 column telling whether the issue is gone
+        :rtype: pd.DataFrame
+        """
+        series, bar_params = self._series(
+            base_asset, quote_asset, bar_type, bar_subclass, exchange
+        )
+        with self.store.lock(series):
+            issues_df = self._check_series(series, start_timestamp, end_timestamp)
+            if issues_df.empty:
+                return issues_df.assign(repaired=pd.Series(dtype=bool))
+
+            windows = _merge_windows(
+                issues_df["start_time"].to_numpy(), issues_df["end_time"].to_numpy()
             )
-            timestamp = bars_df["time"].max()
-        bars_df.sort_values(by="time", inplace=True)
-        bars_df.to_csv(f"{directory}/{bar_subclass}_bar_data.csv", index=False)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                fetched = list(
+                    executor.map(
+                        lambda window: self._fetch_bars(bar_params, *window), windows
+                    )
+                )
+            for (window_start, window_end), bars_df in zip(windows, fetched):
+                if not bars_df.empty:
+                    self.store.replace(series, window_start, window_end, bars_df)
+
+            remaining_df = self._check_series(series, start_timestamp, end_timestamp)
+
+        remaining = set(zip(remaining_df["issue"], remaining_df["start_time"]))
+        issues_df["repaired"] = [
+            issue not in remaining
+            for issue in zip(issues_df["issue"], issues_df["start_time"])
+        ]
+        return issues_df
+
+    def get_bar_panel(
+        self,
+        pairs: List[Tuple[str, str]],
+        start_timestamp: int = 0,
+        bar_type: str = "time",
+        bar_subclass: str = "D",
+        exchange: str = "binance",
+        end_timestamp: Optional[int] = None,
+        max_workers: int = 8,
+        columns: Optional[List[str]] = None,
+        compact: bool = False,
+        float32: bool = False,
+        long: bool = False,
+        progress: Optional[Callable[[int, int, str], None]] = None,
+    ) -> pd.DataFrame:
+        """
+        Load the bars of many pairs at once, one get_bar_df per pair run
+        concurrently on max_workers threads, and align them in one
+        dataframe. Every series goes through the studio cache, so only the
+        bars missing from it are downloaded.
+
+        The threads share the client connection pool: create the Mizar
+        client with pool_size >= max_workers.
+
+        :param pairs: (base_asset, quote_asset) pairs, e.g. [("BTC", "USDT")]
+        :type pairs: List[Tuple[str, str]]
+        :param start_timestamp: The timestamp from which collect the bars
+        :type start_timestamp: int
+        :param bar_type: bar type can be (e.g. tick, dollar, volume, time),
+                         only time bars can be aligned in a wide dataframe,
+                         the other bar types need long
+        :type bar_type: str
+        :param bar_subclass: bar subclass specify the class of bar type
+                             to select (e.g. 1min, 3min, dynamic etc..)
+        :type bar_subclass: str
+        :param exchange: exchange name
+        :type exchange: str
+        :param end_timestamp: only return the bars before this timestamp
+        :type end_timestamp: int
+        :param max_workers: number of series loaded concurrently
+        :type max_workers: int
+        :param columns: see get_bar_df
+        :type columns: List[str]
+        :param compact: see get_bar_df
+        :type compact: bool
+        :param float32: see get_bar_df
+        :type float32: bool
+        :param long: return a long dataframe indexed by (symbol, time)
+                     instead of the wide dataframe indexed by time, with
+                     (symbol, column) columns, missing bars being NaN
+        :type long: bool
+        :param progress: called with the number of series done, the total
+                         number of series and the symbol done, after every
+                         series
+        :type progress: Callable[[int, int, str], None]
+        :return: bar panel. ``attrs["failures"]`` maps the symbols which
+                 could not be loaded to their error, and with compact
+                 ``attrs["constants"]`` maps every symbol to its constants
+        :rtype: pd.DataFrame
+        """
+        if bar_type != "time" and not long:
+            # several bars can share a timestamp, which cannot be aligned
+            raise ValueError(
+                f"{bar_type} bars cannot be aligned by time, use long=True"
+            )
+        options = dict(
+            start_timestamp=start_timestamp,
+            bar_type=bar_type,
+            bar_subclass=bar_subclass,
+            exchange=exchange,
+            end_timestamp=end_timestamp,
+            columns=columns,
+            compact=compact,
+            float32=float32,
+        )
+        frames = {}
+        failures = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    self.get_bar_df, base_asset, quote_asset, **options
+                ): f"{base_asset}{quote_asset}"
+                for base_asset, quote_asset in dict.fromkeys(pairs)
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                symbol = futures[future]
+                try:
+                    frames[symbol] = future.result()
+                except Exception as e:
+                    failures[symbol] = repr(e)
+                if progress is not None:
+                    progress(done, len(futures), symbol)
+
+        symbols = [
+            symbol
+            for symbol in dict.fromkeys(futures.values())
+            if symbol in frames and not frames[symbol].empty
+        ]
+        if not symbols:
+            panel_df = pd.DataFrame()
+        elif long:
+            panel_df = pd.concat(
+                [frames[symbol] for symbol in symbols],
+                keys=symbols,
+                names=["symbol", "time"],
+            )
+        else:
+            panel_df = pd.concat(
+                [frames[symbol] for symbol in symbols], axis=1, keys=symbols
+            )
+        panel_df.attrs = {"failures": failures}
+        if compact:
+            panel_df.attrs["constants"] = {
+                symbol: frames[symbol].attrs.get("constants", {}) for symbol in symbols
+            }
+        return panel_df
+
+    def tail(
+        self,
+        pairs: List[Tuple[str, str]],
+        bar_type: str = "time",
+        bar_subclass: str = "1min",
+        exchange: str = "binance",
+        callbacks: Optional[List[BarCallback]] = None,
+        **kwargs,
+    ) -> BarTailer:
+        """
+        Return a BarTailer following the new bars of the pairs, see
+        BarTailer for the options
+
+        :param pairs: (base_asset, quote_asset) pairs, e.g. [("BTC", "USDT")]
+        :type pairs: List[Tuple[str, str]]
+        :param bar_type: bar type can be (e.g. tick, dollar, volume, time)
+        :type bar_type: str
+        :param bar_subclass: bar subclass specify the class of bar type
+                             to select (e.g. 1min, 3min, dynamic etc..)
+        :type bar_subclass: str
+        :param exchange: exchange name
+        :type exchange: str
+        :param callbacks: called with the series and a dataframe of its new
+                          bars
+        :type callbacks: List[Callable[[BarSeries, pd.DataFrame], None]]
+        :return: tailer, iterate over it or start it
+        :rtype: BarTailer
+        """
+        return BarTailer(
+            self,
+            pairs,
+            bar_type=bar_type,
+            bar_subclass=bar_subclass,
+            exchange=exchange,
+            callbacks=callbacks,
+            **kwargs,
+        )
+
+    @staticmethod
+    def _bar_df(bars_df: pd.DataFrame) -> pd.DataFrame:
+        if bars_df.empty:
+            return bars_df
+        # older pandas cannot convert the read-only arrays of MemmapBarStore
         bars_df.set_index(
-            pd.to_datetime(bars_df["time"], unit="ms"), inplace=True, drop=True
+            pd.to_datetime(bars_df["time"].copy(), unit="ms"), inplace=True, drop=True
         )
         bars_df.set_index(bars_df.index.tz_localize(None), inplace=True, drop=True)
         bars_df.drop("time", axis=1, inplace=True)
         return bars_df
 
+    def iter_bar_frames(
+        self,
+        base_asset: str,
+        quote_asset: str,
+        start_timestamp: int = 0,
+        bar_type: str = "time",
+        bar_subclass: str = "D",
+        exchange: str = "binance",
+        end_timestamp: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream the bars from the server as dataframes, without going through
+        the cache. Only one chunk is held in memory at a time.
+
+        :param base_asset: Base asset to select (e.g. BTC)
+        :type base_asset: str
+        :param quote_asset: Quote asset to select (e.g. USDT)
+        :type quote_asset: str
+        :param start_timestamp: The timestamp from which collect the bars
+        :param exchange: exchange name
+        :type exchange: str
+        :param bar_type: bar type can be (e.g. tick, dollar, volume, time)
+        :type bar_type: str
+        :param bar_subclass: bar subclass specify the class of bar type
+                             to select (e.g. 1min, 3min, dynamic etc..)
+        :type bar_subclass: str
+        :param end_timestamp: stop before the bars at or after this timestamp
+        :type end_timestamp: int
+        :param chunk_size: number of bars per dataframe (the last one may be
+                           shorter). By default a dataframe is yielded per
+                           page received
+        :type chunk_size: int
+        :return: iterator over bar dataframes, indexed like get_bar_df
+        :rtype: Iterator[pd.DataFrame]
+        """
+        pages = self.mizar.iter_bars(
+            base_asset=base_asset.upper(),
+            quote_asset=quote_asset.upper(),
+            start_timestamp=start_timestamp,
+            end_timestamp=end_timestamp,
+            bar_type=bar_type,
+            bar_subclass=bar_subclass,
+            exchange=exchange,
+        )
+        if chunk_size is None:
+            for bars in pages:
+                yield self._bar_df(bars_to_frame(bars))
+            return
+
+        buffer = []
+        for bars in pages:
+            buffer.extend(bars)
+            while len(buffer) >= chunk_size:
+                yield self._bar_df(bars_to_frame(buffer[:chunk_size]))
+                buffer = buffer[chunk_size:]
+        if buffer:
+            yield self._bar_df(bars_to_frame(buffer))
+
+    def _fetch_bars(
+        self,
+        bar_params: Dict[str, str],
+        start_timestamp: int,
+        end_timestamp: Optional[int] = None,
+        first_page: Optional[List[Dict[str, Any]]] = None,
+    ) -> pd.DataFrame:
+        """
+        Paginate the bars from start_timestamp until the server runs out of
+        bars or, when given, until end_timestamp (excluded) is reached. When
+        the first page from start_timestamp was already requested, its bars
+        are used instead of requesting it again.
+        """
+        bars: List[Dict[str, Any]] = []
+        if first_page:
+            pagination = _BarPagination(start_timestamp, end_timestamp)
+            bars = pagination.new_bars(first_page)
+            if pagination.done:
+                return bars_to_frame(bars)
+            start_timestamp = pagination.timestamp
+        # the bars at the last timestamp of the first page come back
+        seen_trade_ids = {
+            bar["first_trade_id"] for bar in bars if bar["time"] == start_timestamp
+        }
+        bars.extend(
+            bar
+            for page in self.mizar.iter_bars(
+                start_timestamp=start_timestamp,
+                end_timestamp=end_timestamp,
+                **bar_params,
+            )
+            for bar in page
+            if bar["first_trade_id"] not in seen_trade_ids
+        )
+        return bars_to_frame(bars)
+
+    def _fetch_bars_parallel(
+        self,
+        bar_params: Dict[str, str],
+        start_timestamp: int,
+        max_workers: int,
+        window_size: Optional[int] = None,
+        end_timestamp: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Split the range between start_timestamp and end_timestamp (now by
+        default) into time windows, paginate every window concurrently and
+        stitch the windows back together in order. Without end_timestamp the
+        last window is left open so that bars published while downloading
+        are collected as well.
+        """
+        # the first page tells where the history actually begins
+        first_page = self.mizar.get_bar_data(
+            start_timestamp=start_timestamp, **bar_params
+        )
+        if not first_page.get("bars"):
+            return pd.DataFrame()
+
+        range_start = max(
+            start_timestamp, min(int(bar["time"]) for bar in first_page["bars"])
+        )
+        range_end = end_timestamp or int(time.time() * 1000)
+        if window_size is None:
+            window_size = max((range_end - range_start) // (max_workers * 4), 1)
+
+        boundaries: List[Optional[int]] = list(
+            range(range_start, range_end, window_size)
+        )[1:]
+        starts = [start_timestamp] + boundaries
+        ends = boundaries + [end_timestamp]
+
+        # the first window carries on from the first page
+        first_pages = [first_page["bars"]] + [None] * len(boundaries)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            windows = list(
+                executor.map(
+                    lambda window: self._fetch_bars(bar_params, *window),
+                    zip(starts, ends, first_pages),
+                )
+            )
+
+        windows = [window for window in windows if not window.empty]
+        if not windows:
+            return pd.DataFrame()
+        bars_df = pd.concat(windows, axis=0)
+        bars_df.drop_duplicates(
+            inplace=True, ignore_index=True, subset=["first_trade_id"]
+        )
+        return bars_df
+
     def save_strategy(
         self,
         strategy,
@@ -110,6 +781,6 @@ class MizarStudio:
             "take_profit_tick_level": strategy.take_profit_tick_level,
         }
 
-        self.mizar.save_strategy(
+        self.mizar.save_hosted_strategy(
             strategy=strategy, strategy_file=strategy_file, strategy_info=strategy_info
         )
@@ -0,0 +1,256 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import pandas as pd
+
+from mizar.api import _BarPagination
+from mizar.bars import bar_duration
+from mizar.bars import bars_to_frame
+from mizar.store import BarSeries
+
+BarCallback = Callable[[BarSeries, pd.DataFrame], None]
+
+
+class _TailState:
+    def __init__(self, series: BarSeries, bar_params: Dict[str, str]):
+        self.series = series
+        self.bar_params = bar_params
+        self.pagination: Optional[_BarPagination] = None
+        self.next_poll = 0.0
+        self.retry_delay = 0.0
+
+
+class BarTailer:
+    """
+    Follow the new bars of series, polling the bars endpoint from the last
+    cached bar of each series. New bars are appended to the studio store
+    (only the last partition is rewritten) and handed to the callbacks, or
+    yielded when iterating over the tailer.
+
+    Time bars are polled shortly after the expected close of their next
+    bar, other bars every poll_interval. When a poll returns nothing the
+    series is polled again after retry_interval, doubling up to the bar
+    duration (or poll_interval). A series whose poll, storage or callbacks
+    fail keeps the exception in ``errors`` and backs off the same way,
+    without stopping the other series.
+
+        tailer = studio.tail([("BTC", "USDT")], bar_subclass="1min")
+        for series, bars_df in tailer:
+            ...
+
+    or in a background thread:
+
+        tailer = studio.tail(pairs, bar_subclass="1min", callbacks=[on_bars])
+        tailer.start()
+        ...
+        tailer.stop()
+    """
+
+    def __init__(
+        self,
+        studio,
+        pairs: List[Tuple[str, str]],
+        bar_type: str = "time",
+        bar_subclass: str = "1min",
+        exchange: str = "binance",
+        callbacks: Optional[List[BarCallback]] = None,
+        start_timestamp: Optional[int] = None,
+        poll_interval: float = 5.0,
+        retry_interval: float = 1.0,
+        publish_delay: float = 1.0,
+        max_workers: int = 4,
+    ):
+        """
+        :param studio: studio whose store is kept up to date
+        :type studio: MizarStudio
+        :param pairs: (base_asset, quote_asset) pairs, e.g. [("BTC", "USDT")]
+        :type pairs: List[Tuple[str, str]]
+        :param bar_type: bar type can be (e.g. tick, dollar, volume, time)
+        :type bar_type: str
+        :param bar_subclass: bar subclass specify the class of bar type
+                             to select (e.g. 1min, 3min, dynamic etc..)
+        :type bar_subclass: str
+        :param exchange: exchange name
+        :type exchange: str
+        :param callbacks: called with the series and a dataframe of its new
+                          bars, indexed like get_bar_df
+        :type callbacks: List[Callable[[BarSeries, pd.DataFrame], None]]
+        :param start_timestamp: where to start the series not cached yet,
+                                now by default. Use get_bar_df first to
+                                backfill their history
+        :type start_timestamp: int
+        :param poll_interval: seconds between polls of the bars which are
+                              not time bars
+        :type poll_interval: float
+        :param retry_interval: seconds before polling again a series whose
+                               last poll returned no bar
+        :type retry_interval: float
+        :param publish_delay: seconds left to the server to publish a time
+                              bar after its close
+        :type publish_delay: float
+        :param max_workers: number of series polled concurrently
+        :type max_workers: int
+        """
+        self.studio = studio
+        self.callbacks = list(callbacks or [])
+        self.start_timestamp = start_timestamp
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self.publish_delay = publish_delay
+        self.max_workers = max_workers
+        self.errors: Dict[BarSeries, Exception] = {}
+        self._duration = bar_duration(bar_subclass) if bar_type == "time" else None
+        self._states = [
+            _TailState(
+                BarSeries(
+                    exchange, f"{base_asset}{quote_asset}", bar_type, bar_subclass
+                ),
+                dict(
+                    base_asset=base_asset.upper(),
+                    quote_asset=quote_asset.upper(),
+                    bar_type=bar_type,
+                    bar_subclass=bar_subclass,
+                    exchange=exchange,
+                ),
+            )
+            for base_asset, quote_asset in dict.fromkeys(pairs)
+        ]
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_callback(self, callback: BarCallback):
+        self.callbacks.append(callback)
+
+    def __iter__(self) -> Iterator[Tuple[BarSeries, pd.DataFrame]]:
+        """
+        Poll the series until stop is called, yielding every series with a
+        dataframe of its new bars once they are stored and the callbacks
+        were called.
+        """
+        self._stopped.clear()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while not self._stopped.is_set():
+                now = time.time()
+                due = [state for state in self._states if state.next_poll <= now]
+                for state, bars_df in executor.map(self._poll, due):
+                    if bars_df.empty:
+                        continue
+                    self._call_callbacks(state, bars_df)
+                    yield state.series, bars_df
+                next_poll = min(state.next_poll for state in self._states)
+                self._stopped.wait(max(next_poll - time.time(), 0.0))
+
+    def run(self):
+        """
+        Poll the series until stop is called, only calling the callbacks.
+        """
+        for _ in self:
+            pass
+
+    def start(self) -> "BarTailer":
+        """
+        Run the tailer in a background thread.
+        """
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop polling, waiting for the background thread when started.
+        """
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _pagination(self, state: _TailState) -> _BarPagination:
+        """
+        Resume from the last cached bar of the series, ignoring the cached
+        bars sharing its timestamp.
+        """
+        self.studio._migrate_legacy(state.series)
+        store = self.studio.store
+        timestamp = store.last_timestamp(state.series)
+        if timestamp is None:
+            if self.start_timestamp is not None:
+                return _BarPagination(self.start_timestamp)
+            return _BarPagination(int(time.time() * 1000))
+        seen = store.read(state.series, timestamp, columns=["first_trade_id"])
+        return _BarPagination(timestamp, seen_trade_ids=seen["first_trade_id"])
+
+    def _poll(self, state: _TailState) -> Tuple[_TailState, pd.DataFrame]:
+        bars = []
+        try:
+            if state.pagination is None:
+                state.pagination = self._pagination(state)
+            pagination = state.pagination
+            pagination.done = False
+            while not pagination.done:
+                response = self.studio.mizar.get_bar_data(
+                    start_timestamp=pagination.timestamp, **state.bar_params
+                )
+                bars.extend(pagination.new_bars(response.get("bars")))
+        except Exception as e:
+            # the pagination moved past the pages received, keep their bars
+            self.errors[state.series] = e
+            failed = True
+        else:
+            self.errors.pop(state.series, None)
+            failed = False
+
+        bars_df = bars_to_frame(bars)
+        if not bars_df.empty:
+            try:
+                with self.studio.store.lock(state.series):
+                    self.studio.store.append(state.series, bars_df)
+            except Exception as e:
+                # the bars are not stored, the next poll resumes from the
+                # last stored bar and fetches them again
+                self.errors[state.series] = e
+                state.pagination = None
+                bars_df = bars_to_frame([])
+                failed = True
+        self._schedule(state, not bars_df.empty and not failed)
+        return state, self.studio._bar_df(bars_df)
+
+    def _call_callbacks(self, state: _TailState, bars_df: pd.DataFrame):
+        """
+        Call every callback, a failing callback is reported in ``errors``
+        and backs off its series without stopping the tailer.
+        """
+        for callback in self.callbacks:
+            try:
+                callback(state.series, bars_df)
+            except Exception as e:
+                self.errors[state.series] = e
+                self._schedule(state, received=False)
+
+    def _schedule(self, state: _TailState, received: bool):
+        now = time.time()
+        if received:
+            state.retry_delay = 0.0
+            if self._duration is None:
+                state.next_poll = now + self.poll_interval
+                return
+            # the bar after the last one received closes two durations
+            # after the start of the last one
+            next_close = (state.pagination.timestamp + 2 * self._duration) / 1000
+            state.next_poll = max(next_close + self.publish_delay, now)
+            return
+
+        maximum_delay = (
+            self.poll_interval if self._duration is None else self._duration / 1000
+        )
+        state.retry_delay = min(
+            max(state.retry_delay * 2, self.retry_interval), maximum_delay
+        )
+        state.next_poll = now + state.retry_delay
@@ -0,0 +1,304 @@
+import gzip
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
+
+def make_bars(
+    num_bars: int, start_time: int = 1_514_764_800_000, step: int = 60_000
+) -> List[Dict[str, Any]]:
+    """
+    Return synthetic time bars with the schema of the bars endpoint.
+    """
+    bars = []
+    for i in range(num_bars):
+        price = 100.0 + (i % 1000) * 0.01
+        buy_volume = 1.0 + (i % 7)
+        sell_volume = 0.5 + (i % 5)
+        bars.append(
+            {
+                "id": i + 1,
+                "bar_type_id": 1,
+                "exchange_id": 1,
+                "base_asset_id": 184,
+                "quote_asset_id": 4,
+                "time": start_time + i * step,
+                "first_timestamp": start_time + i * step + 150,
+                "last_timestamp": start_time + (i + 1) * step - 150,
+                "first_trade_id": i * 20,
+                "last_trade_id": i * 20 + 19,
+                "num_ticks": 20,
+                "num_buy_ticks": 12,
+                "num_sell_ticks": 8,
+                "open": price,
+                "high": price + 0.5,
+                "low": price - 0.5,
+                "close": price + 0.1,
+                "base_asset_volume": buy_volume + sell_volume,
+                "base_asset_buy_volume": buy_volume,
+                "base_asset_sell_volume": sell_volume,
+                "quote_asset_volume": (buy_volume + sell_volume) * price,
+                "quote_asset_buy_volume": buy_volume * price,
+                "quote_asset_sell_volume": sell_volume * price,
+            }
+        )
+    return bars
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # the default backlog of 5 drops the connections of bursts of clients,
+    # which are only retried after a second
+    request_queue_size = 128
+
+
+class FakeMizarServer:
+    """
+    Local stand-in for the Mizar API, serving the endpoints used by the
+    clients from memory on a background thread.
+
+    latency is added to every request, and with a rate_limit (requests per
+    second) the requests above it are answered 429 with a Retry-After. With
+    compression, responses above 1KB are gzipped for the clients accepting
+    it. While unavailable is set, every request is answered 503 with an html
+    page, as a proxy in front of the API would.
+
+        with FakeMizarServer(bars=make_bars(10_000), latency=0.05) as server:
+            mizar = Mizar("api_key", scheme="http", host=server.host)
+    """
+
+    def __init__(
+        self,
+        bars: Optional[List[Dict[str, Any]]] = None,
+        page_limit: int = 500,
+        latency: float = 0.0,
+        rate_limit: Optional[float] = None,
+        compression: bool = False,
+    ):
+        self.bars = bars or []
+        self.compression = compression
+        self.sent_bytes = 0
+        self.page_limit = page_limit
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.throttled = 0
+        self.unavailable = False
+        self.uploaded_bytes = 0
+        self._window_start = time.monotonic()
+        self._window_requests = 0
+        self.positions: Dict[int, Dict[str, Any]] = {}
+        self.dca_bots: Dict[Tuple[int, str, str], Dict[str, Any]] = {}
+        self._position_ids = itertools.count(1)
+        self.requests: List[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._httpd = _HTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def host(self) -> str:
+        return "{}:{}".format(*self._httpd.server_address)
+
+    def start(self) -> "FakeMizarServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeMizarServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _throttle(self) -> bool:
+        # fixed one second windows, enough to trip naive clients
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_requests = 0
+            self._window_requests += 1
+            if self._window_requests > self.rate_limit:
+                self.throttled += 1
+                return True
+            return False
+
+    def handle(self, method: str, resource: str, params: Dict[str, str], body: Any):
+        """
+        Return the status code and the json payload of a request.
+        """
+        if resource == "ping":
+            return 200, {"message": "pong"}
+        if resource == "server-time":
+            return 200, {"server_time": int(time.time() * 1000)}
+        if resource == "exchanges":
+            return 200, {"exchanges": ["binance"]}
+        if resource == "symbols":
+            return 200, {"symbols": ["BTCUSDT", "ETHUSDT"]}
+        if resource == "bars":
+            start_timestamp = int(params.get("start_timestamp", 0))
+            limit = min(int(params.get("limit", self.page_limit)), self.page_limit)
+            page = [bar for bar in self.bars if bar["time"] >= start_timestamp]
+            return 200, {"bars": page[:limit]}
+        if resource == "open-position":
+            if body["size"] <= 0:
+                return 400, {"message": "size must be positive"}
+            with self._lock:
+                position_id = next(self._position_ids)
+                self.positions[position_id] = dict(body, position_id=position_id)
+            return 200, self.positions[position_id]
+        if resource == "close-position":
+            position = self.positions.pop(body["position_id"], None)
+            if position is None:
+                return 400, {"message": "position not found"}
+            return 200, position
+        if resource == "close-all-positions":
+            closed = [
+                self.positions.pop(position_id)
+                for position_id, position in list(self.positions.items())
+                if position["strategy_id"] == body["strategy_id"]
+            ]
+            return 200, {"closed_positions": closed}
+        if resource == "publish-hosted-strategy":
+            with self._lock:
+                self.uploaded_bytes += len(body)
+            return 200, {"message": "strategy saved"}
+        if resource == "all-open-positions":
+            strategy_id = int(params["strategy_id"])
+            return 200, {
+                "open_positions": [
+                    position
+                    for position in self.positions.values()
+                    if position["strategy_id"] == strategy_id
+                ]
+            }
+        if resource.startswith("dca-bots/"):
+            return self._handle_dca_bot(resource[len("dca-bots/") :], params or body)
+        return 404, {"message": f"{method} {resource} not found"}
+
+    def _handle_dca_bot(self, action: str, params: Dict[str, Any]):
+        key = (int(params["bot_id"]), params["base_asset"], params["quote_asset"])
+        with self._lock:
+            bot = self.dca_bots.setdefault(
+                key, {"position": None, "safety_orders_start_price": 100.0}
+            )
+        # five safety orders below the start price, the first two filled
+        safety_orders = [
+            {
+                "order_id": i,
+                "price": bot["safety_orders_start_price"] * (1 - 0.01 * (i + 1)),
+                "is_active": i >= 2,
+            }
+            for i in range(5)
+        ]
+        if action == "get-position":
+            return 200, {"position": bot["position"]}
+        if action == "get-safety-orders":
+            return 200, {"safety_orders": safety_orders}
+        if action == "get-active-safety-orders":
+            return 200, {
+                "safety_orders": [
+                    order for order in safety_orders if order["is_active"]
+                ]
+            }
+        if action == "get-inactive-safety-orders":
+            return 200, {
+                "safety_orders": [
+                    order for order in safety_orders if not order["is_active"]
+                ]
+            }
+        if action == "get-take-profit-orders":
+            return 200, {"take_profit_orders": [{"order_id": 10, "price": 110.0}]}
+        if action == "open-position":
+            bot["position"] = {"base_asset": key[1], "quote_asset": key[2]}
+            return 200, bot["position"]
+        if action == "close-position":
+            bot["position"] = None
+            return 200, {"message": "position closed"}
+        if action == "shift-safety-orders":
+            bot["safety_orders_start_price"] = params["safety_orders_start_price"]
+            return 200, {"message": "safety orders shifted"}
+        return 404, {"message": f"dca-bots/{action} not found"}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def _respond(self, method: str):
+                url = urlparse(self.path)
+                resource = url.path.split("/api/v1/", 1)[-1]
+                params = {
+                    key: values[-1] for key, values in parse_qs(url.query).items()
+                }
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    body = json.loads(body)
+
+                with server._lock:
+                    server.requests.append(resource)
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                headers = {}
+                content_type = "application/json"
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    if server.rate_limit and server._throttle():
+                        status, payload = 429, {"message": "too many requests"}
+                        headers["Retry-After"] = "1"
+                    else:
+                        status, payload = server.handle(method, resource, params, body)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+                if server.unavailable:
+                    status, content_type = 503, "text/html"
+                    content = b"<html><body>503 Service Unavailable</body></html>"
+                else:
+                    content = json.dumps(payload).encode()
+                if (
+                    server.compression
+                    and len(content) > 1024
+                    and "gzip" in self.headers.get("Accept-Encoding", "")
+                ):
+                    content = gzip.compress(content, compresslevel=6)
+                    headers["Content-Encoding"] = "gzip"
+                with server._lock:
+                    server.sent_bytes += len(content)
+                self.send_response(status)
+                for header, value in headers.items():
+                    self.send_header(header, value)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
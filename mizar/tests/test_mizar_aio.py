@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+import pytest
+
+from mizar.api import Mizar
+from mizar.api import MizarAPIException
+from mizar.tests.fake_server import FakeMizarServer
+
+aiohttp = pytest.importorskip("aiohttp")
+
+from mizar.aio import AsyncMizar  # noqa: E402
+
+
+@pytest.fixture()
+def server():
+    with FakeMizarServer(
+        bars=[{"time": i // 2, "first_trade_id": i} for i in range(25)], page_limit=4
+    ) as server:
+        yield server
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_async_ping(server):
+    async def _ping():
+        async with AsyncMizar("api_key", scheme="http", host=server.host) as mizar:
+            return await mizar.ping()
+
+    assert _run(_ping()) == {"message": "pong"}
+
+
+def test_async_api_exception(server):
+    async def _close_missing_position():
+        async with AsyncMizar("api_key", scheme="http", host=server.host) as mizar:
+            await mizar.close_position(42)
+
+    with pytest.raises(MizarAPIException):
+        _run(_close_missing_position())
+
+
+def test_async_iter_bars(server):
+    async def _iter_bars():
+        async with AsyncMizar("api_key", scheme="http", host=server.host) as mizar:
+            return [
+                page
+                async for page in mizar.iter_bars(base_asset="BTC", quote_asset="USDT")
+            ]
+
+    pages = _run(_iter_bars())
+    assert [bar["first_trade_id"] for page in pages for bar in page] == list(range(25))
+
+
+def test_async_concurrency_limit(server):
+    server.latency = 0.05
+
+    async def _open_positions():
+        async with AsyncMizar(
+            "api_key", scheme="http", host=server.host, max_concurrency=5
+        ) as mizar:
+            return await asyncio.gather(
+                *(
+                    mizar.open_position(1, "BTC", "USDT", size=0.1, is_long=True)
+                    for _ in range(20)
+                )
+            )
+
+    start = time.perf_counter()
+    positions = _run(_open_positions())
+    elapsed = time.perf_counter() - start
+
+    assert len({position["position_id"] for position in positions}) == 20
+    assert server.max_in_flight == 5
+    assert elapsed < 20 * server.latency
+
+
+def test_async_save_hosted_strategy(server):
+    async def _save():
+        async with AsyncMizar("api_key", scheme="http", host=server.host) as mizar:
+            await mizar.save_hosted_strategy([0.5] * 1_000, {"name": "strategy"})
+            await mizar.save_hosted_strategy([0.5] * 1_000, {"name": "strategy"})
+
+    _run(_save())
+    assert server.requests.count("publish-hosted-strategy") == 1
+    assert server.uploaded_bytes > 0
+
+
+def test_async_non_json_response_raises_like_sync(server):
+    mizar = Mizar("api_key", scheme="http", host=server.host)
+    server.unavailable = True
+
+    async def _get_exchanges():
+        async with AsyncMizar("api_key", scheme="http", host=server.host) as mizar:
+            return await mizar.get_exchanges()
+
+    with pytest.raises(ValueError) as sync_error:
+        mizar.get_exchanges()
+    with pytest.raises(ValueError) as async_error:
+        _run(_get_exchanges())
+    assert not isinstance(sync_error.value, MizarAPIException)
+    assert not isinstance(async_error.value, MizarAPIException)
@@ -1,10 +1,18 @@
+import email
+import hashlib
+import lzma
 import os
+import subprocess
+import sys
 
+import dill
 import pytest
 import requests_mock
 
+from mizar.api import _compress_strategy
 from mizar.api import Mizar
 from mizar.api import MizarAPIException
+from mizar.api import StrategySizeExceededLimit
 
 
 @pytest.fixture()
@@ -48,3 +56,138 @@ def test_ping_working(client):
             status_code=200,
         )
         client.ping()
+
+
+@pytest.fixture()
+def mocked_client():
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/ping", json={"message": "pong"})
+        return Mizar("api_key")
+
+
+def _paginated_bars(bars, limit):
+    def _callback(request, context):
+        start_timestamp = int(request.qs["start_timestamp"][0])
+        return {"bars": [bar for bar in bars if bar["time"] >= start_timestamp][:limit]}
+
+    return _callback
+
+
+def test_iter_bars_dedups_overlapping_pages(mocked_client):
+    # two bars per timestamp, so every page overlaps with the previous one
+    bars = [{"time": i // 2, "first_trade_id": i} for i in range(25)]
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/bars", json=_paginated_bars(bars, 4))
+        pages = list(mocked_client.iter_bars(base_asset="BTC", quote_asset="USDT"))
+
+    assert [bar["first_trade_id"] for page in pages for bar in page] == list(range(25))
+    assert all(len(page) <= 4 for page in pages)
+
+
+def test_iter_bars_stops_at_end_timestamp(mocked_client):
+    bars = [{"time": i, "first_trade_id": i} for i in range(100)]
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/bars", json=_paginated_bars(bars, 10))
+        pages = list(
+            mocked_client.iter_bars(
+                base_asset="BTC",
+                quote_asset="USDT",
+                start_timestamp=5,
+                end_timestamp=32,
+            )
+        )
+        assert m.call_count == 3
+
+    assert [bar["time"] for page in pages for bar in page] == list(range(5, 32))
+
+
+def test_import_does_not_load_heavy_dependencies():
+    code = (
+        "import sys; import mizar; mizar.Mizar; "
+        "print(sorted({'pandas', 'numpy', 'dill', 'aiohttp'} & set(sys.modules)))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, stdout=subprocess.PIPE
+    ).stdout
+    assert output.decode().strip() == "[]"
+
+
+def test_lazy_studio_import():
+    import mizar
+    from mizar.studio import MizarStudio
+
+    assert mizar.MizarStudio is MizarStudio
+
+
+def test_skip_connection_check():
+    with requests_mock.mock() as m:
+        Mizar("api_key", check_connection=False)
+        assert m.call_count == 0
+
+
+def _uploaded_strategy(request):
+    content_type = request.headers["Content-Type"]
+    message = email.message_from_bytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + request.body
+    )
+    return {
+        part.get_param("name", header="content-disposition"): part.get_payload(
+            decode=True
+        )
+        for part in message.get_payload()
+    }
+
+
+@pytest.mark.parametrize("zstandard", [True, False])
+def test_save_hosted_strategy_compressed_upload(mocked_client, monkeypatch, zstandard):
+    if not zstandard:
+        monkeypatch.setitem(sys.modules, "zstandard", None)
+    strategy = {"weights": [0.5] * 100_000}
+    with requests_mock.mock() as m:
+        m.post("https://api.mizar.ai/api/v1/publish-hosted-strategy", json={})
+        mocked_client.save_hosted_strategy(strategy, {"name": "strategy"})
+        fields = _uploaded_strategy(m.last_request)
+
+    encoding = fields["strategy-encoding"].decode()
+    assert encoding == ("zstd" if zstandard else "xz")
+    if encoding == "xz":
+        pickled_strategy = lzma.decompress(fields["strategy"])
+    else:
+        decompressor = pytest.importorskip("zstandard").ZstdDecompressor()
+        pickled_strategy = decompressor.decompressobj().decompress(fields["strategy"])
+    assert len(fields["strategy"]) < len(pickled_strategy) / 10
+    assert dill.loads(pickled_strategy) == strategy
+    assert (
+        fields["strategy-sha256"].decode()
+        == hashlib.sha256(pickled_strategy).hexdigest()
+    )
+
+
+def test_save_hosted_strategy_skips_unchanged_upload(mocked_client, monkeypatch):
+    compressed = []
+    monkeypatch.setattr(
+        "mizar.api._compress_strategy",
+        lambda strategy: compressed.append(strategy) or _compress_strategy(strategy),
+    )
+    with requests_mock.mock() as m:
+        m.post("https://api.mizar.ai/api/v1/publish-hosted-strategy", json={"id": 1})
+        assert mocked_client.save_hosted_strategy([1, 2], {"name": "a"}) == {"id": 1}
+        assert mocked_client.save_hosted_strategy([1, 2], {"name": "a"}) == {"id": 1}
+        assert m.call_count == 1
+        assert len(compressed) == 1
+
+        mocked_client.save_hosted_strategy([1, 2, 3], {"name": "a"})
+        mocked_client.save_hosted_strategy([1, 2, 3], {"name": "a"}, force=True)
+        assert m.call_count == 3
+
+    # only the last upload of a name is kept
+    assert list(mocked_client._uploaded_strategies) == ["a"]
+
+
+def test_save_hosted_strategy_size_limit_on_compressed_size(mocked_client, monkeypatch):
+    monkeypatch.setattr("mizar.api.MAXIMUM_STRATEGY_SIZE", 0.01)
+    with requests_mock.mock() as m:
+        m.post("https://api.mizar.ai/api/v1/publish-hosted-strategy", json={})
+        mocked_client.save_hosted_strategy(b"0" * 1_000_000, {"name": "a"})
+        with pytest.raises(StrategySizeExceededLimit):
+            mocked_client.save_hosted_strategy(os.urandom(100_000), {"name": "a"})
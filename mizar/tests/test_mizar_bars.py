@@ -0,0 +1,166 @@
+import json
+
+import pandas as pd
+import pytest
+
+from mizar.api import _json_loads
+from mizar.bars import _typed
+from mizar.bars import bar_duration
+from mizar.bars import BAR_DTYPE
+from mizar.bars import BAR_DTYPES
+from mizar.bars import bars_to_array
+from mizar.bars import bars_to_frame
+from mizar.bars import check_bar_integrity
+from mizar.bars import compact_bars
+from mizar.bars import compare_bars
+from mizar.bars import resample_bars
+from mizar.tests.fake_server import make_bars
+
+
+def test_bars_to_array_has_the_bar_schema():
+    bars = make_bars(10)
+
+    array = bars_to_array(bars)
+
+    assert array.dtype == BAR_DTYPE
+    assert array["time"].tolist() == [bar["time"] for bar in bars]
+    assert array["close"].tolist() == [bar["close"] for bar in bars]
+
+
+def test_bars_to_frame_matches_generic_conversion():
+    bars = _json_loads(json.dumps({"bars": make_bars(1_000)}))["bars"]
+
+    bars_df = bars_to_frame(bars)
+
+    pd.testing.assert_frame_equal(bars_df, _typed(pd.DataFrame(bars)))
+    assert bars_df.dtypes.astype(str).to_dict() == BAR_DTYPES
+
+
+def test_bars_to_frame_keeps_extra_fields():
+    bars = make_bars(100)
+    for bar in bars:
+        bar["vwap"] = bar["close"]
+    bars[10]["flag"] = "halted"
+
+    bars_df = bars_to_frame(bars)
+
+    pd.testing.assert_frame_equal(bars_df, _typed(pd.DataFrame(bars)))
+    assert list(bars_df.columns[-2:]) == ["vwap", "flag"]
+
+
+def test_bars_to_frame_falls_back_on_partial_bars():
+    bars = [{"time": 1, "close": 2.0}, {"time": 2, "close": None}]
+
+    bars_df = bars_to_frame(bars)
+
+    assert bars_df["time"].tolist() == [1, 2]
+    assert bars_df["close"].isna().tolist() == [False, True]
+
+
+def test_bars_to_frame_without_bars():
+    assert bars_to_frame([]).empty
+
+
+def test_compact_bars_keeps_varying_ids_as_categoricals():
+    bars = make_bars(10)
+    bars[0]["base_asset_id"] = 1
+    bars_df = bars_to_frame(bars)
+
+    compact_df = compact_bars(bars_df)
+
+    assert compact_df["base_asset_id"].dtype == "category"
+    assert compact_df.attrs["constants"] == {
+        "bar_type_id": 1,
+        "exchange_id": 1,
+        "quote_asset_id": 4,
+    }
+    assert compact_df["first_trade_id"].tolist() == bars_df["first_trade_id"].tolist()
+    assert compact_df["close"].dtype == "float64"
+
+
+def _server_bars(bars, size):
+    """
+    Coarse bars aggregated bar by bar, as the server builds them.
+    """
+    coarse_bars = []
+    for start in range(0, len(bars), size):
+        group = bars[start : start + size]
+        coarse_bar = {
+            "time": group[0]["time"],
+            "open": group[0]["open"],
+            "high": max(bar["high"] for bar in group),
+            "low": min(bar["low"] for bar in group),
+            "close": group[-1]["close"],
+            "first_timestamp": group[0]["first_timestamp"],
+            "last_timestamp": group[-1]["last_timestamp"],
+            "first_trade_id": group[0]["first_trade_id"],
+            "last_trade_id": group[-1]["last_trade_id"],
+        }
+        for column in (
+            "num_ticks",
+            "num_buy_ticks",
+            "num_sell_ticks",
+            "base_asset_volume",
+            "base_asset_buy_volume",
+            "base_asset_sell_volume",
+            "quote_asset_volume",
+            "quote_asset_buy_volume",
+            "quote_asset_sell_volume",
+        ):
+            coarse_bar[column] = sum(bar[column] for bar in group)
+        coarse_bars.append(coarse_bar)
+    return pd.DataFrame(coarse_bars)
+
+
+def test_resample_bars_matches_server_bars():
+    bars = make_bars(600)
+
+    resampled_df = resample_bars(bars_to_frame(bars), "15min")
+
+    assert list(resampled_df.columns) == list(BAR_DTYPES)
+    assert resampled_df.shape[0] == 40
+    assert (resampled_df["id"] == -1).all()
+    assert compare_bars(resampled_df, _server_bars(bars, 15)).empty
+
+
+def test_resample_bars_drops_incomplete_last_bar():
+    bars_df = bars_to_frame(make_bars(12))
+
+    assert resample_bars(bars_df, "5min").shape[0] == 3
+    assert resample_bars(bars_df, "5min", "1min").shape[0] == 2
+    assert resample_bars(bars_df.iloc[:10], "5min", "1min").shape[0] == 2
+
+
+def test_compare_bars_reports_mismatches():
+    bars = make_bars(10)
+    reference_df = _server_bars(bars, 5)
+    reference_df.loc[1, "high"] += 1.0
+
+    mismatches = compare_bars(resample_bars(bars_to_frame(bars), "5min"), reference_df)
+
+    assert mismatches[["time", "column"]].values.tolist() == [[bars[5]["time"], "high"]]
+
+
+def test_bar_duration():
+    assert bar_duration("1min") == 60_000
+    assert bar_duration("D") == 86_400_000
+    for bar_subclass in ("dynamic", "1W", "7min"):
+        with pytest.raises(ValueError):
+            bar_duration(bar_subclass)
+
+
+def test_check_bar_integrity():
+    bars = make_bars(20)
+    bars_df = bars_to_frame(bars[:5] + bars[8:12] + bars[11:])
+    bars_df.loc[15, "first_trade_id"] += 3
+
+    issues_df = check_bar_integrity(bars_df, "1min")
+
+    assert issues_df.values.tolist() == [
+        ["trade_gap", bars[4]["time"], bars[8]["time"] + 1, 60],
+        ["time_gap", bars[5]["time"], bars[8]["time"], 3],
+        ["duplicate", bars[11]["time"], bars[11]["time"] + 1, 1],
+        ["trade_gap", bars[16]["time"], bars[17]["time"] + 1, 3],
+    ]
+    assert check_bar_integrity(bars_to_frame(bars), "1min").empty
+    assert check_bar_integrity(bars_df.iloc[:5]).empty
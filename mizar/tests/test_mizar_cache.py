@@ -0,0 +1,103 @@
+import os
+
+import pytest
+import requests_mock
+
+from mizar.api import Mizar
+from mizar.cache import ResponseCache
+
+CACHE_FILE = "./mizar_cache_test.json"
+
+
+@pytest.fixture()
+def cache_file():
+    try:
+        yield CACHE_FILE
+    finally:
+        if os.path.isfile(CACHE_FILE):
+            os.remove(CACHE_FILE)
+
+
+def _client(cache):
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/ping", json={"message": "pong"})
+        return Mizar("api_key", cache=cache)
+
+
+def test_cached_reference_endpoints():
+    client = _client(ResponseCache())
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/symbols", json={"symbols": ["BTCUSDT"]})
+        assert client.get_symbols("binance") == {"symbols": ["BTCUSDT"]}
+        assert client.get_symbols("binance") == {"symbols": ["BTCUSDT"]}
+        client.get_symbols("binance", market="futures")
+        assert m.call_count == 2
+
+    assert client.cache.stats()["hits"] == 1
+    assert client.cache.stats()["misses"] == 2
+
+
+def test_cache_returns_copies():
+    client = _client(ResponseCache())
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/exchanges", json={"exchanges": ["binance"]})
+        client.get_exchanges()["exchanges"].append("ftx")
+        assert client.get_exchanges() == {"exchanges": ["binance"]}
+
+
+def test_cache_expiry_and_invalidation():
+    cache = ResponseCache(ttls={"exchanges": 1e-9})
+    client = _client(cache)
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/exchanges", json={})
+        m.get("https://api.mizar.ai/api/v1/server-time", json={})
+        client.get_exchanges()
+        client.get_exchanges()
+        assert m.call_count == 2
+
+        client.server_time()
+        cache.invalidate("server-time")
+        client.server_time()
+        assert m.call_count == 4
+
+
+def test_cache_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    cache.set("symbols", {"exchange": "a"}, [])
+    cache.set("symbols", {"exchange": "b"}, [])
+    cache.get("symbols", {"exchange": "a"})
+    cache.set("symbols", {"exchange": "c"}, [])
+
+    assert cache.get("symbols", {"exchange": "a"})[0]
+    assert not cache.get("symbols", {"exchange": "b"})[0]
+
+    cache = ResponseCache(max_bytes=30)
+    cache.set("symbols", {"exchange": "a"}, ["x" * 20])
+    cache.set("symbols", {"exchange": "b"}, ["x" * 20])
+    assert cache.stats()["entries"] == 1
+
+
+def test_cache_persistence(cache_file):
+    cache = ResponseCache(path=cache_file)
+    cache.set("exchanges", None, {"exchanges": ["binance"]})
+
+    assert ResponseCache(path=cache_file).get("exchanges") == (
+        True,
+        {"exchanges": ["binance"]},
+    )
+
+
+def test_cache_saves_at_most_every_interval(cache_file):
+    cache = ResponseCache(path=cache_file, save_interval=3600.0)
+    cache.set("exchanges", None, {"exchanges": ["binance"]})
+    for i in range(100):
+        cache.set("server-time", None, {"server_time": i})
+
+    assert not ResponseCache(path=cache_file).get("server-time")[0]
+
+    cache.close()
+
+    assert ResponseCache(path=cache_file).get("server-time") == (
+        True,
+        {"server_time": 99},
+    )
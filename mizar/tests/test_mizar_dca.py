@@ -0,0 +1,81 @@
+from mizar.api import Mizar
+from mizar.dca import DcaBotState
+from mizar.dca import refresh_dca_bot_states
+from mizar.tests.fake_server import FakeMizarServer
+
+DCA_REQUESTS = {
+    "dca-bots/get-position",
+    "dca-bots/get-safety-orders",
+    "dca-bots/get-active-safety-orders",
+    "dca-bots/get-inactive-safety-orders",
+    "dca-bots/get-take-profit-orders",
+}
+
+
+def _client(server):
+    return Mizar("api_key", scheme="http", host=server.host, check_connection=False)
+
+
+def test_take_profit_orders_endpoint():
+    with FakeMizarServer() as server:
+        orders = _client(server).get_dca_bot_take_profit_orders(1, "BTC", "USDT")
+
+    assert server.requests == ["dca-bots/get-take-profit-orders"]
+    assert orders == {"take_profit_orders": [{"order_id": 10, "price": 110.0}]}
+
+
+def test_dca_bot_state_refreshes_after_mutations_only():
+    with FakeMizarServer() as server:
+        state = DcaBotState(_client(server), 1, "BTC", "USDT").refresh()
+        assert set(server.requests) == DCA_REQUESTS
+
+        server.requests.clear()
+        state.refresh()
+        assert server.requests == []
+
+        state.shift_safety_orders(200.0)
+        state.refresh()
+        assert sorted(server.requests) == [
+            "dca-bots/get-active-safety-orders",
+            "dca-bots/get-inactive-safety-orders",
+            "dca-bots/get-safety-orders",
+            "dca-bots/shift-safety-orders",
+        ]
+
+        server.requests.clear()
+        state.open_position(take_profit_pct=0.02)
+        state.refresh()
+        assert len(server.requests) == 6
+
+    assert state.position == {"position": {"base_asset": "BTC", "quote_asset": "USDT"}}
+    assert state.safety_orders["safety_orders"][0]["price"] == 198.0
+    assert len(state.active_safety_orders) == 3
+
+
+def test_dca_bot_state_derives_active_safety_orders():
+    with FakeMizarServer() as server:
+        mizar = _client(server)
+        fetched = DcaBotState(mizar, 1, "BTC", "USDT").refresh()
+        server.requests.clear()
+        derived = DcaBotState(
+            mizar, 1, "BTC", "USDT", is_active=lambda order: order["is_active"]
+        ).refresh()
+
+    assert len(server.requests) == 3
+    assert isinstance(fetched.active_safety_orders, list)
+    assert derived.active_safety_orders == fetched.active_safety_orders
+    assert derived.inactive_safety_orders == fetched.inactive_safety_orders
+
+
+def test_refresh_dca_bot_states_keeps_errors():
+    with FakeMizarServer(latency=0.05) as server:
+        mizar = _client(server)
+        states = [DcaBotState(mizar, bot_id, "BTC", "USDT") for bot_id in range(20)]
+        states.append(DcaBotState(mizar, "unknown", "BTC", "USDT"))
+
+        requests = refresh_dca_bot_states(states, max_workers=10)
+
+    assert requests == 21 * 5
+    assert all(not state.errors for state in states[:-1])
+    assert set(states[-1].errors) == set(DcaBotState(mizar, 0, "", "").parts)
+    assert states[-1].stale() == states[-1].parts
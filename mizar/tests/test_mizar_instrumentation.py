@@ -0,0 +1,62 @@
+import io
+
+import pytest
+import requests
+import requests_mock
+
+from mizar.api import Mizar
+from mizar.api import MizarAPIException
+from mizar.instrumentation import LatencyHistogram
+from mizar.instrumentation import MetricsCollector
+from mizar.ratelimit import RetryPolicy
+
+
+def _client(**kwargs):
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/ping", json={"message": "pong"})
+        return Mizar("api_key", **kwargs)
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    for value in [0.001] * 90 + [1.0] * 10:
+        histogram.record(value)
+
+    assert histogram.percentile(50) <= 0.002
+    assert histogram.percentile(99) == 1.0
+    assert histogram.summary()["count"] == 100
+
+
+def test_metrics_collector(monkeypatch):
+    monkeypatch.setattr("mizar.api.time.sleep", lambda delay: None)
+    metrics = MetricsCollector()
+    client = _client(instrumentation=metrics, retry=RetryPolicy())
+    with requests_mock.mock() as m:
+        m.get(
+            "https://api.mizar.ai/api/v1/bars",
+            [{"status_code": 503, "json": {}}, {"json": {"bars": [{"id": 1}]}}],
+        )
+        m.post("https://api.mizar.ai/api/v1/close-position", status_code=400, json={})
+        m.get(
+            "https://api.mizar.ai/api/v1/exchanges",
+            exc=requests.exceptions.ConnectTimeout,
+        )
+        client.get_bar_data(base_asset="BTC", quote_asset="USDT")
+        with pytest.raises(MizarAPIException):
+            client.close_position(1)
+        client.retry = None
+        with pytest.raises(requests.exceptions.ConnectTimeout):
+            client.get_exchanges()
+
+    summary = metrics.summary()
+    assert summary["GET bars"]["status_codes"] == {503: 1, 200: 1}
+    assert summary["GET bars"]["retries"] == 1
+    assert summary["GET bars"]["bytes_received"] == len('{"bars": [{"id": 1}]}') + 2
+    assert summary["GET bars"]["decode"]["count"] == 1
+    assert summary["POST close-position"]["bytes_sent"] == len('{"position_id": 1}')
+    assert summary["POST close-position"]["status_codes"] == {400: 1}
+    assert summary["GET exchanges"]["errors"] == 1
+
+    output = io.StringIO()
+    metrics.dump(output)
+    assert "GET bars" in output.getvalue()
@@ -0,0 +1,93 @@
+import time
+
+from mizar.api import Mizar
+from mizar.tests.fake_server import FakeMizarServer
+
+
+def _client(server, **kwargs):
+    return Mizar(
+        "api_key", scheme="http", host=server.host, check_connection=False, **kwargs
+    )
+
+
+def test_ledger_follows_the_orders_of_the_client():
+    with FakeMizarServer() as server:
+        mizar = _client(server, position_ledger=True)
+        btc = mizar.open_position(1, "BTC", "USDT", size=0.1, is_long=True)
+        mizar.open_position(1, "ETH", "USDT", size=1.0, is_long=False)
+        mizar.open_position(2, "BTC", "USDT", size=0.2, is_long=True)
+
+        assert mizar.ledger.has_position(1, "BTC", "USDT")
+        assert mizar.ledger.get(1, "BTC", "USDT")[0]["size"] == 0.1
+        assert len(mizar.ledger.positions(1)) == 2
+
+        mizar.close_position(btc["position_id"])
+        assert not mizar.ledger.has_position(1, "BTC", "USDT")
+        assert mizar.ledger.position(btc["position_id"]) is None
+
+        mizar.close_all_positions(1)
+        assert mizar.ledger.positions(1) == []
+        assert len(mizar.ledger.positions(2)) == 1
+
+    assert "all-open-positions" not in server.requests
+
+
+def test_ledger_reconciliation_flags_drift():
+    drifts = []
+    with FakeMizarServer() as server:
+        mizar = _client(server, position_ledger=True)
+        mizar.ledger.on_drift = drifts.append
+        kept = mizar.open_position(1, "BTC", "USDT", size=0.1, is_long=True)
+        assert mizar.ledger.track(1) is None
+        assert mizar.ledger.synced(1)
+
+        closed = mizar.open_position(1, "ETH", "USDT", size=1.0, is_long=True)
+        del server.positions[closed["position_id"]]
+        unknown = _client(server).open_position(1, "SOL", "USDT", 3.0, True)
+
+        drift = mizar.ledger.reconcile(1)
+
+    assert drift.closed == [closed]
+    assert [position["position_id"] for position in drift.unknown] == [
+        unknown["position_id"]
+    ]
+    assert drifts == [drift]
+    assert {position["position_id"] for position in mizar.ledger.positions(1)} == {
+        kept["position_id"],
+        unknown["position_id"],
+    }
+    assert mizar.ledger.has_position(1, "SOL", "USDT")
+
+
+def test_reconciliation_skipped_when_orders_race_with_it():
+    with FakeMizarServer() as server:
+        mizar = _client(server, position_ledger=True)
+        mizar.ledger.track(1)
+        get_all_open_positions = mizar.get_all_open_positions
+
+        def racing_get_all_open_positions(strategy_id):
+            positions = get_all_open_positions(strategy_id)
+            mizar.open_position(1, "BTC", "USDT", size=0.1, is_long=True)
+            return positions
+
+        mizar.get_all_open_positions = racing_get_all_open_positions
+        assert mizar.ledger.reconcile(1) is None
+
+    assert mizar.ledger.has_position(1, "BTC", "USDT")
+    assert not mizar.ledger.drifts
+
+
+def test_ledger_background_reconciliation():
+    with FakeMizarServer() as server:
+        mizar = _client(server, position_ledger=True)
+        mizar.ledger.track(1)
+        _client(server).open_position(1, "BTC", "USDT", 0.1, True)
+
+        mizar.ledger.start(interval=0.05)
+        deadline = time.monotonic() + 5.0
+        while not mizar.ledger.drifts and time.monotonic() < deadline:
+            time.sleep(0.01)
+        mizar.ledger.stop()
+
+    assert mizar.ledger.has_position(1, "BTC", "USDT")
+    assert len(mizar.ledger.drifts[0].unknown) == 1
@@ -0,0 +1,87 @@
+from mizar.api import Mizar
+from mizar.api import MizarAPIException
+from mizar.tests.fake_server import FakeMizarServer
+
+
+def _orders(sizes):
+    return [
+        dict(
+            strategy_id=1, base_asset="BTC", quote_asset="USDT", size=size, is_long=True
+        )
+        for size in sizes
+    ]
+
+
+def _client(server, **kwargs):
+    return Mizar(
+        "api_key", scheme="http", host=server.host, check_connection=False, **kwargs
+    )
+
+
+def test_open_positions_sends_legs_concurrently():
+    with FakeMizarServer(latency=0.1) as server:
+        mizar = _client(server, pool_size=20)
+        result = mizar.open_positions(_orders([0.1] * 20), max_workers=20)
+
+        assert result.ok
+        assert len(server.positions) == 20
+        assert server.max_in_flight > 10
+        assert result.dispatch_latency < 0.1
+        assert result.elapsed < 1.0
+        closed = mizar.close_positions(
+            [response["position_id"] for response in result.responses]
+        )
+
+    assert closed.ok
+    assert not server.positions
+
+
+def test_open_positions_reports_failed_legs():
+    with FakeMizarServer() as server:
+        result = _client(server).open_positions(_orders([0.1, 0.0, 0.2]))
+
+    assert not result.ok
+    assert list(result.errors) == [1]
+    assert isinstance(result.errors[1], MizarAPIException)
+    assert [leg.ok for leg in result.legs] == [True, False, True]
+    assert not result.rolled_back
+    assert len(server.positions) == 2
+
+
+def test_open_positions_rollback_closes_opened_legs():
+    with FakeMizarServer(latency=0.05) as server:
+        result = _client(server).open_positions(
+            _orders([0.0, 0.1, 0.2, 0.3, 0.4, 0.5]), max_workers=2, rollback=True
+        )
+
+    assert result.rolled_back
+    assert not server.positions
+    opened = [leg for leg in result.legs if leg.ok]
+    assert opened and all(leg.rolled_back for leg in opened)
+    assert any(leg.cancelled for leg in result.legs)
+    assert server.requests.count("open-position") < 6
+
+
+def test_open_positions_rollback_without_position_id():
+    with FakeMizarServer() as server:
+        mizar = _client(server)
+
+        def open_position(size, **kwargs):
+            if not size:
+                raise MizarAPIException("size must be positive")
+            return {"id": 7}
+
+        mizar.open_position = open_position
+        result = mizar.open_positions(_orders([0.1, 0.0]), rollback=True)
+
+    assert result.rolled_back
+    assert not result.legs[0].rolled_back
+    assert isinstance(result.legs[0].rollback_error, LookupError)
+    assert "close-position" not in server.requests
+
+
+def test_close_positions_reports_unknown_positions():
+    with FakeMizarServer() as server:
+        result = _client(server).close_positions([42])
+
+    assert list(result.errors) == [0]
@@ -0,0 +1,112 @@
+import time
+
+import pytest
+import requests
+import requests_mock
+
+from mizar.api import Mizar
+from mizar.api import MizarAPIException
+from mizar.ratelimit import endpoint_group
+from mizar.ratelimit import parse_retry_after
+from mizar.ratelimit import RetryPolicy
+from mizar.ratelimit import TokenBucket
+
+
+@pytest.fixture()
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("mizar.api.time.sleep", sleeps.append)
+    return sleeps
+
+
+def _client(**kwargs):
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/ping", json={"message": "pong"})
+        return Mizar("api_key", **kwargs)
+
+
+def test_token_bucket_rate():
+    bucket = TokenBucket(rate=200, capacity=1)
+    start = time.perf_counter()
+    for _ in range(21):
+        bucket.acquire()
+    assert time.perf_counter() - start >= 0.09
+
+
+def test_token_bucket_pause():
+    bucket = TokenBucket(rate=1_000)
+    bucket.pause(0.05)
+    assert bucket.acquire() >= 0.04
+
+
+def test_endpoint_groups():
+    assert endpoint_group("bars") == "bars"
+    assert endpoint_group("open-position") == "orders"
+    assert endpoint_group("dca-bots/get-position") == "default"
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after(None) is None
+
+
+def test_retry_honors_retry_after(sleeps):
+    client = _client(retry=RetryPolicy(max_retries=3))
+    with requests_mock.mock() as m:
+        m.get(
+            "https://api.mizar.ai/api/v1/exchanges",
+            [
+                {"status_code": 429, "json": {}, "headers": {"Retry-After": "2"}},
+                {"status_code": 503, "json": {}},
+                {"status_code": 200, "json": {"exchanges": ["binance"]}},
+            ],
+        )
+        assert client.get_exchanges() == {"exchanges": ["binance"]}
+        assert m.call_count == 3
+
+    assert 2 <= sleeps[0] <= 2.1
+    assert sleeps[1] <= 1.0
+
+
+def test_retry_gives_up_after_max_retries(sleeps):
+    client = _client(retry=RetryPolicy(max_retries=2))
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/exchanges", status_code=502, json={})
+        with pytest.raises(MizarAPIException):
+            client.get_exchanges()
+        assert m.call_count == 3
+
+
+def test_open_position_not_retried_on_server_error(sleeps):
+    client = _client(retry=RetryPolicy())
+    with requests_mock.mock() as m:
+        m.post("https://api.mizar.ai/api/v1/open-position", status_code=500, json={})
+        with pytest.raises(MizarAPIException):
+            client.open_position(1, "BTC", "USDT", size=1, is_long=True)
+        assert m.call_count == 1
+
+        m.post(
+            "https://api.mizar.ai/api/v1/open-position",
+            exc=requests.exceptions.ReadTimeout,
+        )
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            client.open_position(1, "BTC", "USDT", size=1, is_long=True)
+        assert m.call_count == 2
+
+
+def test_open_position_retried_on_too_many_requests(sleeps):
+    bucket = TokenBucket(rate=1_000)
+    client = _client(retry=RetryPolicy(), rate_limits={"orders": bucket})
+    with requests_mock.mock() as m:
+        m.post(
+            "https://api.mizar.ai/api/v1/open-position",
+            [
+                {"status_code": 429, "json": {}, "headers": {"Retry-After": "0.05"}},
+                {"status_code": 200, "json": {"position_id": 1}},
+            ],
+        )
+        assert client.open_position(1, "BTC", "USDT", size=1, is_long=True) == {
+            "position_id": 1
+        }
+        assert m.call_count == 2
@@ -0,0 +1,143 @@
+import multiprocessing
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from mizar.api import Mizar
+from mizar.replay import replay_key
+from mizar.replay import ReplayMiss
+from mizar.replay import ReplayTransport
+from mizar.studio import MizarStudio
+from mizar.tests.fake_server import FakeMizarServer
+from mizar.tests.fake_server import make_bars
+
+REPLAY_PATH = "./mizar_replay_test"
+
+
+@pytest.fixture()
+def replay_path():
+    try:
+        yield REPLAY_PATH
+    finally:
+        shutil.rmtree(REPLAY_PATH, ignore_errors=True)
+
+
+def _session(mizar):
+    return [
+        mizar.get_exchanges(),
+        mizar.get_symbols("binance"),
+        mizar.get_bar_data(base_asset="BTC", quote_asset="USDT", start_timestamp=0),
+        mizar.open_position(1, "BTC", "USDT", 0.1, True),
+        mizar.get_all_open_positions(1),
+    ]
+
+
+def test_record_then_replay_offline(replay_path):
+    archive = os.path.join(replay_path, "session.jsonl.gz")
+    with FakeMizarServer(bars=make_bars(100)) as server:
+        transport = ReplayTransport(archive, record=True)
+        recorded = _session(
+            Mizar("api_key", scheme="http", host=server.host, transport=transport)
+        )
+        transport.close()
+
+    # served from the archive, nothing listens on the default host here
+    transport = ReplayTransport(archive)
+    replayed = _session(Mizar("api_key", transport=transport))
+
+    assert replayed == recorded
+    assert transport.hits == 6
+    assert transport.misses == 0
+    with pytest.raises(ReplayMiss):
+        Mizar("api_key", transport=transport).get_symbols("kraken")
+
+
+def test_replay_records_misses_when_not_strict(replay_path):
+    archive = os.path.join(replay_path, "session.jsonl.gz")
+    with FakeMizarServer() as server:
+        mizar = Mizar(
+            "api_key",
+            scheme="http",
+            host=server.host,
+            transport=ReplayTransport(archive, strict=False),
+        )
+        mizar.get_exchanges()
+        mizar.get_exchanges()
+        mizar.transport.close()
+
+    assert server.requests == ["ping", "exchanges"]
+    assert mizar.transport.hits == 1
+    assert ReplayTransport(archive).hits == 0
+    assert len(ReplayTransport(archive)._responses) == 2
+
+
+def _record_and_crash(host, archive):
+    transport = ReplayTransport(archive, record=True)
+    _session(Mizar("api_key", scheme="http", host=host, transport=transport))
+    os._exit(0)
+
+
+def test_replay_survives_an_interrupted_recording(replay_path):
+    archive = os.path.join(replay_path, "session.jsonl.gz")
+    with FakeMizarServer(bars=make_bars(100)) as server:
+        with ReplayTransport(archive, record=True) as transport:
+            Mizar("api_key", scheme="http", host=server.host, transport=transport)
+        crashed = multiprocessing.Process(
+            target=_record_and_crash, args=(server.host, archive)
+        )
+        crashed.start()
+        crashed.join(timeout=30)
+        with open(archive, "rb") as f:
+            complete = f.read()
+        # and a tail cut in the middle of an entry
+        with open(archive, "ab") as f:
+            f.write(complete[-40:-20])
+
+        with ReplayTransport(archive, strict=False) as transport:
+            mizar = Mizar(
+                "api_key", scheme="http", host=server.host, transport=transport
+            )
+            _session(mizar)
+            mizar.get_symbols("kraken")
+
+    assert crashed.exitcode == 0
+    assert transport.hits == 6
+    assert len(ReplayTransport(archive)._responses) == 7
+
+
+def test_studio_replay_is_identical(replay_path):
+    bars = make_bars(1_200)
+    end_timestamp = bars[-1]["time"] + 1
+    archive = os.path.join(replay_path, "bars.jsonl.gz")
+    with FakeMizarServer(bars=bars) as server:
+        transport = ReplayTransport(archive, record=True)
+        mizar = Mizar("api_key", scheme="http", host=server.host, transport=transport)
+        recorded_df = MizarStudio(mizar, path=f"{replay_path}/live").get_bar_df(
+            "BTC", "USDT", bar_subclass="1min", end_timestamp=end_timestamp
+        )
+        transport.close()
+
+    mizar = Mizar("api_key", transport=ReplayTransport(archive))
+    replayed_df = MizarStudio(mizar, path=f"{replay_path}/replay").get_bar_df(
+        "BTC", "USDT", bar_subclass="1min", end_timestamp=end_timestamp
+    )
+
+    pd.testing.assert_frame_equal(replayed_df, recorded_df)
+
+
+def test_replay_key_normalizes_params():
+    key = replay_key(
+        "get", "https://api.mizar.ai/api/v1/bars", params={"a": 1, "b": None, "c": "x"}
+    )
+
+    assert key == replay_key(
+        "GET", "http://localhost:8000/api/v1/bars", params={"c": "x", "a": "1"}
+    )
+    assert key != replay_key(
+        "GET", "http://localhost:8000/api/v1/bars", params={"c": "x", "a": "2"}
+    )
+    assert replay_key("POST", "/open-position", json={"a": 1, "b": 2}) == replay_key(
+        "POST", "/open-position", json={"b": 2, "a": 1}
+    )
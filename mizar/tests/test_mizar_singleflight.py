@@ -0,0 +1,79 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mizar.api import Mizar
+from mizar.singleflight import SingleFlight
+from mizar.tests.fake_server import FakeMizarServer
+from mizar.tests.fake_server import make_bars
+
+
+def test_concurrent_identical_requests_are_coalesced():
+    barrier = threading.Barrier(8)
+    with FakeMizarServer(bars=make_bars(100), latency=0.2) as server:
+        mizar = Mizar(
+            "api_key",
+            scheme="http",
+            host=server.host,
+            check_connection=False,
+            coalesce=True,
+        )
+
+        def get_bar_data(_):
+            barrier.wait()
+            return mizar.get_bar_data(base_asset="BTC", quote_asset="USDT")
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(executor.map(get_bar_data, range(8)))
+        requests = server.requests.count("bars")
+
+    assert requests == 1
+    assert mizar.singleflight.stats() == {"calls": 1, "saved": 7}
+    assert all(response == responses[0] for response in responses)
+    assert len({id(response) for response in responses}) == 8
+
+
+def test_requests_are_not_coalesced_by_default():
+    with FakeMizarServer(bars=make_bars(10), latency=0.05) as server:
+        mizar = Mizar("api_key", scheme="http", host=server.host)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: mizar.get_exchanges(), range(4)))
+
+    assert server.requests.count("exchanges") == 4
+    assert mizar.singleflight is None
+
+
+def test_threads_get_their_own_session_sharing_the_pool():
+    mizar = Mizar("api_key", check_connection=False)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        sessions = list(executor.map(lambda _: mizar.session, range(2)))
+
+    assert sessions[0] is not mizar.session
+    assert mizar.session is mizar.session
+    assert sessions[0].get_adapter("https://") is mizar.session.get_adapter("https://")
+
+
+def test_single_flight_shares_exceptions():
+    singleflight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait()
+        raise ValueError("failed")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(singleflight.do, "key", fail)
+        started.wait()
+        follower = executor.submit(singleflight.do, "key", fail)
+        while singleflight.saved == 0:
+            pass
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+    assert singleflight.do("key", lambda: 1) == 1
+    assert singleflight.stats() == {"calls": 2, "saved": 1}
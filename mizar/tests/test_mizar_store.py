@@ -0,0 +1,268 @@
+import mmap
+import multiprocessing
+import os
+import shutil
+import time
+
+import pandas as pd
+import pytest
+
+from mizar.api import Mizar
+from mizar.filelock import LockTimeout
+from mizar.store import BarSeries
+from mizar.store import BarStore
+from mizar.store import CsvBarStore
+from mizar.store import MemmapBarStore
+from mizar.store import migrate_csv_store
+from mizar.store import ParquetBarStore
+from mizar.studio import MizarStudio
+from mizar.tests.fake_server import FakeMizarServer
+from mizar.tests.fake_server import make_bars
+
+STORE_PATH = "./mizar_store_test"
+SERIES = BarSeries("binance", "BTCUSDT", "time", "1h")
+
+
+@pytest.fixture()
+def store_path():
+    try:
+        yield STORE_PATH
+    finally:
+        shutil.rmtree(STORE_PATH, ignore_errors=True)
+
+
+def _make_bars_df(num_bars, start_time=1_609_459_200_000, step=3_600_000):
+    return pd.DataFrame(
+        {
+            "id": range(num_bars),
+            "time": [start_time + i * step for i in range(num_bars)],
+            "open": [1.0 + i for i in range(num_bars)],
+            "close": [2.0 + i for i in range(num_bars)],
+            "first_trade_id": [i * 10 for i in range(num_bars)],
+            "last_trade_id": [i * 10 + 9 for i in range(num_bars)],
+        }
+    )
+
+
+def test_incomplete_store_cannot_be_created(store_path):
+    class ReadOnlyStore(BarStore):
+        def read(self, series, start_timestamp=None, end_timestamp=None, columns=None):
+            return pd.DataFrame()
+
+    with pytest.raises(TypeError):
+        ReadOnlyStore(store_path)
+
+
+def test_parquet_store_partitions_by_month(store_path):
+    store = ParquetBarStore(store_path)
+    store.append(SERIES, _make_bars_df(24 * 70))
+
+    directory = os.path.join(store_path, "bar/binance/BTCUSDT/time/1h")
+    partitions = sorted(f for f in os.listdir(directory) if f.endswith(".parquet"))
+    assert partitions == ["2021-01.parquet", "2021-02.parquet", "2021-03.parquet"]
+    assert store.read(SERIES).shape[0] == 24 * 70
+    assert store.last_timestamp(SERIES) == 1_609_459_200_000 + (24 * 70 - 1) * 3_600_000
+
+
+def test_parquet_store_append_only_rewrites_tail(store_path):
+    store = ParquetBarStore(store_path)
+    bars_df = _make_bars_df(24 * 70)
+    store.append(SERIES, bars_df.iloc[:1_000])
+    directory = os.path.join(store_path, "bar/binance/BTCUSDT/time/1h")
+    january_mtime = os.stat(os.path.join(directory, "2021-01.parquet")).st_mtime_ns
+
+    store.append(SERIES, bars_df.iloc[990:])
+
+    assert (
+        os.stat(os.path.join(directory, "2021-01.parquet")).st_mtime_ns == january_mtime
+    )
+    pd.testing.assert_frame_equal(store.read(SERIES), bars_df)
+
+
+def test_parquet_store_keeps_typed_columns(store_path):
+    store = ParquetBarStore(store_path)
+    bars_df = _make_bars_df(10)
+    bars_df["open"] = bars_df["open"].astype(str)
+    store.append(SERIES, bars_df)
+
+    assert store.read(SERIES)["open"].dtype == "float64"
+
+
+def test_migrate_csv_store(store_path):
+    csv_store = CsvBarStore(store_path)
+    csv_store.append(SERIES, _make_bars_df(100))
+    parquet_store = ParquetBarStore(store_path)
+
+    migrated = migrate_csv_store(csv_store, parquet_store, remove=True)
+
+    assert migrated == [SERIES]
+    assert csv_store.read(SERIES).empty
+    pd.testing.assert_frame_equal(parquet_store.read(SERIES), _make_bars_df(100))
+
+
+def test_parquet_store_range_read_uses_index(store_path, monkeypatch):
+    store = ParquetBarStore(store_path)
+    bars_df = _make_bars_df(24 * 70)
+    store.append(SERIES, bars_df)
+    opened = []
+    read_parquet = pd.read_parquet
+
+    def _read_parquet(file, *args, **kwargs):
+        opened.append(os.path.basename(file))
+        return read_parquet(file, *args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_parquet", _read_parquet)
+    start_timestamp = int(bars_df["time"].iloc[800])
+    end_timestamp = int(bars_df["time"].iloc[900])
+    range_df = store.read(SERIES, start_timestamp, end_timestamp)
+
+    assert opened == ["2021-02.parquet"]
+    pd.testing.assert_frame_equal(
+        range_df, bars_df.iloc[800:900].reset_index(drop=True)
+    )
+
+
+def test_parquet_store_rebuilds_missing_index(store_path):
+    store = ParquetBarStore(store_path)
+    store.append(SERIES, _make_bars_df(24 * 40))
+    index = store.index(SERIES)
+    os.remove(os.path.join(store_path, "bar/binance/BTCUSDT/time/1h/index.json"))
+
+    assert store.index(SERIES) == index
+
+
+@pytest.mark.parametrize("store_class", [CsvBarStore, ParquetBarStore, MemmapBarStore])
+def test_store_replace_window(store_path, store_class):
+    store = store_class(store_path)
+    bars_df = _make_bars_df(24 * 70)
+    store.append(SERIES, bars_df)
+    start_timestamp = int(bars_df["time"].iloc[700])
+    end_timestamp = int(bars_df["time"].iloc[24 * 60])
+
+    store.replace(SERIES, start_timestamp, end_timestamp, pd.DataFrame())
+    holed_df = store.read(SERIES)
+    store.replace(SERIES, start_timestamp, end_timestamp, bars_df.iloc[600:1500])
+
+    assert holed_df.shape[0] == 24 * 70 - (24 * 60 - 700)
+    assert store.last_timestamp(SERIES) == int(bars_df["time"].iloc[-1])
+    pd.testing.assert_frame_equal(store.read(SERIES), bars_df, check_dtype=False)
+    if store_class is ParquetBarStore:
+        assert set(store.index(SERIES)) == {"2021-01", "2021-02", "2021-03"}
+
+
+def _mapped(array):
+    while array is not None and not isinstance(array, mmap.mmap):
+        array = array.base
+    return array is not None
+
+
+def test_memmap_store_reads_without_copy(store_path):
+    store = MemmapBarStore(store_path)
+    bars_df = _make_bars_df(24 * 70)
+    store.append(SERIES, bars_df)
+    full_df = store.read(SERIES)
+    start_timestamp = int(bars_df["time"].iloc[800])
+    end_timestamp = int(bars_df["time"].iloc[900])
+    range_df = store.read(SERIES, start_timestamp, end_timestamp, columns=["close"])
+
+    pd.testing.assert_frame_equal(full_df, bars_df)
+    pd.testing.assert_frame_equal(
+        range_df, bars_df.loc[800:899, ["time", "close"]].reset_index(drop=True)
+    )
+    assert _mapped(full_df["close"].to_numpy())
+    assert _mapped(range_df["close"].to_numpy())
+    assert not range_df["close"].to_numpy().flags.writeable
+    assert store.list_series() == [SERIES]
+
+
+def test_memmap_store_appends_in_place(store_path, monkeypatch):
+    store = MemmapBarStore(store_path)
+    bars_df = _make_bars_df(24 * 70)
+    directory = os.path.join(store_path, "bar/binance/BTCUSDT/time/1h.mmap")
+    store.append(SERIES, bars_df.iloc[500:1_000])
+    time_inode = os.stat(os.path.join(directory, "0", "time.bin")).st_ino
+    read_rows = []
+    read = store.read
+
+    def _read(*args, **kwargs):
+        read_df = read(*args, **kwargs)
+        read_rows.append(read_df.shape[0])
+        return read_df
+
+    monkeypatch.setattr(store, "read", _read)
+    store.append(SERIES, bars_df.iloc[990:])
+    monkeypatch.undo()
+
+    # only the stored bars from the oldest new one are read
+    assert max(read_rows) == 10
+    assert os.stat(os.path.join(directory, "0", "time.bin")).st_ino == time_inode
+    assert store.last_timestamp(SERIES) == int(bars_df["time"].iloc[-1])
+
+    # older bars are merged into a new generation
+    store.append(SERIES, bars_df.iloc[:600])
+
+    assert sorted(os.listdir(directory)) == ["1", "meta.json"]
+    pd.testing.assert_frame_equal(store.read(SERIES), bars_df)
+
+
+def test_memmap_store_rejects_non_numeric_columns(store_path):
+    bars_df = _make_bars_df(10)
+    bars_df["symbol"] = "BTCUSDT"
+
+    with pytest.raises(ValueError):
+        MemmapBarStore(store_path).append(SERIES, bars_df)
+
+
+def test_studio_with_memmap_store(store_path):
+    bars = make_bars(1_200, start_time=(int(time.time()) // 60 - 1_200) * 60_000)
+    with FakeMizarServer(bars=bars) as server:
+        mizar = Mizar(
+            "api_key", scheme="http", host=server.host, check_connection=False
+        )
+        studio = MizarStudio(mizar, store=MemmapBarStore(store_path))
+        bars_df = studio.get_bar_df("BTC", "USDT", bar_subclass="1min")
+        cached_df = studio.get_bar_df("BTC", "USDT", bar_subclass="1min")
+
+    assert bars_df.shape[0] == 1_200
+    pd.testing.assert_frame_equal(cached_df, bars_df)
+
+
+def test_series_lock_excludes_other_writers(store_path):
+    store = ParquetBarStore(store_path, lock_timeout=0.1)
+
+    with store.lock(SERIES):
+        with pytest.raises(LockTimeout):
+            store.lock(SERIES).acquire()
+    with store.lock(SERIES):
+        store.mark_refreshed(SERIES, 1.5)
+
+    assert store.refreshed_at(SERIES) == 1.5
+    assert store.refreshed_at(SERIES._replace(bar_subclass="1d")) is None
+
+
+def _refresh_studio(host, path, barrier):
+    mizar = Mizar("api_key", scheme="http", host=host, check_connection=False)
+    barrier.wait()
+    MizarStudio(mizar, path=path).get_bar_df("BTC", "USDT", bar_subclass="1min")
+
+
+def test_concurrent_workers_download_once(store_path):
+    bars = make_bars(1_200, start_time=(int(time.time()) // 60 - 1_200) * 60_000)
+    barrier = multiprocessing.Barrier(4)
+    with FakeMizarServer(bars=bars, latency=0.05) as server:
+        workers = [
+            multiprocessing.Process(
+                target=_refresh_studio, args=(server.host, store_path, barrier)
+            )
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=30)
+
+    assert [worker.exitcode for worker in workers] == [0] * 4
+    # 3 pages of bars and the empty page ending the pagination
+    assert server.requests.count("bars") == 4
+    series = BarSeries("binance", "BTCUSDT", "time", "1min")
+    assert ParquetBarStore(store_path).read(series).shape[0] == 1_200
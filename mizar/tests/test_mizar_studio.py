@@ -1,11 +1,17 @@
 import os
 import shutil
+import time
 from functools import wraps
 
+import pandas as pd
 import pytest
+import requests_mock
 
 from mizar.api import Mizar
+from mizar.store import BarSeries
+from mizar.store import CsvBarStore
 from mizar.studio import MizarStudio
+from mizar.tests.fake_server import make_bars
 
 
 @pytest.fixture()
@@ -29,3 +35,286 @@ def delete_test_folder(f):
 @delete_test_folder
 def test_mizar_studio_folder_creation(mizar_studio):
     assert os.path.isdir("./mizar_studio_test")
+
+
+def _make_bars(num_bars, start_time=None, step=60_000):
+    if start_time is None:
+        start_time = (int(time.time()) // 60 - num_bars) * 60_000
+    return [
+        {
+            "id": i,
+            "time": start_time + i * step,
+            "open": 1.0 + i,
+            "high": 2.0 + i,
+            "low": 0.5 + i,
+            "close": 1.5 + i,
+            "first_trade_id": i * 10,
+            "last_trade_id": i * 10 + 9,
+        }
+        for i in range(num_bars)
+    ]
+
+
+def _paginate(bars, limit=50):
+    def _callback(request, context):
+        start_timestamp = int(request.qs["start_timestamp"][0])
+        page = [bar for bar in bars if bar["time"] >= start_timestamp][:limit]
+        return {"bars": page}
+
+    return _callback
+
+
+@pytest.fixture()
+def mocked_studio():
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/ping", json={"message": "pong"})
+        mizar = Mizar("api_key")
+    return MizarStudio(mizar, path="./mizar_studio_test")
+
+
+@delete_test_folder
+def test_get_bar_df_parallel_matches_sequential(mocked_studio):
+    bars = _make_bars(1_000)
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/bars", json=_paginate(bars))
+        sequential_df = mocked_studio.get_bar_df(
+            "BTC", "USDT", bar_subclass="1min", exchange="sequential"
+        )
+        parallel_df = mocked_studio.get_bar_df(
+            "BTC",
+            "USDT",
+            bar_subclass="1min",
+            exchange="parallel",
+            max_workers=4,
+            window_size=1_200_000,
+        )
+
+    assert sequential_df.shape[0] == 1_000
+    pd.testing.assert_frame_equal(sequential_df, parallel_df)
+
+
+@delete_test_folder
+def test_get_bar_df_parallel_reuses_first_page(mocked_studio):
+    bars = _make_bars(120)
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/bars", json=_paginate(bars))
+        bars_df = mocked_studio.get_bar_df(
+            "BTC", "USDT", bar_subclass="1min", max_workers=2, window_size=10**12
+        )
+        starts = [
+            int(request.qs["start_timestamp"][0]) for request in m.request_history
+        ]
+
+    assert bars_df["id"].tolist() == list(range(120))
+    # one window: the first page, then the pages from its last bars onwards
+    assert starts == [0, bars[49]["time"], bars[98]["time"], bars[119]["time"]]
+
+
+@delete_test_folder
+def test_get_bar_df_parallel_refreshes_cache(mocked_studio):
+    bars = _make_bars(300)
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/bars", json=_paginate(bars[:120]))
+        mocked_studio.get_bar_df("BTC", "USDT", bar_subclass="1min")
+        m.get("https://api.mizar.ai/api/v1/bars", json=_paginate(bars))
+        bars_df = mocked_studio.get_bar_df(
+            "BTC", "USDT", bar_subclass="1min", max_workers=3
+        )
+
+    assert bars_df.shape[0] == 300
+    assert bars_df["first_trade_id"].is_monotonic_increasing
+
+
+@delete_test_folder
+def test_get_bar_df_range_served_from_cache(mocked_studio):
+    bars = _make_bars(300)
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/bars", json=_paginate(bars))
+        mocked_studio.get_bar_df("BTC", "USDT", bar_subclass="1min")
+        calls = m.call_count
+        bars_df = mocked_studio.get_bar_df(
+            "BTC",
+            "USDT",
+            start_timestamp=bars[100]["time"],
+            end_timestamp=bars[110]["time"],
+            bar_subclass="1min",
+        )
+        assert m.call_count == calls
+
+    assert bars_df["id"].tolist() == list(range(100, 110))
+
+
+@delete_test_folder
+def test_get_bar_df_migrates_legacy_csv_cache(mocked_studio):
+    bars = _make_bars(300)
+    series = BarSeries("binance", "BTCUSDT", "time", "1min")
+    legacy_store = CsvBarStore(mocked_studio.path)
+    legacy_store.append(series, pd.DataFrame(bars[:250]))
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/bars", json=_paginate(bars))
+        bars_df = mocked_studio.get_bar_df("BTC", "USDT", bar_subclass="1min")
+        # only the bars after the legacy cache are downloaded
+        assert m.call_count == 3
+
+    assert bars_df["id"].tolist() == list(range(300))
+    assert legacy_store.read(series).empty
+    assert os.path.isfile(f"{legacy_store._file(series)}.migrated")
+
+
+@delete_test_folder
+def test_iter_bar_frames_fixed_size_chunks(mocked_studio):
+    bars = _make_bars(230)
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/bars", json=_paginate(bars))
+        frames = list(
+            mocked_studio.iter_bar_frames(
+                "BTC", "USDT", bar_subclass="1min", chunk_size=100
+            )
+        )
+
+    assert [frame.shape[0] for frame in frames] == [100, 100, 30]
+    assert pd.concat(frames)["id"].tolist() == list(range(230))
+    assert not os.path.isdir("./mizar_studio_test/bar")
+
+
+@delete_test_folder
+def test_get_bar_df_compact(mocked_studio):
+    bars = make_bars(500, start_time=(int(time.time()) // 60 - 500) * 60_000)
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/bars", json=_paginate(bars, limit=500))
+        bars_df = mocked_studio.get_bar_df("BTC", "USDT", bar_subclass="1min")
+        compact_df = mocked_studio.get_bar_df(
+            "BTC", "USDT", bar_subclass="1min", compact=True, float32=True
+        )
+        close_df = mocked_studio.get_bar_df(
+            "BTC", "USDT", bar_subclass="1min", columns=["close"]
+        )
+
+    assert "id" not in compact_df.columns
+    assert compact_df.attrs["constants"]["exchange_id"] == 1
+    assert compact_df["num_ticks"].dtype == "int8"
+    assert compact_df["close"].dtype == "float32"
+    memory_usage = compact_df.attrs["memory_usage"]
+    assert memory_usage["bytes"] < memory_usage["original_bytes"] / 2
+    pd.testing.assert_series_equal(close_df["close"], bars_df["close"])
+    assert list(close_df.columns) == ["close"]
+
+    with pytest.raises(ValueError):
+        mocked_studio.get_bar_df("BTC", "USDT", columns=["price"])
+
+
+@delete_test_folder
+def test_get_bar_panel(mocked_studio):
+    bars = _make_bars(120)
+
+    def _callback(request, context):
+        base_asset = request.qs["base_asset"][0].upper()
+        if base_asset == "LUNA":
+            context.status_code = 404
+            return {"error": "unknown symbol"}
+        offset = 0 if base_asset == "BTC" else 20
+        return _paginate(bars[offset:])(request, context)
+
+    progress = []
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/bars", json=_callback)
+        panel_df = mocked_studio.get_bar_panel(
+            [("BTC", "USDT"), ("ETH", "USDT"), ("LUNA", "USDT")],
+            bar_subclass="1min",
+            columns=["close"],
+            max_workers=3,
+            progress=lambda *args: progress.append(args),
+        )
+        long_df = mocked_studio.get_bar_panel(
+            [("BTC", "USDT"), ("ETH", "USDT")], bar_subclass="1min", long=True
+        )
+
+    assert list(panel_df.columns) == [("BTCUSDT", "close"), ("ETHUSDT", "close")]
+    assert panel_df.shape[0] == 120
+    assert panel_df[("ETHUSDT", "close")].isna().sum() == 20
+    assert list(panel_df.attrs["failures"]) == ["LUNAUSDT"]
+    assert sorted(done for done, _, _ in progress) == [1, 2, 3]
+    assert long_df.loc["ETHUSDT"].shape[0] == 100
+    assert long_df.index.names == ["symbol", "time"]
+
+
+@delete_test_folder
+def test_get_bar_panel_non_time_bars(mocked_studio):
+    # two tick bars per timestamp
+    bars = _make_bars(40, step=30_000)
+    for bar in bars:
+        bar["time"] -= bar["time"] % 60_000
+
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/bars", json=_paginate(bars))
+        with pytest.raises(ValueError):
+            mocked_studio.get_bar_panel(
+                [("BTC", "USDT"), ("ETH", "USDT")], bar_type="tick", bar_subclass="1"
+            )
+        assert m.call_count == 0
+        long_df = mocked_studio.get_bar_panel(
+            [("BTC", "USDT"), ("ETH", "USDT")],
+            bar_type="tick",
+            bar_subclass="1",
+            long=True,
+        )
+
+    assert long_df.loc["ETHUSDT"].shape[0] == 40
+
+
+@delete_test_folder
+def test_get_resampled_bar_df(mocked_studio):
+    start_time = (int(time.time()) // 3600 - 3) * 3_600_000
+    bars = make_bars(150, start_time=start_time)
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/bars", json=_paginate(bars))
+        bars_df = mocked_studio.get_resampled_bar_df(
+            "BTC", "USDT", "1h", start_timestamp=start_time + 1_000
+        )
+        hour_df = mocked_studio.get_resampled_bar_df(
+            "BTC", "USDT", "1h", end_timestamp=start_time + 3_600_000
+        )
+        requests = [request.qs["bar_subclass"] for request in m.request_history]
+
+    assert bars_df.shape[0] == 1
+    assert bars_df.index[0] == pd.Timestamp(start_time + 3_600_000, unit="ms")
+    assert bars_df["num_ticks"].iloc[0] == 60 * 20
+    assert hour_df.shape[0] == 1
+    assert hour_df["open"].iloc[0] == bars[0]["open"]
+    assert set(map(tuple, requests)) == {("1min",)}
+
+    with pytest.raises(ValueError):
+        mocked_studio.get_resampled_bar_df(
+            "BTC", "USDT", "1h", source_bar_subclass="7min"
+        )
+
+
+@delete_test_folder
+def test_repair_bar_cache_only_downloads_missing_windows(mocked_studio):
+    bars = _make_bars(500)
+    series = BarSeries("binance", "BTCUSDT", "time", "1min")
+    with requests_mock.mock() as m:
+        m.get("https://api.mizar.ai/api/v1/bars", json=_paginate(bars))
+        bars_df = mocked_studio.get_bar_df("BTC", "USDT", bar_subclass="1min")
+        mocked_studio.store.replace(
+            series, bars[100]["time"], bars[140]["time"], pd.DataFrame()
+        )
+        duplicate = dict(bars[300], id=1_000, first_trade_id=5_000, last_trade_id=5_009)
+        mocked_studio.store.append(series, pd.DataFrame([duplicate]))
+
+        issues_df = mocked_studio.check_bar_cache("BTC", "USDT", bar_subclass="1min")
+        calls = m.call_count
+        repaired_df = mocked_studio.repair_bar_cache("BTC", "USDT", bar_subclass="1min")
+        requested = [int(r.qs["start_timestamp"][0]) for r in m.request_history[calls:]]
+        repaired_bars_df = mocked_studio.get_bar_df("BTC", "USDT", bar_subclass="1min")
+
+    assert issues_df["issue"].value_counts().to_dict() == {
+        "trade_gap": 2,
+        "time_gap": 1,
+        "trade_overlap": 1,
+        "duplicate": 1,
+    }
+    assert repaired_df["repaired"].all()
+    assert sorted(requested) == [bars[99]["time"], bars[300]["time"]]
+    assert mocked_studio.check_bar_cache("BTC", "USDT", bar_subclass="1min").empty
+    pd.testing.assert_frame_equal(repaired_bars_df, bars_df)
@@ -0,0 +1,165 @@
+import shutil
+import tempfile
+import threading
+import time
+
+import pytest
+
+from mizar.api import Mizar
+from mizar.store import BarSeries
+from mizar.studio import MizarStudio
+from mizar.tailer import BarTailer
+from mizar.tests.fake_server import FakeMizarServer
+from mizar.tests.fake_server import make_bars
+
+SERIES = BarSeries("binance", "BTCUSDT", "tick", "dynamic")
+
+
+@pytest.fixture()
+def studio_server():
+    path = tempfile.mkdtemp()
+    bars = make_bars(150)
+    try:
+        with FakeMizarServer(bars=bars[:100], page_limit=50) as server:
+            mizar = Mizar("api_key", scheme="http", host=server.host)
+            yield MizarStudio(mizar, path=path), server, bars
+    finally:
+        shutil.rmtree(path)
+
+
+def test_tailer_yields_new_bars(studio_server):
+    studio, server, bars = studio_server
+    studio.get_bar_df("BTC", "USDT", bar_type="tick", bar_subclass="dynamic")
+    server.bars = bars[:130]
+    tailer = studio.tail(
+        [("BTC", "USDT")], bar_type="tick", bar_subclass="dynamic", poll_interval=0.01
+    )
+
+    received = []
+    for series, bars_df in tailer:
+        assert series == SERIES
+        received.append(bars_df["first_trade_id"].tolist())
+        server.bars = bars
+        if len(received) == 2:
+            tailer.stop()
+
+    assert received == [
+        [bar["first_trade_id"] for bar in bars[100:130]],
+        [bar["first_trade_id"] for bar in bars[130:]],
+    ]
+    assert studio.store.last_timestamp(SERIES) == bars[-1]["time"]
+    assert studio.store.read(SERIES).shape[0] == 150
+
+
+def test_tailer_calls_callbacks_in_background(studio_server):
+    studio, server, bars = studio_server
+    received = []
+    tailer = studio.tail(
+        [("BTC", "USDT")],
+        bar_type="tick",
+        bar_subclass="dynamic",
+        callbacks=[lambda series, bars_df: received.append(bars_df.shape[0])],
+        start_timestamp=0,
+        poll_interval=0.01,
+        retry_interval=0.01,
+    ).start()
+    try:
+        deadline = time.time() + 5
+        while sum(received) < 100 and time.time() < deadline:
+            time.sleep(0.01)
+        server.bars = bars
+        while sum(received) < 150 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        tailer.stop()
+
+    assert sum(received) == 150
+    assert not tailer.errors
+
+
+def test_tailer_keeps_the_pages_received_before_a_failure(studio_server, monkeypatch):
+    studio, server, bars = studio_server
+    studio.get_bar_df("BTC", "USDT", bar_type="tick", bar_subclass="dynamic")
+    server.bars = bars
+    get_bar_data = studio.mizar.get_bar_data
+    calls = []
+
+    def _get_bar_data(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 2:
+            raise ConnectionError("503 Service Unavailable")
+        return get_bar_data(**kwargs)
+
+    monkeypatch.setattr(studio.mizar, "get_bar_data", _get_bar_data)
+    tailer = BarTailer(
+        studio, [("BTC", "USDT")], bar_type="tick", bar_subclass="dynamic"
+    )
+    state = tailer._states[0]
+
+    _, failed_df = tailer._poll(state)
+    assert isinstance(tailer.errors[SERIES], ConnectionError)
+    _, bars_df = tailer._poll(state)
+
+    assert not tailer.errors
+    assert failed_df["first_trade_id"].tolist() + bars_df[
+        "first_trade_id"
+    ].tolist() == [bar["first_trade_id"] for bar in bars[100:]]
+    assert studio.store.read(SERIES).shape[0] == 150
+
+
+def test_tailer_survives_store_and_callback_errors(studio_server, monkeypatch):
+    studio, server, bars = studio_server
+    studio.get_bar_df("BTC", "USDT", bar_type="tick", bar_subclass="dynamic")
+    server.bars = bars
+    append = studio.store.append
+    appends = []
+
+    def _append(series, bars_df):
+        appends.append(bars_df.shape[0])
+        if len(appends) == 1:
+            raise OSError("No space left on device")
+        return append(series, bars_df)
+
+    def _failing_callback(series, bars_df):
+        raise ValueError("callback failed")
+
+    monkeypatch.setattr(studio.store, "append", _append)
+    tailer = studio.tail(
+        [("BTC", "USDT")],
+        bar_type="tick",
+        bar_subclass="dynamic",
+        callbacks=[_failing_callback],
+        poll_interval=0.01,
+        retry_interval=0.01,
+    )
+    timer = threading.Timer(5.0, tailer.stop)
+    timer.start()
+    received = []
+    for _, bars_df in tailer:
+        received.extend(bars_df["first_trade_id"].tolist())
+        if len(received) >= 50:
+            tailer.stop()
+    timer.cancel()
+
+    assert received == [bar["first_trade_id"] for bar in bars[100:]]
+    assert isinstance(tailer.errors[SERIES], ValueError)
+    assert studio.store.read(SERIES).shape[0] == 150
+
+
+def test_tailer_polls_time_bars_after_their_close(studio_server):
+    studio, _, _ = studio_server
+    tailer = BarTailer(studio, [("BTC", "USDT")], bar_subclass="1min")
+    state = tailer._states[0]
+    state.pagination = tailer._pagination(state)
+    state.pagination.timestamp = int(time.time()) // 60 * 60_000
+
+    tailer._schedule(state, received=True)
+    assert state.next_poll == (
+        state.pagination.timestamp / 1000 + 120 + tailer.publish_delay
+    )
+
+    delays = []
+    for _ in range(8):
+        tailer._schedule(state, received=False)
+        delays.append(state.retry_delay)
+    assert delays == [1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 60.0, 60.0]
@@ -0,0 +1,115 @@
+import pytest
+import requests
+
+from mizar.api import Mizar
+from mizar.ratelimit import RetryPolicy
+from mizar.tests.fake_server import FakeMizarServer
+from mizar.tests.fake_server import make_bars
+from mizar.transport import RequestsTransport
+from mizar.transport import Transport
+
+
+def _client(server, transport, **kwargs):
+    return Mizar(
+        "api_key",
+        scheme="http",
+        host=server.host,
+        check_connection=False,
+        transport=transport,
+        **kwargs,
+    )
+
+
+def test_read_timeout_is_retried():
+    with FakeMizarServer(latency=0.3) as server:
+        mizar = _client(
+            server,
+            RequestsTransport(timeout=(1.0, 0.05)),
+            retry=RetryPolicy(max_retries=1, backoff_factor=0.0),
+        )
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            mizar.get_exchanges()
+
+    assert server.requests.count("exchanges") == 2
+
+
+def test_compressed_responses_are_decoded():
+    with FakeMizarServer(bars=make_bars(500), compression=True) as server:
+        bars = _client(server, RequestsTransport()).get_bar_data(
+            base_asset="BTC", quote_asset="USDT"
+        )["bars"]
+        compressed_bytes = server.sent_bytes
+        server.sent_bytes = 0
+        identity_bars = _client(
+            server, RequestsTransport(compression=False)
+        ).get_bar_data(base_asset="BTC", quote_asset="USDT")["bars"]
+
+    assert bars == identity_bars == make_bars(500)
+    assert compressed_bytes * 5 < server.sent_bytes
+
+
+def test_transport_headers():
+    transport = RequestsTransport(headers={"X-Client": "research"})
+    with FakeMizarServer() as server:
+        mizar = _client(server, transport)
+        request = transport.prepare("GET", mizar.api_url + "exchanges")
+
+    assert mizar.transport is transport
+    assert request.headers["X-Client"] == "research"
+    assert request.headers["MIZAR-API-KEY"] == "api_key"
+    assert transport.session.headers["Accept-Encoding"] == "gzip, deflate"
+
+
+def test_environment_settings_are_read_once_per_host(monkeypatch):
+    transport = RequestsTransport()
+    calls = []
+    merge = transport.session.merge_environment_settings
+    monkeypatch.setattr(
+        transport.session,
+        "merge_environment_settings",
+        lambda *args: calls.append(args[0]) or merge(*args),
+    )
+    with FakeMizarServer() as server:
+        mizar = _client(server, transport)
+        for _ in range(3):
+            mizar.get_exchanges()
+            mizar.get_symbols("binance")
+
+    assert len(calls) == 1
+
+
+def test_incomplete_transport_cannot_be_created():
+    class SendOnlyTransport(Transport):
+        def send(self, request):
+            return None
+
+    with pytest.raises(TypeError):
+        SendOnlyTransport()
+
+
+def test_httpx_transport():
+    pytest.importorskip("httpx")
+    from mizar.transport import HttpxTransport
+
+    transport = HttpxTransport(http2=False)
+    with FakeMizarServer(bars=make_bars(500), compression=True) as server:
+        mizar = _client(server, transport)
+        assert mizar.get_exchanges() == {"exchanges": ["binance"]}
+        bars = mizar.get_bar_data(base_asset="BTC", quote_asset="USDT")["bars"]
+    transport.close()
+
+    assert bars == make_bars(500)
+
+
+def test_httpx_transport_query_params_match_requests():
+    pytest.importorskip("httpx")
+    from mizar.transport import HttpxTransport
+
+    url = "https://api.mizar.ai/api/v1/symbols"
+    params = {"exchange": "binance", "market": None, "spot": True}
+    transport = HttpxTransport(http2=False)
+    httpx_url = str(transport.prepare("GET", url, params=params).url)
+    transport.close()
+
+    assert httpx_url == RequestsTransport().prepare("GET", url, params=params).url
+    assert httpx_url == url + "?exchange=binance&spot=True"
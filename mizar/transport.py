@@ -0,0 +1,257 @@
+import threading
+from abc import ABC
+from abc import abstractmethod
+from typing import Any
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from typing import Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+Timeout = Union[None, float, Tuple[float, float]]
+
+
+class Transport(ABC):
+    """
+    Sends the HTTP requests of the Mizar client. Requests are built with
+    prepare, then sent with send, and the responses expose the interface
+    of requests responses (status_code, ok, headers, content, text, url
+    and request.method). Failures raise requests exceptions, which the
+    retry policy relies on.
+
+    headers are sent with every request.
+    """
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None):
+        self.headers: Dict[str, str] = dict(headers or {})
+
+    @abstractmethod
+    def prepare(self, method: str, url: str, **kwargs) -> Any:
+        """
+        Build a request, kwargs being those of requests.request.
+        """
+
+    @abstractmethod
+    def send(self, request: Any) -> Any:
+        """
+        Send a request built by prepare and return its response.
+        """
+
+    @abstractmethod
+    def body_size(self, request: Any) -> int:
+        """
+        Return the size in bytes of the body of a prepared request.
+        """
+
+    def request(self, method: str, url: str, **kwargs) -> Any:
+        return self.send(self.prepare(method, url, **kwargs))
+
+    def close(self):  # noqa: B027
+        """
+        Release the connections, nothing to release by default.
+        """
+
+
+class RequestsTransport(Transport):
+    """
+    Transport based on requests. Every thread gets its own session (they
+    are not thread-safe), all sharing the same connection pools.
+
+    The proxy and certificate settings of the environment are read once
+    per host instead of on every request.
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        timeout: Timeout = (5.0, 60.0),
+        compression: bool = True,
+    ):
+        """
+        :param headers: headers sent with every request
+        :type headers: Dict[str, str]
+        :param pool_connections: number of hosts whose connection pool is
+                                 kept
+        :type pool_connections: int
+        :param pool_maxsize: maximum number of connections kept open per
+                             host, set it to the number of threads sending
+                             requests concurrently
+        :type pool_maxsize: int
+        :param timeout: connect and read timeouts in seconds, or a single
+                        timeout for both. None waits forever
+        :type timeout: Union[float, Tuple[float, float]]
+        :param compression: accept gzip and deflate compressed responses
+        :type compression: bool
+        """
+        super().__init__(headers)
+        self.timeout = timeout
+        self.compression = compression
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+        self._local = threading.local()
+        self._environment_settings: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        Session of the current thread.
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.mount("http://", self.adapter)
+            session.mount("https://", self.adapter)
+            session.headers["Accept-Encoding"] = (
+                "gzip, deflate" if self.compression else "identity"
+            )
+        return session
+
+    def prepare(self, method, url, **kwargs) -> requests.PreparedRequest:
+        headers = dict(self.headers, **kwargs.pop("headers", None) or {})
+        return self.session.prepare_request(
+            requests.Request(method, url, headers=headers, **kwargs)
+        )
+
+    def send(self, request: requests.PreparedRequest) -> requests.Response:
+        return self.session.send(
+            request, timeout=self.timeout, **self._settings(request.url)
+        )
+
+    def body_size(self, request: requests.PreparedRequest) -> int:
+        body = request.body or b""
+        return len(body.encode() if isinstance(body, str) else body)
+
+    def _settings(self, url: str) -> Dict[str, Any]:
+        scheme, host = urlsplit(url)[:2]
+        settings = self._environment_settings.get((scheme, host))
+        if settings is None:
+            settings = self.session.merge_environment_settings(
+                url, {}, None, None, None
+            )
+            self._environment_settings[(scheme, host)] = settings
+        return settings
+
+    def close(self):
+        self.adapter.close()
+
+
+class _HttpxRequest(NamedTuple):
+    method: str
+
+
+class _HttpxResponse:
+    """
+    Expose an httpx response through the requests interface used by the
+    client.
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.content = response.content
+        self.url = str(response.url)
+        self.request = _HttpxRequest(response.request.method)
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self._response.text
+
+    def json(self) -> Any:
+        return self._response.json()
+
+
+class HttpxTransport(Transport):
+    """
+    Transport based on httpx, which can multiplex every request on a
+    single HTTP/2 connection (requires ``pip install mizar[http2]``).
+    httpx clients are thread-safe, one is shared by all the threads.
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        http2: bool = True,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        timeout: Timeout = (5.0, 60.0),
+        compression: bool = True,
+    ):
+        """
+        :param headers: headers sent with every request
+        :type headers: Dict[str, str]
+        :param http2: negotiate HTTP/2 with the server
+        :type http2: bool
+        :param max_connections: maximum number of connections open
+        :type max_connections: int
+        :param max_keepalive_connections: maximum number of idle connections
+                                          kept open
+        :type max_keepalive_connections: int
+        :param timeout: connect and read timeouts in seconds, or a single
+                        timeout for both. None waits forever
+        :type timeout: Union[float, Tuple[float, float]]
+        :param compression: accept gzip and deflate compressed responses
+        :type compression: bool
+        """
+        import httpx
+
+        super().__init__(headers)
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            timeout = httpx.Timeout(read, connect=connect)
+        self._httpx = httpx
+        self.client = httpx.Client(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=timeout,
+            headers={"Accept-Encoding": "gzip, deflate" if compression else "identity"},
+        )
+
+    def prepare(self, method, url, **kwargs):
+        headers = dict(self.headers, **kwargs.pop("headers", None) or {})
+        if kwargs.get("params"):
+            # requests drops None values and sends booleans as True/False,
+            # httpx sends an empty value and true/false
+            kwargs["params"] = {
+                key: str(value) if isinstance(value, bool) else value
+                for key, value in kwargs["params"].items()
+                if value is not None
+            }
+        # requests' data and files map to httpx's data, files and content
+        data = kwargs.pop("data", None)
+        if isinstance(data, (bytes, str)):
+            kwargs["content"] = data
+        elif data is not None:
+            kwargs["data"] = data
+        return self.client.build_request(method, url, headers=headers, **kwargs)
+
+    def send(self, request) -> _HttpxResponse:
+        httpx = self._httpx
+        try:
+            return _HttpxResponse(self.client.send(request))
+        except httpx.ConnectTimeout as e:
+            raise requests.exceptions.ConnectTimeout(str(e)) from e
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.ReadTimeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    def body_size(self, request) -> int:
+        return len(request.read())
+
+    def close(self):
+        self.client.close()
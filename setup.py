@@ -23,15 +23,20 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/MizarAI/mizar",
     packages=find_packages(),
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     install_requires=requirements,
+    extras_require={
+        "async": ["aiohttp>=3.7"],
+        "http2": ["httpx[http2]>=0.23"],
+        "orjson": ["orjson>=3.0"],
+        "zstd": ["zstandard>=0.15"],
+    },
     project_urls={
         "Bug Tracker": "https://github.com/MizarAI/mizar/issues",
     },
     classifiers=[
         "Programming Language :: Python",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "License :: OSI Approved :: MIT License",